@@ -1,31 +1,113 @@
-from json import load
-from os import getenv, mkdir
+from hashlib import sha256
+from json import dumps, load, loads
+from os import fstat, getenv
 from pathlib import Path
-from shutil import make_archive
-from tempfile import TemporaryDirectory
-from typing import Any, cast, get_args
-from urllib.parse import parse_qs
-
-from dash import Dash, Input, Output, callback, dcc, dependencies, html
-from flask import Flask
-from pandas import read_csv
+from typing import Any, Iterable, cast, get_args
+from urllib.parse import parse_qs, urlsplit
+
+from dash import (
+    ClientsideFunction,
+    Dash,
+    Input,
+    Output,
+    callback,
+    dcc,
+    dependencies,
+    html,
+    no_update,
+)
+from flask import (
+    Flask,
+    Response,
+    abort,
+    after_this_request,
+    has_request_context,
+    request,
+    send_file,
+    send_from_directory,
+)
+from pandas import DataFrame
 from plotly.graph_objects import Figure
-
+from plotly.io import to_json
+from plotly.io.json import to_json_plotly
+
+from statistics_server.cache import LRUCache
+from statistics_server.compression import ResponseCompressor
+from statistics_server.data_store import (
+    arrow_available,
+    get_category_labels,
+    get_statistics_file,
+    get_statistics_file_base,
+    read_prepared_statistics,
+    switch_label_language,
+)
+from statistics_server.downloads import (
+    create_archive,
+    create_data_archive,
+    get_data_archive_key,
+    get_download_cache,
+)
+from statistics_server.export_jobs import (
+    EXPORT_CONCURRENCY,
+    EXPORT_POLL_INTERVAL,
+    EXPORT_QUEUE_PATH,
+    ExportJob,
+    ExportQueue,
+)
+from statistics_server.figures import (
+    STATIC_FIGURE_ENCODINGS,
+    STATIC_FIGURES_PATH,
+    StaticFigure,
+    StaticFigureIndex,
+    create_figure,
+    get_boxplot_flag,
+    get_figure_measure,
+    get_figure_measures,
+    get_figure_source,
+)
+from statistics_server.image_export import (
+    IMAGE_RENDERER_START,
+    Images,
+    check_kaleido_session,
+    get_image_cache,
+    get_renderer_pool,
+    read_cached_images,
+    render_cached_images,
+    render_images,
+    start_renderers,
+)
 from statistics_server.language_handling import (
+    IMAGE_EXPORT_ERROR_TRANSLATION,
+    SUPPORTED_LANGUAGES,
     get_language_config,
-    handle_categorical_labels_and_order,
 )
-from statistics_server.layout import create_grouping_dropdown, create_measure_dropdown
-from statistics_server.names import MEAN, PROPORTION, YEAR
-from statistics_server.numerical_boxplot_graph import create_numerical_boxplot_figure
-from statistics_server.simple_graph import (
-    create_bar_graph_figure,
-    create_line_graph_figure,
+from statistics_server.layout import (
+    create_figure_patch,
+    create_grouping_dropdown,
+    create_measure_dropdown,
+)
+from statistics_server.metadata import MetadataRegistry
+from statistics_server.names import MEAN, YEAR
+from statistics_server.simple_graph import apply_display_options
+from statistics_server.statistics_api import (
+    API_FORMATS,
+    API_MAX_SELECTIONS,
+    GROUP_SEPARATOR,
+    Selection,
+    check_columns,
+    combine_statistics,
+    get_key_columns,
+    iter_arrow_stream,
+    parse_selection,
+    parse_year,
+    select_statistics,
+    statistics_to_json,
 )
 from statistics_server.types import (
     LanguageCode,
     Measure,
     PlotlyLabeledOption,
+    PlotType,
     VariableType,
 )
 
@@ -36,7 +118,20 @@ FONT_AWESOME_COPYRIGHT_NOTICE = (
     " (Icons: CC BY 4.0, Fonts: SIL OFL 1.1, Code: MIT License)"
     "Copyright 2023 Fonticons, Inc."
 )
-BOXPLOT_MIN_VALUE = 10
+IMAGE_EXPORT_FORMATS = ("svg", "png")
+IMAGE_EXPORT_WIDTH = 1400
+IMAGE_EXPORT_HEIGHT = 500
+# "server" renders images with kaleido, "client" renders them in the browser.
+IMAGE_EXPORT_MODE = getenv("IMAGE_EXPORT_MODE", "server")
+if IMAGE_EXPORT_MODE not in ("server", "client"):
+    raise RuntimeError("IMAGE_EXPORT_MODE has to be server or client.")
+DATA_CACHE_MAX_BYTES = int(getenv("DATA_CACHE_MAX_BYTES", str(256 * 1024**2)))
+FIGURE_CACHE_MAX_BYTES = int(getenv("FIGURE_CACHE_MAX_BYTES", str(64 * 1024**2)))
+# Seconds browsers and proxies reuse a figure before revalidating its ETag.
+FIGURE_MAX_AGE = int(getenv("FIGURE_MAX_AGE", "3600"))
+CONTROL_PANEL_CACHE_MAX_BYTES = int(
+    getenv("CONTROL_PANEL_CACHE_MAX_BYTES", str(16 * 1024**2))
+)
 
 
 def get_environment_variables() -> tuple[Path, str]:
@@ -50,10 +145,19 @@ def get_environment_variables() -> tuple[Path, str]:
 PLACEHOLDER_MEASURE_DROPDOWN = dcc.Dropdown([MEAN], MEAN, id="measure-dropdown")
 
 data_base_path, url_base_pathname = get_environment_variables()
-group_metadata_file = data_base_path.joinpath("group_metadata.json").absolute()
 citation_metadata_file = data_base_path.joinpath("citation.json").absolute()
 
+DATA_DOWNLOAD_PATH = f"{url_base_pathname}download/data"
+FIGURE_PATH = f"{url_base_pathname}figure"
+FIGURE_PATCH_PATH = f"{url_base_pathname}figure-patch"
+STATISTICS_API_PATH = f"{url_base_pathname}api/statistics"
+STATIC_FIGURE_PATH = f"{url_base_pathname}figures/"
+# Static figures are named by their content, so they never change.
+STATIC_FIGURE_MAX_AGE = 365 * 24 * 60 * 60
+
 server = Flask(__name__)
+response_compressor = ResponseCompressor()
+response_compressor.init_app(server)
 app = Dash(
     __name__,
     server=server,  # type: ignore
@@ -63,11 +167,7 @@ app = Dash(
     ],
 )
 
-metadata = {}
-if group_metadata_file.exists():
-    print("ERROR: No group metadata file found.")
-    with open(group_metadata_file, "r", encoding="utf-8") as metadata_file:
-        metadata = load(metadata_file)
+metadata_registry = MetadataRegistry(data_base_path)
 citation = {}
 if citation_metadata_file.exists():
     print("ERROR: No citation metadata file found.")
@@ -75,166 +175,227 @@ if citation_metadata_file.exists():
         citation = load(metadata_file)
 
 
-def _get_variable_metadata(base_path: Path) -> dict[str, Any]:
-    variable_metadata_file_path = base_path.joinpath("meta.json")
-    with open(variable_metadata_file_path, "r", encoding="utf-8") as file:
-        variable_metadata = load(file)
-    return variable_metadata
+def _dataframe_size(data: DataFrame) -> int:
+    return int(data.memory_usage(deep=True).sum())
+
+
+def _serialized_figure_size(serialized_figure: tuple[str, str]) -> int:
+    return len(serialized_figure[0])
+
 
+def _serialized_components_size(components: Any) -> int:
+    return len(to_json_plotly(components))
 
-def _filter_group_metadata(_metadata, variable_name, variable_type):
-    _base_path = get_variable_data_path(
-        variable_type=variable_type, variable_name=variable_name
+
+type DataCacheKey = tuple[VariableType, str, tuple[str, ...]]
+data_cache: LRUCache[DataCacheKey, DataFrame] = LRUCache(
+    max_bytes=DATA_CACHE_MAX_BYTES, sizer=_dataframe_size
+)
+download_cache = get_download_cache()
+image_cache = get_image_cache()
+static_figures = StaticFigureIndex(STATIC_FIGURES_PATH)
+type FigureCacheKey = tuple[
+    VariableType, str, tuple[str, ...], Measure, bool, bool, LanguageCode
+]
+figure_cache: LRUCache[FigureCacheKey, tuple[str, str]] = LRUCache(
+    max_bytes=FIGURE_CACHE_MAX_BYTES, sizer=_serialized_figure_size
+)
+type ControlPanelCacheKey = tuple[VariableType, str, LanguageCode, str]
+control_panel_cache: LRUCache[ControlPanelCacheKey, tuple[list[Any], list[Any]]] = (
+    LRUCache(max_bytes=CONTROL_PANEL_CACHE_MAX_BYTES, sizer=_serialized_components_size)
+)
+
+
+def get_image_export_settings(
+    variable_type: VariableType, variable_name: str, language: LanguageCode
+) -> dict[str, Any]:
+    """Everything the browser needs to export the figure of a variable."""
+    variable_metadata = metadata_registry.get_variable_metadata(
+        variable_type, variable_name
     )
-    variable_metadata = _get_variable_metadata(_base_path)
-    groups = variable_metadata.get("groups")
-    if not groups:
-        return _metadata
-    output = {}
-    for group in groups:
-        if group in _metadata:
-            output[group] = _metadata[group]
-    return output
-
-
-app.layout = html.Div(
-    id="outer-container",
-    children=[
-        html.Div(
-            id="control-and-graph",
-            children=[
-                html.Div(
-                    id="control-panel",
-                    className="control-panel",
-                    children=[
-                        create_grouping_dropdown(
-                            metadata=metadata,
-                            element_id="first-group",
-                            language="de",
-                        ),
-                        create_grouping_dropdown(
-                            metadata=metadata,
-                            element_id="second-group",
-                            language="de",
-                        ),
-                        html.Div(
-                            id="measure-dropdown-container",
-                            children=[PLACEHOLDER_MEASURE_DROPDOWN],
-                        ),
-                        html.Div(
-                            id="confidence-container",
-                            children=[
-                                dcc.Checklist(
-                                    id="confidence-checkbox",
-                                    options=[
-                                        {
-                                            "label": "Show Confidence Interval",
-                                            "value": "confidence",
+    return {
+        "title": variable_metadata["title"],
+        "fileNameBase": f"{variable_name}_{YEAR}",
+        "formats": IMAGE_EXPORT_FORMATS,
+        "width": IMAGE_EXPORT_WIDTH,
+        "height": IMAGE_EXPORT_HEIGHT,
+        "citationFileName": f"Cite_{language}.txt",
+        "citation": citation["base_citation"][language],
+    }
+
+
+def create_image_export_components(
+    settings: dict[str, Any] | None = None,
+) -> list[Any]:
+    """Components the figure download needs in the configured export mode."""
+    if IMAGE_EXPORT_MODE == "client":
+        return [dcc.Store(id="image-export-settings", data=settings)]
+    return [
+        dcc.Store(id="image-export-job"),
+        dcc.Interval(
+            id="image-export-poll",
+            interval=EXPORT_POLL_INTERVAL * 1000,
+            disabled=True,
+        ),
+        html.Div(id="image-export-error", className="removed"),
+    ]
+
+
+def create_layout() -> html.Div:
+    """Create the page layout without a selected variable."""
+    return html.Div(
+        id="outer-container",
+        children=[
+            html.Div(
+                id="control-and-graph",
+                children=[
+                    html.Div(
+                        id="control-panel",
+                        className="control-panel",
+                        children=[
+                            create_grouping_dropdown(
+                                metadata=metadata_registry.group_metadata,
+                                element_id="first-group",
+                                language="de",
+                            ),
+                            create_grouping_dropdown(
+                                metadata=metadata_registry.group_metadata,
+                                element_id="second-group",
+                                language="de",
+                            ),
+                            html.Div(
+                                id="measure-dropdown-container",
+                                children=[PLACEHOLDER_MEASURE_DROPDOWN],
+                            ),
+                            html.Div(
+                                id="confidence-container",
+                                children=[
+                                    dcc.Checklist(
+                                        id="confidence-checkbox",
+                                        options=[
+                                            {
+                                                "label": "Show Confidence Interval",
+                                                "value": "confidence",
+                                            },
+                                        ],
+                                        value=["confidence"],
+                                    ),
+                                    html.Button(
+                                        id="confidence-popover-button",
+                                        className="info-icon",
+                                        children=[
+                                            html.I(className="fas fa-info-circle")
+                                        ],
+                                        style={
+                                            "padding-left": "0.3em",
+                                            "font-size": "1.2em",
                                         },
-                                    ],
-                                    value=["confidence"],
-                                ),
-                                html.Button(
-                                    id="confidence-popover-button",
-                                    className="info-icon",
-                                    children=[html.I(className="fas fa-info-circle")],
-                                    style={
-                                        "padding-left": "0.3em",
-                                        "font-size": "1.2em",
+                                        **{
+                                            "data-copyright-notice": FONT_AWESOME_COPYRIGHT_NOTICE,
+                                        },
+                                    ),
+                                    html.Div(
+                                        id="confidence-popover",
+                                        className="hidden",
+                                        children=[
+                                            LANGUAGE_CONFIG["confidence_interval"]
+                                        ],
+                                    ),
+                                ],
+                            ),
+                            dcc.Checklist(
+                                id="legend-checkbox",
+                                options=[
+                                    {
+                                        "label": "Show Legend",
+                                        "value": "legend",
                                     },
-                                    **{
-                                        "data-copyright-notice": FONT_AWESOME_COPYRIGHT_NOTICE,
+                                ],
+                                value=["legend"],
+                            ),
+                            dcc.Checklist(
+                                id="bargraph-checkbox",
+                                className="removed",
+                                options=[
+                                    {
+                                        "label": "Show Bar Graph",
+                                        "value": "bar",
                                     },
-                                ),
-                                html.Div(
-                                    id="confidence-popover",
-                                    className="hidden",
-                                    children=[LANGUAGE_CONFIG["confidence_interval"]],
-                                ),
-                            ],
-                        ),
-                        dcc.Checklist(
-                            id="legend-checkbox",
-                            options=[
-                                {
-                                    "label": "Show Legend",
-                                    "value": "legend",
-                                },
-                            ],
-                            value=["legend"],
-                        ),
-                        dcc.Checklist(
-                            id="bargraph-checkbox",
-                            className="removed",
-                            options=[
-                                {
-                                    "label": "Show Bar Graph",
-                                    "value": "bar",
-                                },
-                            ],
-                            value=False,
-                        ),
-                        dcc.Checklist(
-                            id="boxplot-checkbox",
-                            className="removed",
-                            options=[
-                                {
-                                    "label": "Show Boxplot",
-                                    "value": "boxplot",
-                                },
-                            ],
-                            value=False,
-                        ),
-                        html.Span(
-                            id="boxplot-flag",
-                            key="boxplot-flag",
-                            className="removed",
-                            children="hide",
-                        ),
-                        html.Div(
-                            id="download-button-container",
-                            children=[
-                                html.Button(
-                                    "Download CSV",
-                                    id="btn-data-download",
-                                ),
-                                dcc.Download(id="data-download", type="str"),
-                                html.Button(
-                                    "Download Figure",
-                                    id="btn-image-download",
-                                ),
-                                dcc.Download(id="image-download", type="str"),
-                            ],
-                            className="download-buttons",
-                        ),
-                    ],
-                ),
-                html.Div(
-                    id="graph-citation-container",
-                    children=[
-                        dcc.Graph(
-                            id="graph",
-                            className="graph-container",
-                            figure=Figure(),
-                        ),
-                        html.P(
-                            id="citation-text",
-                            children=[
-                                "Cite as: ",
-                                citation.get("base_citation", {"en": ""})["en"],
-                            ],
-                        ),
-                    ],
-                ),
-            ],
-        ),
-        html.Div(
-            id="below-control-and-graph",
-            children=[],
-        ),
-        dcc.Location(id="url"),
-    ],
-)
+                                ],
+                                value=False,
+                            ),
+                            dcc.Checklist(
+                                id="boxplot-checkbox",
+                                className="removed",
+                                options=[
+                                    {
+                                        "label": "Show Boxplot",
+                                        "value": "boxplot",
+                                    },
+                                ],
+                                value=False,
+                            ),
+                            html.Span(
+                                id="boxplot-flag",
+                                key="boxplot-flag",
+                                className="removed",
+                                children="hide",
+                            ),
+                            html.Div(
+                                id="download-button-container",
+                                children=[
+                                    html.A(
+                                        html.Button(
+                                            "Download CSV",
+                                            id="btn-data-download",
+                                        ),
+                                        id="data-download-link",
+                                        href=DATA_DOWNLOAD_PATH,
+                                    ),
+                                    html.Button(
+                                        "Download Figure",
+                                        id="btn-image-download",
+                                    ),
+                                    dcc.Download(id="image-download", type="str"),
+                                    *create_image_export_components(),
+                                ],
+                                className="download-buttons",
+                            ),
+                        ],
+                    ),
+                    html.Div(
+                        id="graph-citation-container",
+                        children=[
+                            dcc.Graph(
+                                id="graph",
+                                className="graph-container",
+                                figure=Figure(),
+                            ),
+                            dcc.Store(id="trace-visibility", data={}),
+                            html.P(
+                                id="citation-text",
+                                children=[
+                                    "Cite as: ",
+                                    citation.get("base_citation", {"en": ""})["en"],
+                                ],
+                            ),
+                        ],
+                    ),
+                ],
+            ),
+            html.Div(
+                id="below-control-and-graph",
+                children=[],
+            ),
+            dcc.Location(id="url"),
+            dcc.Store(id="rendered-search"),
+            dcc.Store(id="static-figure"),
+            dcc.Store(id="figure-path", data=FIGURE_PATH),
+            dcc.Store(id="figure-patch-path", data=FIGURE_PATCH_PATH),
+            dcc.Store(id="figure-url"),
+            dcc.Store(id="requested-search"),
+        ],
+    )
 
 
 def _ensure_correct_variable_type(variable_type: str) -> VariableType:
@@ -261,20 +422,73 @@ def parse_search(raw_search: str) -> tuple[str, VariableType, LanguageCode]:
     language: LanguageCode = cast(
         LanguageCode, parsed_search.get("language", ["en"])[0]
     )
+    if language not in SUPPORTED_LANGUAGES:
+        raise RuntimeError("Non-existent language selected.")
 
     return variable_name, variable_type, language
 
 
+# The view of the requested URL is usually rendered inline by serve_layout,
+# the control panel is only created by a callback if it was not.
+app.clientside_callback(
+    """
+    function(search, renderedSearch) {
+        if (search === renderedSearch) {
+            return window.dash_clientside.no_update;
+        }
+        return search;
+    }
+    """,
+    Output("requested-search", "data"),
+    Input("url", "search"),
+    dependencies.State("rendered-search", "data"),
+)
+
+
 @callback(
     Output("control-panel", "children"),
     Output("below-control-and-graph", "children"),
-    Input("url", "search"),
+    Input("requested-search", "data"),
+    prevent_initial_call=True,
 )
 def handle_group_dropdowns(search: str) -> tuple[list[Any], list[Any]]:
-
-    variable_type: VariableType
     variable_name, variable_type, language = parse_search(search)
-    _metadata = _filter_group_metadata(metadata, variable_name, variable_type)
+    return get_control_panel(variable_type, variable_name, language)
+
+
+def get_control_panel(
+    variable_type: VariableType,
+    variable_name: str,
+    language: LanguageCode,
+    show_boxplot: str = "hide",
+) -> tuple[list[Any], list[Any]]:
+    """Get the controls of a variable and the elements below the graph.
+
+    Components are cached until the metadata registry changes.
+    The returned components are shared between requests and must not be mutated.
+    """
+    cache_key = (variable_type, variable_name, language, show_boxplot)
+    control_panel = control_panel_cache.get(
+        cache_key, version=metadata_registry.version
+    )
+    if control_panel is None:
+        control_panel = create_control_panel(
+            variable_type, variable_name, language, show_boxplot
+        )
+        control_panel_cache.put(
+            cache_key, control_panel, version=metadata_registry.version
+        )
+    return control_panel
+
+
+def create_control_panel(
+    variable_type: VariableType,
+    variable_name: str,
+    language: LanguageCode,
+    show_boxplot: str = "hide",
+) -> tuple[list[Any], list[Any]]:
+    """Create the controls of a variable and the elements below the graph."""
+    _metadata = metadata_registry.get_allowed_groups(variable_type, variable_name)
 
     language_config = get_language_config(language)
 
@@ -377,21 +591,30 @@ def handle_group_dropdowns(search: str) -> tuple[list[Any], list[Any]]:
             value=False,
         ),
         html.Span(
-            id="boxplot-flag", key="boxplot-flag", className="removed", children="hide"
+            id="boxplot-flag",
+            key="boxplot-flag",
+            className="removed",
+            children=show_boxplot,
         ),
         html.Div(
             id="download-button-container",
             children=[
-                html.Button(
-                    language_config["download_data"],
-                    id="btn-data-download",
+                html.A(
+                    html.Button(
+                        language_config["download_data"],
+                        id="btn-data-download",
+                    ),
+                    id="data-download-link",
+                    href=DATA_DOWNLOAD_PATH,
                 ),
-                dcc.Download(id="data-download", type="str"),
                 html.Button(
                     language_config["download_image"],
                     id="btn-image-download",
                 ),
                 dcc.Download(id="image-download", type="str"),
+                *create_image_export_components(
+                    get_image_export_settings(variable_type, variable_name, language)
+                ),
             ],
             className="download-buttons",
         ),
@@ -400,76 +623,311 @@ def handle_group_dropdowns(search: str) -> tuple[list[Any], list[Any]]:
     return (children, below_control_and_graph_children)
 
 
-@callback(
-    Output("data-download", "data"),
-    dependencies.State("url", "search"),
-    dependencies.State("first-group", "value"),
-    dependencies.State("second-group", "value"),
-    dependencies.State("first-group", "options"),
-    Input("btn-data-download", "n_clicks"),
-    prevent_initial_call=True,
-)
-def download(
-    search: str,
-    first_group_value: str,
-    second_group_value: str | None,
-    first_group_options: list[PlotlyLabeledOption],
-    _: Any,
-) -> Any:
+def parse_view_request() -> tuple[str, VariableType, LanguageCode, list[str]]:
+    """Parse the variable and the grouping of a view from the query parameters.
 
-    variable_name, variable_type, _ = parse_search(search)
-    _data_base_path = get_variable_data_path(variable_type, variable_name)
+    Takes the query parameters of the app page
+    and the selected groups as first-group and second-group.
+    """
+    variable_name, variable_type, language = parse_search(request.query_string.decode())
+    allowed_groups = metadata_registry.get_allowed_groups(variable_type, variable_name)
+    grouping, _, _ = handle_grouping(
+        request.args.get("first-group"), request.args.get("second-group"), []
+    )
+    if not set(grouping).issubset(allowed_groups):
+        raise RuntimeError("Non-existent group selected.")
+    return variable_name, variable_type, language, grouping
+
+
+@server.route(DATA_DOWNLOAD_PATH)
+def download_data() -> Response:
+    """Send the data of a grouping in both languages as zip archive."""
+    try:
+        variable_name, variable_type, _, grouping = parse_view_request()
+        data_file = _get_data_file_path(variable_type, variable_name, grouping)
+    except RuntimeError:
+        abort(400)
+    if not data_file.exists():
+        abort(404)
+
+    archive_key = get_data_archive_key(
+        data_file,
+        metadata_registry.get_label_metadata(variable_type, variable_name, grouping),
+        citation["base_citation"],
+    )
+    # The open file is sent, so evicting it in the meantime does not matter.
+    archive_file = download_cache.open(archive_key)
+    if archive_file is None:
+        archive_file = create_data_archive(
+            data_file.stem,
+            {
+                _language: read_labeled_data(
+                    variable_type, variable_name, grouping, _language
+                )
+                for _language in SUPPORTED_LANGUAGES
+            },
+            citation["base_citation"],
+        )
+        download_cache.put(archive_key, archive_file.getvalue())
+    response = send_file(
+        archive_file,
+        mimetype="application/zip",
+        as_attachment=True,
+        download_name=f"{data_file.stem}.zip",
+        etag=archive_key,
+    )
+    if response.content_length is None:
+        response.content_length = fstat(archive_file.fileno()).st_size
+    return response
 
-    grouping, _, second_group_value = handle_grouping(
-        first_group_value, second_group_value, first_group_options
+
+def get_figure_etag(
+    data_file: Path,
+    variable_type: VariableType,
+    variable_name: str,
+    grouping: list[str],
+    measure: Measure,
+    plot_type: PlotType,
+    language: LanguageCode,
+) -> str:
+    """Hash the view and the version of everything its figure is created from."""
+    source = get_figure_source(
+        data_file,
+        metadata_registry.get_label_metadata(variable_type, variable_name, grouping),
     )
-    file_name_base = "_".join([variable_name, YEAR, *grouping])
-    data_file = _data_base_path.joinpath(file_name_base + ".csv").absolute()
-    data = read_csv(data_file)
+    view = [source, variable_type, variable_name, grouping, measure, plot_type]
+    return sha256(dumps([*view, language]).encode("utf-8")).hexdigest()
+
 
-    # TODO: Refactor Partial redundancy
-    _base_path = get_variable_data_path(
-        variable_type=variable_type, variable_name=variable_name
+def parse_figure_measure(variable_type: VariableType, measure: str | None) -> Measure:
+    figure_measure = get_figure_measure(variable_type, measure)
+    if figure_measure not in get_figure_measures(variable_type):
+        raise RuntimeError("Incorrect query parameters provided.")
+    return figure_measure
+
+
+def parse_figure_request() -> (
+    tuple[str, VariableType, LanguageCode, list[str], Measure, PlotType]
+):
+    """Parse the view, the measure and the plot type of a figure request."""
+    variable_name, variable_type, language, grouping = parse_view_request()
+    measure = parse_figure_measure(variable_type, request.args.get("measure"))
+    plot_type = request.args.get("plot", "line")
+    if plot_type not in get_args(PlotType.__value__):
+        raise RuntimeError("Incorrect query parameters provided.")
+    return (
+        variable_name,
+        variable_type,
+        language,
+        grouping,
+        measure,
+        cast(PlotType, plot_type),
     )
-    _metadata = []
-    if variable_type == "categorical":
-        _metadata = [_get_variable_metadata(_base_path)]
-    for _variable in grouping:
-        _metadata.append(metadata[_variable])
-
-    # TODO: Refactor readability
-    with TemporaryDirectory() as tmp_folder:
-        path_to_zip = Path(tmp_folder).joinpath("graph")
-        mkdir(path_to_zip)
-        for _language in ["en", "de"]:
-            _data = handle_categorical_labels_and_order(
-                data=data, metadata=_metadata, language=_language
-            )
-            _data.to_csv(
-                path_to_zip.joinpath(f"{data_file.stem}_{_language}.csv"), index=False
-            )
-            _data.to_excel(
-                path_to_zip.joinpath(f"{data_file.stem}_{_language}.xlsx"), index=False
-            )
-            with open(
-                path_to_zip.joinpath(f"Cite_{_language}.txt"), "w", encoding="utf-8"
-            ) as cite_file:
-                cite_file.write(citation["base_citation"][_language])
-        archive = make_archive(f"{tmp_folder}/{data_file.stem}", "zip", path_to_zip)
-        del data
-        return dcc.send_file(archive)
 
 
-@callback(
-    Output("image-download", "data"),
-    dependencies.State("url", "search"),
-    dependencies.State("first-group", "value"),
-    dependencies.State("second-group", "value"),
-    dependencies.State("first-group", "options"),
-    dependencies.State("graph", "figure"),
-    Input("btn-image-download", "n_clicks"),
-    prevent_initial_call=True,
+@server.route(FIGURE_PATH)
+def send_figure() -> Response:
+    """Send the figure of a view with the default display options.
+
+    Takes the query parameters of a view and the measure and plot type.
+    Unchanged figures are revalidated by their ETag without creating them.
+    """
+    try:
+        variable_name, variable_type, language, grouping, measure, plot_type = (
+            parse_figure_request()
+        )
+        data_file = _get_data_file_path(variable_type, variable_name, grouping)
+    except RuntimeError:
+        abort(400)
+    if not data_file.exists():
+        abort(404)
+
+    etag = get_figure_etag(
+        data_file, variable_type, variable_name, grouping, measure, plot_type, language
+    )
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        figure_json, _ = create_figure_json(
+            variable_type,
+            variable_name,
+            grouping,
+            measure=measure,
+            bar_graph=plot_type == "bar",
+            boxplot=plot_type == "box",
+            language=language,
+        )
+        response = Response(figure_json, mimetype="application/json")
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = FIGURE_MAX_AGE
+    return response
+
+
+@server.route(FIGURE_PATCH_PATH)
+def send_figure_patch() -> Response:
+    """Send the changes from the figure of base-measure to the figure of measure.
+
+    Takes the query parameters of the figure route and base-measure.
+    A new measure mostly changes the values of the traces,
+    so the browser patches the displayed figure instead of loading the new one.
+    """
+    try:
+        variable_name, variable_type, language, grouping, measure, plot_type = (
+            parse_figure_request()
+        )
+        base_measure = parse_figure_measure(
+            variable_type, request.args.get("base-measure")
+        )
+        data_file = _get_data_file_path(variable_type, variable_name, grouping)
+    except RuntimeError:
+        abort(400)
+    if not data_file.exists():
+        abort(404)
+
+    figure_etags = [
+        get_figure_etag(
+            data_file,
+            variable_type,
+            variable_name,
+            grouping,
+            figure_measure,
+            plot_type,
+            language,
+        )
+        for figure_measure in (base_measure, measure)
+    ]
+    etag = sha256(dumps(figure_etags).encode("utf-8")).hexdigest()
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        base_figure, figure = (
+            loads(
+                create_figure_json(
+                    variable_type,
+                    variable_name,
+                    grouping,
+                    measure=figure_measure,
+                    bar_graph=plot_type == "bar",
+                    boxplot=plot_type == "box",
+                    language=language,
+                )[0]
+            )
+            for figure_measure in (base_measure, measure)
+        )
+        patch = create_figure_patch(base_figure, figure)
+        response = Response(
+            dumps(patch.to_plotly_json()["operations"]), mimetype="application/json"
+        )
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = FIGURE_MAX_AGE
+    return response
+
+
+def read_selected_statistics(
+    selection: Selection,
+    columns: list[str] | None,
+    start_year: int | None,
+    end_year: int | None,
+    language: LanguageCode,
+) -> tuple[Selection, DataFrame]:
+    """Read the statistics of a selection of the statistics API.
+
+    Returns the selection with the grouping of the statistics file.
+    """
+    variable_type, variable_name, groups = selection
+    allowed_groups = metadata_registry.get_allowed_groups(variable_type, variable_name)
+    first_group, second_group = (*groups, None, None)[:2]
+    grouping, _, _ = handle_grouping(first_group, second_group, [])
+    if not set(grouping).issubset(allowed_groups):
+        raise RuntimeError("Non-existent group selected.")
+    if not _get_data_file_path(variable_type, variable_name, grouping).exists():
+        raise FileNotFoundError(f"No statistics for selection {selection}.")
+    data = select_statistics(
+        read_labeled_data(variable_type, variable_name, grouping, language),
+        get_key_columns(variable_type, variable_name, grouping),
+        columns,
+        start_year,
+        end_year,
+    )
+    return (variable_type, variable_name, grouping), data
+
+
+@server.route(STATISTICS_API_PATH)
+def send_statistics() -> Response:
+    """Send the statistics of several variables and groupings at once.
+
+    Takes one select parameter per variable and grouping,
+    e.g. select=numerical:years_injob:sex,age_gr, and optionally columns,
+    the years from and to, the language and the format json, csv or arrow.
+    """
+    try:
+        selections = [
+            parse_selection(value) for value in request.args.getlist("select")
+        ]
+        columns_parameter = request.args.get("columns")
+        columns = (
+            columns_parameter.split(GROUP_SEPARATOR) if columns_parameter else None
+        )
+        start_year = parse_year(request.args.get("from"))
+        end_year = parse_year(request.args.get("to"))
+        language = request.args.get("language", "en")
+        output_format = request.args.get("format", "json")
+        if (
+            not selections
+            or len(selections) > API_MAX_SELECTIONS
+            or language not in SUPPORTED_LANGUAGES
+            or output_format not in API_FORMATS
+            or (output_format == "arrow" and not arrow_available())
+        ):
+            raise RuntimeError("Incorrect query parameters provided.")
+        statistics = [
+            read_selected_statistics(selection, columns, start_year, end_year, language)
+            for selection in selections
+        ]
+        check_columns(statistics, columns)
+    except RuntimeError:
+        abort(400)
+    except FileNotFoundError:
+        abort(404)
+
+    if output_format == "csv":
+        return Response(
+            combine_statistics(statistics).to_csv(index=False), mimetype="text/csv"
+        )
+    if output_format == "arrow":
+        return Response(
+            iter_arrow_stream(combine_statistics(statistics)),
+            mimetype="application/vnd.apache.arrow.stream",
+        )
+    return Response(statistics_to_json(statistics), mimetype="application/json")
+
+
+# The link is updated in the browser, so the archive is streamed
+# by a plain request instead of being sent through a callback.
+app.clientside_callback(
+    f"""
+    function(search, firstGroup, secondGroup) {{
+        const parameters = new URLSearchParams(search);
+        parameters.delete("first-group");
+        parameters.delete("second-group");
+        if (firstGroup) {{
+            parameters.set("first-group", firstGroup);
+        }}
+        if (secondGroup) {{
+            parameters.set("second-group", secondGroup);
+        }}
+        return {dumps(DATA_DOWNLOAD_PATH)} + "?" + parameters.toString();
+    }}
+    """,
+    Output("data-download-link", "href"),
+    Input("url", "search"),
+    Input("first-group", "value"),
+    Input("second-group", "value"),
 )
+
+
 def download_image(
     search: str,
     first_group_value: str,
@@ -477,43 +935,160 @@ def download_image(
     first_group_options: list[PlotlyLabeledOption],
     graph: Any,
     _: Any,
-) -> Any:
+) -> tuple[Any, Any, bool, bool, str]:
+    """Send the cached images of the current figure or queue their export.
+
+    The polling for the export job is only started if an image is not cached.
+    """
 
     variable_name, variable_type, language = parse_search(search)
 
     grouping, _, second_group_value = handle_grouping(
         first_group_value, second_group_value, first_group_options
     )
-    file_name_base = "_".join([variable_name, YEAR, *grouping])
+    variable_metadata = metadata_registry.get_variable_metadata(
+        variable_type, variable_name
+    )
 
-    # TODO: Refactor Partial redundancy
-    _base_path = get_variable_data_path(
-        variable_type=variable_type, variable_name=variable_name
+    # Not validated, plotly.py does not accept the typed arrays of the figure.
+    figure = {
+        **graph,
+        "layout": {**graph["layout"], "title": {"text": variable_metadata["title"]}},
+    }
+    figure_json = to_json(figure, validate=False)
+    file_name_base = "_".join([variable_name, YEAR, *grouping])
+    images = read_cached_images(
+        image_cache,
+        figure_json,
+        IMAGE_EXPORT_FORMATS,
+        IMAGE_EXPORT_WIDTH,
+        IMAGE_EXPORT_HEIGHT,
     )
+    if images is not None:
+        return (
+            create_image_archive(images, file_name_base, language),
+            no_update,
+            True,
+            False,
+            "removed",
+        )
+    job_id = export_queue.submit(
+        {
+            "figure_json": figure_json,
+            "file_name_base": file_name_base,
+            "language": language,
+        }
+    )
+    return no_update, job_id, False, True, "removed"
 
-    # TODO: Refactor readability
-    with TemporaryDirectory() as tmp_folder:
-        path_to_zip = Path(tmp_folder).joinpath("graph")
-        mkdir(path_to_zip)
-        with open(
-            path_to_zip.joinpath(f"Cite_{language}.txt"), "w", encoding="utf-8"
-        ) as cite_file:
-            cite_file.write(citation["base_citation"][language])
-            figure = Figure(**graph)
-            figure.update_layout(title=_get_variable_metadata(_base_path)["title"])
-        for image_type in ["svg", "png"]:
-            figure.write_image(
-                file=path_to_zip.joinpath(f"{file_name_base}.{image_type}"),
-                format=image_type,
-                width=1400,
-                height=500,
-            )
-        archive = make_archive(f"{tmp_folder}/{file_name_base}", "zip", path_to_zip)
-        return dcc.send_file(archive)
+
+def poll_image_export(
+    search: str, job_id: str | None, _: Any
+) -> tuple[Any, bool, bool, Any, str]:
+    """Send the exported images once the export job is finished.
+
+    Failed and expired jobs end the polling with an error message.
+    """
+    state = export_queue.get_state(job_id) if job_id else None
+    if state is None or state["status"] == "failed":
+        _, _, language = parse_search(search)
+        return (
+            no_update,
+            True,
+            False,
+            IMAGE_EXPORT_ERROR_TRANSLATION[language],
+            "",
+        )
+    if state["status"] != "done":
+        return no_update, False, True, no_update, "removed"
+    return state["result"], True, False, no_update, "removed"
+
+
+def export_image_archive(job: ExportJob) -> dict[str, Any]:
+    """Render the figure of an export job and bundle it with the citation."""
+    images = render_cached_images(
+        image_cache,
+        render_images_in_pool,
+        job["figure_json"],
+        IMAGE_EXPORT_FORMATS,
+        IMAGE_EXPORT_WIDTH,
+        IMAGE_EXPORT_HEIGHT,
+    )
+    return create_image_archive(images, job["file_name_base"], job["language"])
+
+
+def create_image_archive(
+    images: Images, file_name_base: str, language: LanguageCode
+) -> dict[str, Any]:
+    """Bundle the images of a figure with the citation for dcc.Download."""
+    files: dict[str, bytes | str] = {
+        f"{file_name_base}.{image_format}": image
+        for image_format, image in images.items()
+    }
+    files[f"Cite_{language}.txt"] = citation["base_citation"][language]
+    archive = create_archive(files)
+    return dcc.send_bytes(archive.getvalue(), f"{file_name_base}.zip")
+
+
+def render_images_in_pool(
+    figure_json: str, formats: Iterable[str], width: int, height: int
+) -> Images:
+    renderer_pool = get_renderer_pool()
+    if renderer_pool is None:
+        # Restarts the browser of this worker if it crashed.
+        check_kaleido_session()
+        return render_images(figure_json, formats, width, height)
+    return renderer_pool.render(figure_json, formats, width, height)
+
+
+# Only the callbacks of the configured export mode are registered,
+# both are triggered by the same button.
+if IMAGE_EXPORT_MODE == "client":
+    app.clientside_callback(
+        ClientsideFunction(namespace="image_export", function_name="download_image"),
+        Output("image-download", "data"),
+        Input("btn-image-download", "n_clicks"),
+        dependencies.State("image-export-settings", "data"),
+        dependencies.State("first-group", "value"),
+        dependencies.State("second-group", "value"),
+        dependencies.State("graph", "figure"),
+        prevent_initial_call=True,
+    )
+else:
+    # Client side exports need no queue, which would create its directory.
+    export_queue = ExportQueue(EXPORT_QUEUE_PATH, concurrency=EXPORT_CONCURRENCY)
+    callback(
+        Output("image-download", "data", allow_duplicate=True),
+        Output("image-export-job", "data"),
+        Output("image-export-poll", "disabled", allow_duplicate=True),
+        Output("btn-image-download", "disabled", allow_duplicate=True),
+        Output("image-export-error", "className", allow_duplicate=True),
+        dependencies.State("url", "search"),
+        dependencies.State("first-group", "value"),
+        dependencies.State("second-group", "value"),
+        dependencies.State("first-group", "options"),
+        dependencies.State("graph", "figure"),
+        Input("btn-image-download", "n_clicks"),
+        prevent_initial_call=True,
+    )(download_image)
+    callback(
+        Output("image-download", "data"),
+        Output("image-export-poll", "disabled"),
+        Output("btn-image-download", "disabled"),
+        Output("image-export-error", "children"),
+        Output("image-export-error", "className"),
+        dependencies.State("url", "search"),
+        dependencies.State("image-export-job", "data"),
+        Input("image-export-poll", "n_intervals"),
+        prevent_initial_call=True,
+    )(poll_image_export)
+    export_queue.start_worker(export_image_archive)
+    if IMAGE_RENDERER_START == "startup":
+        # The first export would otherwise wait for Chromium to start.
+        start_renderers()
 
 
 @callback(
-    Output("graph", "figure"),
     Output("second-group", "value"),
     Output("second-group", "options"),
     Output("boxplot-flag", "children"),
@@ -521,116 +1096,285 @@ def download_image(
     Input("first-group", "value"),
     Input("second-group", "value"),
     Input("first-group", "options"),
-    Input("confidence-checkbox", "value"),
-    Input("legend-checkbox", "value"),
     Input("measure-dropdown", "value"),
     Input("bargraph-checkbox", "value"),
-    Input("boxplot-checkbox", "value"),
     dependencies.State("url", "search"),
-    dependencies.State("graph", "figure"),
+    # The initial view is part of the layout or created once the controls exist.
+    prevent_initial_call=True,
 )
 def handle_inputs(
     first_group_value: str,
     second_group_value: str | None,
     first_group_options: list[PlotlyLabeledOption],
-    show_confidence: str,
-    show_legend: str,
     measure: Measure,
     bar_graph: bool,
-    boxplot: bool,
     search: str,
-    current_graph: Any,
-) -> tuple[Figure, str | None, list[PlotlyLabeledOption], str, str]:
-    show_boxplot = "show"
-
-    trace_visibility = {}
-    if current_graph:
-        trace_visibility = {
-            trace["name"]: trace.get("visible", True) for trace in current_graph["data"]
-        }
+) -> tuple[str | None, list[PlotlyLabeledOption], str, str]:
+    """Update the controls for the selected view.
 
+    The figure is loaded by the browser from the figure route.
+    """
     variable_name, variable_type, language = parse_search(search)
-    _data_base_path = get_variable_data_path(variable_type, variable_name)
+    grouping, options, second_group_value = handle_grouping(
+        first_group_value, second_group_value, first_group_options
+    )
+    show_boxplot = get_boxplot_flag(
+        read_labeled_data(variable_type, variable_name, grouping, language),
+        get_figure_measure(variable_type, measure),
+        bool(bar_graph),
+    )
+    return second_group_value, options, show_boxplot, get_citation_text(language)
 
-    citation_text = f"Cite as: {citation['base_citation'][language]}"
-    if language == "de":
-        citation_text = f"Zitiere mit: {citation['base_citation'][language]}"
 
-    grouping, options, second_group_value = handle_grouping(
+# Figures are loaded by GET requests, so browsers and proxies can cache them.
+# A new measure of the loaded figure only loads the patch from its figure.
+app.clientside_callback(
+    ClientsideFunction(namespace="figures", function_name="load_figure"),
+    Output("graph", "figure", allow_duplicate=True),
+    Output("figure-url", "data"),
+    Input("first-group", "value"),
+    Input("second-group", "value"),
+    Input("measure-dropdown", "value"),
+    Input("bargraph-checkbox", "value"),
+    Input("boxplot-checkbox", "value"),
+    dependencies.State("figure-path", "data"),
+    dependencies.State("url", "search"),
+    dependencies.State("confidence-checkbox", "value"),
+    dependencies.State("legend-checkbox", "value"),
+    dependencies.State("trace-visibility", "data"),
+    dependencies.State("figure-patch-path", "data"),
+    dependencies.State("figure-url", "data"),
+    dependencies.State("graph", "figure"),
+    prevent_initial_call=True,
+)
+
+
+def create_view(
+    first_group_value: str | None,
+    second_group_value: str | None,
+    first_group_options: list[PlotlyLabeledOption],
+    measure: Measure,
+    show_confidence: Any,
+    show_legend: Any,
+    search: str,
+) -> tuple[dict[str, Any], str]:
+    """Create the line graph of a view with its display options and the boxplot flag."""
+    variable_name, variable_type, language = parse_search(search)
+    grouping, _, _ = handle_grouping(
         first_group_value, second_group_value, first_group_options
     )
-    data_file = _data_base_path.joinpath(
-        "_".join([variable_name, YEAR, *grouping]) + ".csv"
-    ).absolute()
-    _dataframe = read_csv(data_file)
-
-    # Language handling and sorting
-    _base_path = get_variable_data_path(
-        variable_type=variable_type, variable_name=variable_name
+    figure_json, show_boxplot = create_figure_json(
+        variable_type,
+        variable_name,
+        grouping,
+        measure=measure,
+        bar_graph=False,
+        boxplot=False,
+        language=language,
     )
-    _metadata = []
-    if variable_type == "categorical":
-        _metadata = [_get_variable_metadata(_base_path)]
-    for _variable in grouping:
-        _metadata.append(metadata[_variable])
-    _dataframe = handle_categorical_labels_and_order(
-        data=_dataframe, metadata=_metadata, language=language
+    figure = loads(figure_json)
+    apply_display_options(figure, bool(show_confidence), bool(show_legend))
+    return figure, show_boxplot
+
+
+def get_citation_text(language: LanguageCode) -> str:
+    if language == "de":
+        return f"Zitiere mit: {citation['base_citation'][language]}"
+    return f"Cite as: {citation['base_citation'][language]}"
+
+
+def get_static_figure(
+    variable_type: VariableType,
+    variable_name: str,
+    measure: Measure,
+    language: LanguageCode,
+) -> StaticFigure | None:
+    """Get the pre-rendered default figure of a variable if it is up to date."""
+    data_file = _get_data_file_path(variable_type, variable_name, [])
+    if not data_file.exists():
+        return None
+    source = get_figure_source(
+        data_file,
+        metadata_registry.get_label_metadata(variable_type, variable_name, []),
+    )
+    return static_figures.get(
+        variable_type,
+        variable_name,
+        get_figure_measure(variable_type, measure),
+        language,
+        source,
     )
-    # Language handling and sorting END
 
-    if variable_type == "categorical":
-        # It is currently important that variable name is at the end of the grouping list
-        # for the grouping of the bar plot to work properly.
-        grouping.append(variable_name)
-        measure = PROPORTION
 
-    if bar_graph:
-        return (
-            create_bar_graph_figure(
-                _dataframe,
-                group=grouping,
-                show_legend=bool(show_legend),
-                measure=measure,
-                language=language,
-            ),
-            second_group_value,
-            options,
-            show_boxplot,
-            citation_text,
+@server.route(f"{STATIC_FIGURE_PATH}<file_name>")
+def send_static_figure(file_name: str) -> Response:
+    """Send a pre-rendered figure, pre-compressed if the client accepts it."""
+    if file_name not in static_figures:
+        abort(404)
+    encoding = request.accept_encodings.best_match(
+        static_figures.get_encodings(file_name)
+    )
+    suffix = STATIC_FIGURE_ENCODINGS[encoding] if encoding else ""
+    response = send_from_directory(
+        static_figures.directory,
+        f"{file_name}{suffix}",
+        mimetype="application/json",
+        max_age=STATIC_FIGURE_MAX_AGE,
+    )
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def get_page_search() -> str | None:
+    """Get the query of the page that requests the layout from the referrer."""
+    if not has_request_context() or not request.referrer:
+        return None
+    query = urlsplit(request.referrer).query
+    return f"?{query}" if query else None
+
+
+def _vary_on_referrer(response: Response) -> Response:
+    response.vary.add("Referer")
+    return response
+
+
+def serve_layout() -> html.Div:
+    """Create the page layout with the view of the requested URL inline.
+
+    The browser then draws the default figure without any callback,
+    pre-rendered default figures are only referenced and loaded as static file.
+    Without a referrer, e.g. due to a strict referrer policy, or without data
+    for the default view, the controls and the figure are created by callbacks
+    like before.
+    """
+    if has_request_context():
+        # The layout differs by the page that requests it.
+        after_this_request(_vary_on_referrer)
+    layout = create_layout()
+    search = get_page_search()
+    if search is None:
+        return layout
+    try:
+        variable_name, variable_type, language = parse_search(search)
+        controls = html.Div(
+            get_control_panel(variable_type, variable_name, language)[0]
         )
-    if _dataframe[measure].max() < BOXPLOT_MIN_VALUE:
-        boxplot = False
-        show_boxplot = "hide"
-    if boxplot:
-        return (
-            create_numerical_boxplot_figure(
-                _dataframe,
-                groups=grouping,
-                y_title="",
-                show_legend=bool(show_legend),
-                trace_visibility=trace_visibility,
-            ),
-            second_group_value,
-            options,
-            show_boxplot,
-            citation_text,
+        measure = getattr(controls["measure-dropdown"], "value", None)
+        static_figure = get_static_figure(
+            variable_type, variable_name, measure, language
+        )
+        if static_figure is None:
+            figure, show_boxplot = create_view(
+                controls["first-group"].value,
+                controls["second-group"].value,
+                controls["first-group"].options,
+                measure,
+                show_confidence=controls["confidence-checkbox"].value,
+                show_legend=controls["legend-checkbox"].value,
+                search=search,
+            )
+            layout["graph"].figure = figure
+        else:
+            show_boxplot = static_figure["boxplot"]
+            layout["static-figure"].data = (
+                f"{STATIC_FIGURE_PATH}{static_figure['file']}"
+            )
+        # Without a first group the second group stays as created,
+        # only the boxplot flag depends on the data.
+        control_panel, below_control_and_graph = get_control_panel(
+            variable_type, variable_name, language, show_boxplot
         )
+    except (RuntimeError, OSError):
+        return create_layout()
 
-    return (
-        create_line_graph_figure(
-            _dataframe,
-            group=grouping,
-            show_confidence=bool(show_confidence),
-            show_legend=bool(show_legend),
-            measure=measure,
-            trace_visibility=trace_visibility,
-            language=language,
-        ),
-        second_group_value,
-        options,
-        show_boxplot,
-        citation_text,
+    layout["control-panel"].children = control_panel
+    layout["below-control-and-graph"].children = below_control_and_graph
+    layout["citation-text"].children = get_citation_text(language)
+    layout["rendered-search"].data = search
+    return layout
+
+
+app.layout = serve_layout
+
+
+app.clientside_callback(
+    ClientsideFunction(namespace="figures", function_name="load_static_figure"),
+    Output("graph", "figure"),
+    Input("static-figure", "data"),
+)
+
+
+# Display toggles only change the current figure, so they never reach the server.
+app.clientside_callback(
+    ClientsideFunction(
+        namespace="display_options", function_name="apply_display_options"
+    ),
+    Output("graph", "figure", allow_duplicate=True),
+    Input("confidence-checkbox", "value"),
+    Input("legend-checkbox", "value"),
+    dependencies.State("graph", "figure"),
+    prevent_initial_call=True,
+)
+
+
+# The server only needs the visibility of the displayed traces, not the figure.
+app.clientside_callback(
+    ClientsideFunction(
+        namespace="display_options", function_name="track_trace_visibility"
+    ),
+    Output("trace-visibility", "data"),
+    Input("graph", "figure"),
+    Input("graph", "restyleData"),
+)
+
+
+def create_figure_json(
+    variable_type: VariableType,
+    variable_name: str,
+    grouping: list[str],
+    measure: Measure,
+    bar_graph: bool,
+    boxplot: bool,
+    language: LanguageCode,
+) -> tuple[str, str]:
+    """Create the serialized figure for a view and the boxplot flag.
+
+    Figures are created with the default trace visibility, confidence intervals
+    and legend and cached until the data file or the metadata registry change.
+    """
+    measure = get_figure_measure(variable_type, measure)
+    data_file = _get_data_file_path(variable_type, variable_name, grouping)
+    cache_key = (
+        variable_type,
+        variable_name,
+        tuple(grouping),
+        measure,
+        bar_graph,
+        boxplot,
+        language,
+    )
+    data_version = _get_data_version(data_file)
+    cached_figure = figure_cache.get(cache_key, version=data_version)
+    if cached_figure is not None:
+        return cached_figure
+
+    figure, show_boxplot = create_figure(
+        read_labeled_data(variable_type, variable_name, grouping, language),
+        variable_type,
+        variable_name,
+        grouping,
+        measure,
+        bar_graph,
+        boxplot,
+        language,
     )
+    serialized_figure = (to_json(figure, validate=False), show_boxplot)
+    figure_cache.put(cache_key, serialized_figure, version=data_version)
+    return serialized_figure
 
 
 def get_variable_data_path(variable_type: VariableType, variable_name: str) -> Path:
@@ -645,6 +1389,43 @@ def get_variable_data_path(variable_type: VariableType, variable_name: str) -> P
     return variable_data_base_path
 
 
+def _get_data_file_path(
+    variable_type: VariableType, variable_name: str, grouping: list[str]
+) -> Path:
+    _data_base_path = get_variable_data_path(variable_type, variable_name)
+    file_base = get_statistics_file_base(_data_base_path, variable_name, grouping)
+    return get_statistics_file(file_base.absolute())
+
+
+def _get_data_version(data_file: Path) -> tuple[int, int]:
+    return (data_file.stat().st_mtime_ns, metadata_registry.version)
+
+
+def read_labeled_data(
+    variable_type: VariableType,
+    variable_name: str,
+    grouping: list[str],
+    language: LanguageCode,
+) -> DataFrame:
+    """Read the statistics of a grouping with labels in the given language.
+
+    Prepared statistics are cached until the data file or the metadata registry
+    change, only the labels are switched to the language on each call.
+    The returned DataFrame is shared between callbacks and must not be mutated.
+    """
+    data_file = _get_data_file_path(variable_type, variable_name, grouping)
+    category_labels = get_category_labels(
+        metadata_registry.get_label_metadata(variable_type, variable_name, grouping)
+    )
+    cache_key = (variable_type, variable_name, tuple(grouping))
+    data_version = _get_data_version(data_file)
+    data = data_cache.get(cache_key, version=data_version)
+    if data is None:
+        data = read_prepared_statistics(data_file, category_labels)
+        data_cache.put(cache_key, data, version=data_version)
+    return switch_label_language(data, category_labels, language)
+
+
 def handle_grouping(
     first_group: str | None,
     second_group: str | None,
@@ -0,0 +1,57 @@
+// Shows or hides confidence intervals and the legend of the current figure.
+// Mirrors apply_display_options in simple_graph.py.
+export function applyDisplayOptions(showConfidence, showLegend, figure) {
+  if (!figure || !figure.data) {
+    return window.dash_clientside.no_update;
+  }
+  const traceVisibility = {};
+  for (const trace of figure.data) {
+    if (trace.meta !== "confidence") {
+      traceVisibility[trace.name] = trace.visible ?? true;
+    }
+  }
+  const confidenceVisible = Boolean(showConfidence && showConfidence.length);
+  const data = figure.data.map((trace) => {
+    if (trace.meta !== "confidence") {
+      return trace;
+    }
+    const visible = confidenceVisible && (traceVisibility[trace.name] ?? true);
+    return {...trace, visible: visible};
+  });
+  const legend = {
+    ...figure.layout.legend,
+    visible: Boolean(showLegend && showLegend.length),
+  };
+  return {...figure, data: data, layout: {...figure.layout, legend: legend}};
+}
+
+// Collects the visibility of all traces except confidence intervals by name,
+// including changes made by clicks on the legend.
+function trackTraceVisibility(figure, restyleData) {
+  const traces = (figure && figure.data) || [];
+  const visibility = {};
+  for (const trace of traces) {
+    if (trace.meta !== "confidence") {
+      visibility[trace.name] = trace.visible ?? true;
+    }
+  }
+  if (restyleData && "visible" in restyleData[0]) {
+    const [changes, traceIndices] = restyleData;
+    traceIndices.forEach((traceIndex, position) => {
+      const trace = traces[traceIndex];
+      if (trace && trace.meta !== "confidence") {
+        visibility[trace.name] = Array.isArray(changes.visible)
+          ? changes.visible[position]
+          : changes.visible;
+      }
+    });
+  }
+  return visibility;
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+  display_options: {
+    apply_display_options: applyDisplayOptions,
+    track_trace_visibility: trackTraceVisibility,
+  },
+});
@@ -0,0 +1,164 @@
+import {applyDisplayOptions} from "./displayOptions.mjs";
+
+// Builds the URL of the figure of a view. The same view always gets
+// the same URL, so browsers and proxies can cache it.
+export function getFigureUrl(
+  figurePath,
+  search,
+  firstGroup,
+  secondGroup,
+  measure,
+  barGraph,
+  boxplot,
+) {
+  const page = new URLSearchParams(search);
+  const parameters = new URLSearchParams();
+  parameters.set("type", page.get("type"));
+  parameters.set("variable", page.get("variable"));
+  parameters.set("language", page.get("language") ?? "en");
+  const grouping = [firstGroup, secondGroup === firstGroup ? null : secondGroup]
+    .filter(Boolean)
+    .sort();
+  ["first-group", "second-group"].forEach((name, index) => {
+    if (grouping[index]) {
+      parameters.set(name, grouping[index]);
+    }
+  });
+  if (measure) {
+    parameters.set("measure", measure);
+  }
+  let plotType = "line";
+  if (barGraph && barGraph.length) {
+    plotType = "bar";
+  } else if (boxplot && boxplot.length) {
+    plotType = "box";
+  }
+  parameters.set("plot", plotType);
+  return `${figurePath}?${parameters.toString()}`;
+}
+
+async function fetchFigure(url) {
+  const response = await fetch(url);
+  if (!response.ok) {
+    throw new Error(`Loading the figure failed: ${response.status}`);
+  }
+  return response.json();
+}
+
+// Builds the URL of the patch from the figure of previousUrl to the figure
+// of url. Returns null unless only the measure changed.
+export function getFigurePatchUrl(figurePatchPath, previousUrl, url) {
+  if (!previousUrl) {
+    return null;
+  }
+  const previous = new URL(previousUrl, window.location.href).searchParams;
+  const parameters = new URL(url, window.location.href).searchParams;
+  const baseMeasure = previous.get("measure");
+  const measure = parameters.get("measure");
+  previous.delete("measure");
+  parameters.delete("measure");
+  if (
+    !baseMeasure ||
+    !measure ||
+    baseMeasure === measure ||
+    previous.toString() !== parameters.toString()
+  ) {
+    return null;
+  }
+  parameters.set("measure", measure);
+  parameters.set("base-measure", baseMeasure);
+  return `${figurePatchPath}?${parameters.toString()}`;
+}
+
+// Applies the operations of a patch from the figure patch route,
+// which only assigns and deletes properties.
+function applyPatch(figure, operations) {
+  const patched = structuredClone(figure);
+  for (const {operation, location, params} of operations) {
+    const parent = location
+      .slice(0, -1)
+      .reduce((object, key) => object[key], patched);
+    const key = location[location.length - 1];
+    if (operation === "Assign") {
+      parent[key] = params.value;
+    } else if (operation === "Delete") {
+      delete parent[key];
+    }
+  }
+  return patched;
+}
+
+// Loads the patch from the displayed figure if only the measure changed,
+// otherwise the full figure.
+async function fetchFigureUpdate(
+  figurePatchPath,
+  previousUrl,
+  url,
+  currentFigure,
+) {
+  const patchUrl = getFigurePatchUrl(figurePatchPath, previousUrl, url);
+  if (patchUrl && currentFigure && currentFigure.data) {
+    try {
+      return applyPatch(currentFigure, await fetchFigure(patchUrl));
+    } catch {
+      // The full figure is loaded instead.
+    }
+  }
+  return fetchFigure(url);
+}
+
+// Loads the figure of the selected view and keeps the display options
+// and the visibility changes the user made.
+// Returns the URL of the figure too, the base of the next patch.
+async function loadFigure(
+  firstGroup,
+  secondGroup,
+  measure,
+  barGraph,
+  boxplot,
+  figurePath,
+  search,
+  showConfidence,
+  showLegend,
+  traceVisibility,
+  figurePatchPath,
+  previousUrl,
+  currentFigure,
+) {
+  const url = getFigureUrl(
+    figurePath,
+    search,
+    firstGroup,
+    secondGroup,
+    measure,
+    barGraph,
+    boxplot,
+  );
+  const figure = await fetchFigureUpdate(
+    figurePatchPath,
+    previousUrl,
+    url,
+    currentFigure,
+  );
+  // Bar graphs do not keep manual visibility changes.
+  if (!(barGraph && barGraph.length) && traceVisibility) {
+    figure.data = figure.data.map((trace) =>
+      trace.name in traceVisibility
+        ? {...trace, visible: traceVisibility[trace.name]}
+        : trace,
+    );
+  }
+  return [applyDisplayOptions(showConfidence, showLegend, figure), url];
+}
+
+// Loads a pre-rendered default figure referenced by the layout.
+function loadStaticFigure(url) {
+  if (!url) {
+    return window.dash_clientside.no_update;
+  }
+  return fetchFigure(url);
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+  figures: {load_figure: loadFigure, load_static_figure: loadStaticFigure},
+});
@@ -0,0 +1,46 @@
+import {createZip} from "./zip.mjs";
+
+// Renders the figure with plotly.js in the browser and bundles the images
+// with the citation, so the server does not render anything.
+// Only used if the server runs with IMAGE_EXPORT_MODE=client.
+async function downloadImage(_, settings, firstGroup, secondGroup, figure) {
+  const grouping = [firstGroup, secondGroup === firstGroup ? null : secondGroup]
+    .filter(Boolean)
+    .sort();
+  const fileNameBase = [settings.fileNameBase, ...grouping].join("_");
+  const exportedFigure = {
+    data: figure.data,
+    layout: {...figure.layout, title: {...figure.layout.title, text: settings.title}},
+  };
+
+  const files = [];
+  for (const format of settings.formats) {
+    const url = await window.Plotly.toImage(exportedFigure, {
+      format: format,
+      width: settings.width,
+      height: settings.height,
+    });
+    const image = await (await fetch(url)).arrayBuffer();
+    files.push({name: `${fileNameBase}.${format}`, content: new Uint8Array(image)});
+  }
+  files.push({
+    name: settings.citationFileName,
+    content: new TextEncoder().encode(settings.citation),
+  });
+
+  const archive = createZip(files);
+  let binary = "";
+  for (const byte of archive) {
+    binary += String.fromCharCode(byte);
+  }
+  return {
+    content: btoa(binary),
+    filename: `${fileNameBase}.zip`,
+    type: "application/zip",
+    base64: true,
+  };
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+  image_export: {download_image: downloadImage},
+});
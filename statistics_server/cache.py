@@ -0,0 +1,150 @@
+"""Bounded caches for expensive intermediate results."""
+
+from collections import OrderedDict
+from os import getpid, utime
+from pathlib import Path
+from threading import Lock
+from typing import BinaryIO, Callable, Hashable
+
+
+class LRUCache[Key: Hashable, Value]:
+    """Least recently used cache that is bounded by the size of its entries.
+
+    Every entry is stored together with a version, e.g. the modification time
+    of the file it was created from. Entries with an outdated version
+    are treated as missing and dropped.
+    Hits and misses are counted to judge if the size limit fits the traffic.
+    """
+
+    def __init__(self, max_bytes: int, sizer: Callable[[Value], int]) -> None:
+        self.max_bytes = max_bytes
+        self._sizer = sizer
+        self._entries: OrderedDict[Key, tuple[Value, int, Hashable]] = OrderedDict()
+        self._current_bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def current_bytes(self) -> int:
+        return self._current_bytes
+
+    def get(self, key: Key, version: Hashable = None) -> Value | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, _, entry_version = entry
+            if entry_version != version:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Key, value: Value, version: Hashable = None) -> None:
+        size = self._sizer(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            # Entries that could never fit would only flush the whole cache.
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size, version)
+            self._current_bytes += size
+            while self._current_bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+
+    def _remove(self, key: Key) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._current_bytes -= size
+
+
+class DiskLRUCache:
+    """Directory of files that is bounded by the size of the files in it.
+
+    Files are named by their key, which should be a content hash of
+    everything the file was created from, so outdated files are never hit.
+    The modification time of a file is its last use,
+    so all processes sharing the directory evict in the same order.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, suffix: str = "") -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def get_path(self, key: str) -> Path:
+        return self.directory.joinpath(f"{key}{self.suffix}")
+
+    def get(self, key: str) -> Path | None:
+        path = self.get_path(key)
+        try:
+            utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def open(self, key: str) -> BinaryIO | None:
+        """Open the file of key for reading.
+
+        The open file stays readable if another process evicts it meanwhile.
+        """
+        path = self.get_path(key)
+        try:
+            file = open(path, "rb")
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        try:
+            utime(path)
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        return file
+
+    def put(self, key: str, content: bytes, evict: bool = True) -> Path:
+        """Store content under key.
+
+        Bulk writers can skip eviction and call evict once at the end.
+        """
+        path = self.get_path(key)
+        temporary_path = path.with_name(f"{path.name}.{getpid()}.tmp")
+        temporary_path.write_bytes(content)
+        # Replace atomically so other processes never read half written files.
+        temporary_path.replace(path)
+        if evict:
+            self.evict()
+        return path
+
+    def evict(self) -> None:
+        """Remove the least recently used files until the size limit is kept."""
+        files = []
+        for path in self.directory.glob(f"*{self.suffix}"):
+            try:
+                files.append((path.stat(), path))
+            except FileNotFoundError:
+                continue
+        current_bytes = sum(stat.st_size for stat, _ in files)
+        files.sort(key=lambda file: file[0].st_mtime_ns)
+        for stat, path in files:
+            if current_bytes <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            current_bytes -= stat.st_size
@@ -0,0 +1,120 @@
+"""Compression of the responses of the Flask server.
+
+Callback responses carry large figure JSON and the bundled javascript
+of plotly.js is several megabytes. Responses are compressed with brotli
+if it is installed and accepted by the client, otherwise with gzip.
+Compressed bodies are cached by a hash of their content, so identical
+responses like cached figures or static bundles are compressed only once.
+The ETags of compressed responses are weak, as their bytes differ
+from the uncompressed response while their content is the same.
+"""
+
+from gzip import compress as gzip_compress
+from hashlib import blake2b
+from os import getenv
+
+from flask import Flask, Response, request
+
+from statistics_server.cache import LRUCache
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# A level of 0 disables compression.
+COMPRESSION_LEVEL = int(getenv("COMPRESSION_LEVEL", "6"))
+BROTLI_QUALITY = int(getenv("BROTLI_QUALITY", "5"))
+COMPRESSION_MIN_BYTES = int(getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_CACHE_MAX_BYTES = int(
+    getenv("COMPRESSION_CACHE_MAX_BYTES", str(64 * 1024**2))
+)
+COMPRESSIBLE_MIMETYPES = frozenset(
+    (
+        "application/javascript",
+        "application/json",
+        "image/svg+xml",
+        "text/css",
+        "text/csv",
+        "text/html",
+        "text/javascript",
+        "text/plain",
+    )
+)
+
+type CompressionCacheKey = tuple[bytes, str]
+
+
+def brotli_available() -> bool:
+    return brotli is not None
+
+
+class ResponseCompressor:
+    """after_request hook that compresses large text responses."""
+
+    def __init__(
+        self,
+        level: int = COMPRESSION_LEVEL,
+        brotli_quality: int = BROTLI_QUALITY,
+        min_bytes: int = COMPRESSION_MIN_BYTES,
+        cache_max_bytes: int = COMPRESSION_CACHE_MAX_BYTES,
+    ) -> None:
+        self.level = level
+        self.brotli_quality = brotli_quality
+        self.min_bytes = min_bytes
+        self.cache: LRUCache[CompressionCacheKey, bytes] = LRUCache(
+            max_bytes=cache_max_bytes, sizer=len
+        )
+
+    def init_app(self, server: Flask) -> None:
+        if self.level > 0:
+            server.after_request(self)
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        cache_key = (blake2b(body, digest_size=16).digest(), encoding)
+        compressed = self.cache.get(cache_key)
+        if compressed is None:
+            if encoding == "br":
+                compressed = brotli.compress(body, quality=self.brotli_quality)
+            else:
+                compressed = gzip_compress(body, compresslevel=self.level, mtime=0)
+            self.cache.put(cache_key, compressed)
+        return compressed
+
+    def __call__(self, response: Response) -> Response:
+        if response.status_code == 304:
+            return self._mark_revalidated(response)
+        if (
+            response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            return response
+        response.vary.add("Accept-Encoding")
+        encodings = ["br", "gzip"] if brotli_available() else ["gzip"]
+        encoding = request.accept_encodings.best_match(encodings)
+        if encoding is None:
+            return response
+        body = response.get_data()
+        if len(body) < self.min_bytes:
+            return response
+        etag, _ = response.get_etag()
+        if etag is not None:
+            response.set_etag(etag, weak=True)
+            # Routes that compare the strong ETag miss the weak one of the client.
+            response.make_conditional(request)
+            if response.status_code == 304:
+                return response
+        response.set_data(self.compress(body, encoding))
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    def _mark_revalidated(self, response: Response) -> Response:
+        """Answer the revalidation of a compressed response with its weak ETag."""
+        etag, weak = response.get_etag()
+        if etag is not None and not weak and request.if_none_match.is_weak(etag):
+            response.vary.add("Accept-Encoding")
+            response.set_etag(etag, weak=True)
+        return response
@@ -0,0 +1,283 @@
+"""Columnar storage of the pre-calculated statistics.
+
+The statistics are delivered as CSV files. They can be compiled into
+Arrow IPC files that are read through memory mapping.
+That way no parsing is necessary and all server processes share the data
+through the page cache.
+CSV files are used whenever no up to date Arrow file exists.
+
+Labeled columns are stored as ordered categoricals with the english labels
+as categories, rows are sorted by year and labeled columns.
+Values are rounded to STATISTICS_PRECISION decimals, more are never displayed.
+The labels of all languages are stored alongside,
+so switching languages only swaps the categories.
+"""
+
+from argparse import ArgumentParser
+from itertools import combinations
+from json import dumps, loads
+from os import getenv
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from pandas import DataFrame, read_csv
+from pandas.api.types import CategoricalDtype
+
+from statistics_server.metadata import MetadataRegistry
+from statistics_server.names import YEAR
+from statistics_server.types import (
+    CategoryLabels,
+    LanguageCode,
+    VariableMetadata,
+    VariableType,
+)
+
+try:
+    import pyarrow
+    from pyarrow import ipc
+except ImportError:  # pragma: no cover
+    pyarrow = None  # type: ignore[assignment]
+
+ARROW_SUFFIX = ".arrow"
+CSV_SUFFIX = ".csv"
+CATEGORY_LABELS_METADATA_KEY = b"statistics_server.category_labels"
+PRECISION_METADATA_KEY = b"statistics_server.precision"
+STATISTICS_PRECISION = int(getenv("STATISTICS_PRECISION", "6"))
+
+
+def arrow_available() -> bool:
+    return pyarrow is not None
+
+
+def get_groupings(groups: Iterable[str]) -> list[list[str]]:
+    """List all groupings of up to two groups, sorted like in file names."""
+    sorted_groups = sorted(groups)
+    groupings: list[list[str]] = [[]]
+    groupings.extend([group] for group in sorted_groups)
+    groupings.extend(list(pair) for pair in combinations(sorted_groups, 2))
+    return groupings
+
+
+def get_statistics_file_base(
+    variable_directory: Path, variable_name: str, grouping: list[str]
+) -> Path:
+    """Get the path of the statistics of a grouping without file suffix."""
+    return variable_directory.joinpath("_".join([variable_name, YEAR, *grouping]))
+
+
+def get_statistics_file(file_base: Path) -> Path:
+    """Get the file to read the statistics of a grouping from.
+
+    file_base is the path to the statistics file without suffix.
+    The Arrow file is preferred if it is at least as new as the CSV file.
+    """
+    csv_file = file_base.with_suffix(CSV_SUFFIX)
+    arrow_file = file_base.with_suffix(ARROW_SUFFIX)
+    if not arrow_available() or not arrow_file.exists():
+        return csv_file
+    if (
+        csv_file.exists()
+        and csv_file.stat().st_mtime_ns > arrow_file.stat().st_mtime_ns
+    ):
+        return csv_file
+    return arrow_file
+
+
+def get_source_file(statistics_file: Path) -> Path:
+    """Get the CSV file a statistics file is compiled from.
+
+    Keys of results created from statistics should be based on it,
+    so compiling the statistics does not invalidate them.
+    Falls back to the statistics file if there is no CSV file.
+    """
+    csv_file = statistics_file.with_suffix(CSV_SUFFIX)
+    if csv_file.exists():
+        return csv_file
+    return statistics_file
+
+
+def get_category_labels(metadata: list[VariableMetadata]) -> CategoryLabels:
+    """Collect the ordered value labels of labeled columns for all languages.
+
+    Labels in metadata are in an ordered list.
+    The order in the list corresponds to an ordered list for the codes.
+    Labels of negative codes mark missing values and are left out.
+    Variables without value labels are not treated as labeled.
+    """
+    category_labels: CategoryLabels = {}
+    for variable_metadata in metadata:
+        if "value_labels" not in variable_metadata:
+            continue
+        labels: dict[LanguageCode, list[str]] = {"en": [], "de": []}
+        for label, label_de, value in zip(
+            variable_metadata["value_labels"],
+            variable_metadata["value_labels_de"],
+            variable_metadata["values"],
+        ):
+            if value < 0:
+                continue
+            labels["en"].append(label)
+            labels["de"].append(label_de)
+        category_labels[variable_metadata["variable"]] = labels
+    return category_labels
+
+
+def prepare_statistics(
+    data: DataFrame,
+    category_labels: CategoryLabels,
+    precision: int = STATISTICS_PRECISION,
+) -> DataFrame:
+    """Convert labeled columns to ordered categoricals, round and sort the rows."""
+    data = data.copy(deep=False)
+    float_columns = data.select_dtypes("float").columns
+    data[float_columns] = data[float_columns].round(precision)
+    for variable, labels in category_labels.items():
+        _type = CategoricalDtype(categories=labels["en"], ordered=True)
+        data[variable] = data[variable].astype(_type)
+    return data.sort_values([YEAR, *category_labels.keys()])
+
+
+def switch_label_language(
+    data: DataFrame, category_labels: CategoryLabels, language: LanguageCode
+) -> DataFrame:
+    """Switch the labels of prepared statistics to another language."""
+    if language == "en" or not category_labels:
+        return data
+    data = data.copy(deep=False)
+    for variable, labels in category_labels.items():
+        data[variable] = data[variable].cat.rename_categories(labels[language])
+    return data
+
+
+def _read_arrow_table(arrow_file: Path) -> "pyarrow.Table":
+    source = pyarrow.memory_map(str(arrow_file), "r")
+    return ipc.open_file(source).read_all()
+
+
+def _is_prepared(
+    schema: "pyarrow.Schema", category_labels: CategoryLabels, precision: int
+) -> bool:
+    metadata = schema.metadata or {}
+    stored_labels = metadata.get(CATEGORY_LABELS_METADATA_KEY)
+    stored_precision = metadata.get(PRECISION_METADATA_KEY)
+    if stored_labels is None or stored_precision is None:
+        return False
+    return (
+        loads(stored_labels) == category_labels and int(stored_precision) == precision
+    )
+
+
+def read_prepared_statistics(
+    statistics_file: Path,
+    category_labels: CategoryLabels,
+    precision: int = STATISTICS_PRECISION,
+) -> DataFrame:
+    """Read statistics with categorical labels, rounded values and sorted rows.
+
+    Compiled files are already prepared unless their labels
+    or their precision are outdated.
+    """
+    if statistics_file.suffix != ARROW_SUFFIX:
+        return prepare_statistics(read_csv(statistics_file), category_labels, precision)
+    table = _read_arrow_table(statistics_file)
+    data = table.to_pandas(split_blocks=True)
+    if _is_prepared(table.schema, category_labels, precision):
+        return data
+    return prepare_statistics(data, category_labels, precision)
+
+
+def _is_compiled(
+    file_base: Path, category_labels: CategoryLabels, precision: int
+) -> bool:
+    statistics_file = get_statistics_file(file_base)
+    if statistics_file.suffix != ARROW_SUFFIX:
+        return False
+    schema = ipc.open_file(pyarrow.memory_map(str(statistics_file), "r")).schema
+    return _is_prepared(schema, category_labels, precision)
+
+
+def compile_statistics_file(
+    csv_file: Path,
+    category_labels: CategoryLabels,
+    precision: int = STATISTICS_PRECISION,
+) -> Path:
+    """Convert a single CSV statistics file into an Arrow file next to it."""
+    arrow_file = csv_file.with_suffix(ARROW_SUFFIX)
+    data = prepare_statistics(read_csv(csv_file), category_labels, precision)
+    table = pyarrow.Table.from_pandas(data, preserve_index=False)
+    table = table.replace_schema_metadata(
+        {
+            **(table.schema.metadata or {}),
+            CATEGORY_LABELS_METADATA_KEY: dumps(category_labels).encode("utf-8"),
+            PRECISION_METADATA_KEY: str(precision).encode("utf-8"),
+        }
+    )
+    temporary_file = arrow_file.with_name(f"{arrow_file.name}.tmp")
+    with pyarrow.OSFile(str(temporary_file), "wb") as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    # Replace atomically so running servers never read half written files.
+    temporary_file.replace(arrow_file)
+    return arrow_file
+
+
+def iter_statistics_file_bases(
+    registry: MetadataRegistry,
+) -> Iterator[tuple[VariableType, str, list[str], Path]]:
+    """Iterate over the statistics file bases of all groupings of all variables.
+
+    Yields the variable type and name, the grouping and the file base,
+    whether a statistics file exists for it or not.
+    """
+    for variable_type, variable_name in registry.variables():
+        variable_directory = registry.base_path.joinpath(variable_type, variable_name)
+        groups = registry.get_allowed_groups(variable_type, variable_name)
+        for grouping in get_groupings(groups):
+            file_base = get_statistics_file_base(
+                variable_directory, variable_name, grouping
+            )
+            yield variable_type, variable_name, grouping, file_base
+
+
+def compile_data_store(base_path: Path, precision: int = STATISTICS_PRECISION) -> int:
+    """Compile all outdated statistics files of all variables below the base path."""
+    if not arrow_available():
+        raise RuntimeError("Compiling the data store requires pyarrow.")
+    registry = MetadataRegistry(base_path)
+    compiled = 0
+    for variable_type, variable_name, grouping, file_base in iter_statistics_file_bases(
+        registry
+    ):
+        csv_file = file_base.with_suffix(CSV_SUFFIX)
+        if not csv_file.exists():
+            continue
+        category_labels = get_category_labels(
+            registry.get_label_metadata(variable_type, variable_name, grouping)
+        )
+        if _is_compiled(file_base, category_labels, precision):
+            continue
+        compile_statistics_file(csv_file, category_labels, precision)
+        compiled += 1
+    return compiled
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description="Compile the statistics CSV files into memory mappable Arrow files."
+    )
+    parser.add_argument(
+        "base_path",
+        nargs="?",
+        default=getenv("STATISTICS_BASE_PATH"),
+        type=Path,
+        help="Defaults to the STATISTICS_BASE_PATH environment variable.",
+    )
+    arguments = parser.parse_args()
+    if not arguments.base_path:
+        parser.error("No base path given and STATISTICS_BASE_PATH not set.")
+    compiled = compile_data_store(arguments.base_path.absolute())
+    print(f"Compiled {compiled} statistics files.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""Assembling of downloadable archives in memory.
+
+Archives are cached on disk. Run this module to create the archives
+of all variables ahead of time, e.g. after a data release.
+"""
+
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import sha256
+from io import BytesIO
+from json import dumps, load
+from os import getenv
+from pathlib import Path
+from tempfile import gettempdir
+from time import perf_counter
+from typing import Any, Mapping, get_args
+from zipfile import ZIP_DEFLATED, ZipFile
+
+from pandas import DataFrame
+
+from statistics_server.cache import DiskLRUCache
+from statistics_server.data_store import (
+    STATISTICS_PRECISION,
+    get_category_labels,
+    get_source_file,
+    get_statistics_file,
+    iter_statistics_file_bases,
+    read_prepared_statistics,
+    switch_label_language,
+)
+from statistics_server.metadata import MetadataRegistry
+from statistics_server.types import LanguageCode, VariableMetadata
+
+# Change whenever the layout of the archives changes to invalidate cached archives.
+DATA_ARCHIVE_FORMAT = "1"
+DOWNLOAD_CACHE_MAX_BYTES = int(getenv("DOWNLOAD_CACHE_MAX_BYTES", str(1024**3)))
+DOWNLOAD_CACHE_PATH = Path(
+    getenv(
+        "DOWNLOAD_CACHE_PATH",
+        str(Path(gettempdir()).joinpath("statistics_server_downloads")),
+    )
+)
+CITATION_FILE_NAME = "citation.json"
+ARCHIVE_LANGUAGES: tuple[LanguageCode, ...] = get_args(LanguageCode.__value__)
+
+type DataArchiveTask = tuple[
+    DiskLRUCache, Path, list[VariableMetadata], Mapping[LanguageCode, str]
+]
+
+
+def create_archive(files: Mapping[str, bytes | str]) -> BytesIO:
+    """Create a zip archive from file names and their content.
+
+    The archive is written to memory and returned rewound,
+    so it can be sent without touching the file system.
+    """
+    archive = BytesIO()
+    with ZipFile(archive, "w", compression=ZIP_DEFLATED) as zip_file:
+        for file_name, content in files.items():
+            zip_file.writestr(file_name, content)
+    archive.seek(0)
+    return archive
+
+
+def _to_excel(data: DataFrame) -> bytes:
+    excel_file = BytesIO()
+    data.to_excel(excel_file, index=False, engine="openpyxl")
+    return excel_file.getvalue()
+
+
+def create_data_archive(
+    file_stem: str,
+    data: Mapping[LanguageCode, DataFrame],
+    citations: Mapping[LanguageCode, str],
+) -> BytesIO:
+    """Create the data download with a CSV, XLSX and citation file per language."""
+    files: dict[str, bytes | str] = {}
+    for language, language_data in data.items():
+        files[f"{file_stem}_{language}.csv"] = language_data.to_csv(index=False)
+        files[f"{file_stem}_{language}.xlsx"] = _to_excel(language_data)
+        files[f"Cite_{language}.txt"] = citations[language]
+    return create_archive(files)
+
+
+def get_data_archive_key(
+    data_file: Path, label_metadata: Any, citations: Mapping[LanguageCode, str]
+) -> str:
+    """Hash the version of everything the data download of a data file is created from.
+
+    The statistics are identified by their CSV file,
+    so compiling them does not invalidate the archives.
+    """
+    source_file = get_source_file(data_file)
+    source_stat = source_file.stat()
+    archive_inputs = [
+        source_file.name,
+        source_stat.st_mtime_ns,
+        source_stat.st_size,
+        label_metadata,
+        citations,
+        STATISTICS_PRECISION,
+    ]
+    digest = sha256(DATA_ARCHIVE_FORMAT.encode("utf-8"))
+    digest.update(dumps(archive_inputs, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def get_download_cache() -> DiskLRUCache:
+    return DiskLRUCache(
+        DOWNLOAD_CACHE_PATH, max_bytes=DOWNLOAD_CACHE_MAX_BYTES, suffix=".zip"
+    )
+
+
+def _create_missing_data_archive(task: DataArchiveTask) -> tuple[int, int]:
+    """Create a data archive if it is not cached yet.
+
+    Returns the size of the created archive, 0 if it was cached already,
+    and the size of the archive in the cache.
+    """
+    cache, data_file, label_metadata, citations = task
+    archive_key = get_data_archive_key(data_file, label_metadata, citations)
+    cached_path = cache.get(archive_key)
+    if cached_path is not None:
+        return 0, cached_path.stat().st_size
+    category_labels = get_category_labels(label_metadata)
+    data = read_prepared_statistics(data_file, category_labels)
+    archive = create_data_archive(
+        data_file.stem,
+        {
+            language: switch_label_language(data, category_labels, language)
+            for language in ARCHIVE_LANGUAGES
+        },
+        citations,
+    )
+    content = archive.getvalue()
+    cache.put(archive_key, content, evict=False)
+    return len(content), len(content)
+
+
+def pregenerate_data_archives(
+    base_path: Path, cache: DiskLRUCache, workers: int | None = None
+) -> list[int]:
+    """Create the data archives of all groupings of all variables below base_path.
+
+    Archives are created in parallel by a pool of worker processes.
+    Returns the sizes of the created archives, 0 for up to date archives.
+    Raises if the archives do not fit into the cache together,
+    before evicting, which would remove archives that were just created.
+    """
+    citation_file = base_path.joinpath(CITATION_FILE_NAME)
+    if not citation_file.exists():
+        raise RuntimeError("No citation metadata file found.")
+    with open(citation_file, "r", encoding="utf-8") as file:
+        citations = load(file)["base_citation"]
+
+    registry = MetadataRegistry(base_path)
+    tasks: list[DataArchiveTask] = []
+    for variable_type, variable_name, grouping, file_base in iter_statistics_file_bases(
+        registry
+    ):
+        data_file = get_statistics_file(file_base)
+        if not data_file.exists():
+            continue
+        label_metadata = registry.get_label_metadata(
+            variable_type, variable_name, grouping
+        )
+        tasks.append((cache, data_file, label_metadata, citations))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_create_missing_data_archive, tasks, chunksize=4))
+    archive_bytes = sum(cached_size for _, cached_size in results)
+    if archive_bytes > cache.max_bytes:
+        raise RuntimeError(
+            f"The {len(results)} data archives take {archive_bytes} bytes, "
+            f"more than the {cache.max_bytes} bytes of the download cache. "
+            "Raise DOWNLOAD_CACHE_MAX_BYTES to keep them all."
+        )
+    cache.evict()
+    return [created_size for created_size, _ in results]
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description=(
+            "Create the download archives of all variables in the download cache."
+        )
+    )
+    parser.add_argument(
+        "base_path",
+        nargs="?",
+        default=getenv("STATISTICS_BASE_PATH"),
+        type=Path,
+        help="Defaults to the STATISTICS_BASE_PATH environment variable.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes, defaults to the number of CPUs.",
+    )
+    arguments = parser.parse_args()
+    if not arguments.base_path:
+        parser.error("No base path given and STATISTICS_BASE_PATH not set.")
+
+    start = perf_counter()
+    sizes = pregenerate_data_archives(
+        arguments.base_path.absolute(), get_download_cache(), arguments.workers
+    )
+    duration = perf_counter() - start
+    created_sizes = [size for size in sizes if size]
+    print(
+        f"Created {len(created_sizes)} archives "
+        f"({sum(created_sizes) / 1024**2:.1f} MiB), "
+        f"{len(sizes) - len(created_sizes)} were up to date. "
+        f"Took {duration:.1f}s, "
+        f"{len(created_sizes) / duration:.1f} archives/s."
+    )
+
+
+if __name__ == "__main__":
+    main()
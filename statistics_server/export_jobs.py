@@ -0,0 +1,127 @@
+"""Disk backed queue of export jobs shared by all server processes.
+
+Exports are slow, so they are not run inside the callback of a request.
+Callbacks submit a job and poll its state while background threads
+of all server processes work through the queue.
+The number of exports running at the same time is limited for all
+processes together, independently of the number of server workers.
+"""
+
+from os import getenv
+from pathlib import Path
+from tempfile import gettempdir
+from threading import Event, Thread
+from typing import Any, Callable, Literal, NotRequired, TypedDict
+from uuid import uuid4
+
+from diskcache import Cache
+
+EXPORT_QUEUE_PATH = Path(
+    getenv(
+        "EXPORT_QUEUE_PATH",
+        str(Path(gettempdir()).joinpath("statistics_server_export_queue")),
+    )
+)
+EXPORT_CONCURRENCY = int(getenv("EXPORT_CONCURRENCY", "2"))
+EXPORT_POLL_INTERVAL = 0.5
+# Finished jobs and slots of crashed processes are cleaned up after this time.
+EXPORT_JOB_EXPIRE = 600.0
+
+QUEUE_PREFIX = "export-queue"
+STATE_PREFIX = "export-job-"
+SLOT_PREFIX = "export-slot-"
+
+type ExportJob = dict[str, Any]
+type ExportFunction = Callable[[ExportJob], Any]
+
+
+class ExportJobState(TypedDict):
+    status: Literal["pending", "running", "done", "failed"]
+    result: NotRequired[Any]
+    error: NotRequired[str]
+
+
+class ExportQueue:
+    """First in first out queue of export jobs in a directory.
+
+    All processes that use the same directory share the queue
+    and the limit of concurrently running exports.
+    Every running job holds one of the slots, which expires on its own
+    if the process running the job crashes.
+    """
+
+    def __init__(self, directory: Path, concurrency: int) -> None:
+        self.concurrency = concurrency
+        self._cache = Cache(str(directory))
+        # Separate from the states, so its length is the number of queued jobs.
+        self._queue = Cache(str(directory.joinpath("queue")))
+
+    def submit(self, job: ExportJob) -> str:
+        """Add a job to the end of the queue and return its id."""
+        job_id = uuid4().hex
+        self._set_state(job_id, {"status": "pending"})
+        self._queue.push((job_id, job), prefix=QUEUE_PREFIX, expire=EXPORT_JOB_EXPIRE)
+        return job_id
+
+    def get_state(self, job_id: str) -> ExportJobState | None:
+        return self._cache.get(f"{STATE_PREFIX}{job_id}")
+
+    def run_next(self, export: ExportFunction) -> bool:
+        """Run the oldest pending job if there is one and the limit allows it.
+
+        Returns whether a job was run.
+        """
+        # Counting is a plain read, idle workers do not lock the queue for writing.
+        if len(self._queue) == 0:
+            return False
+        taken = self._take_job()
+        if taken is None:
+            return False
+        slot, job_id, job = taken
+        try:
+            self._set_state(job_id, {"status": "running"})
+            try:
+                result = export(job)
+            except Exception as error:
+                self._set_state(job_id, {"status": "failed", "error": str(error)})
+            else:
+                self._set_state(job_id, {"status": "done", "result": result})
+            return True
+        finally:
+            self._release_slot(slot, job_id)
+
+    def work(self, export: ExportFunction, stop: Event) -> None:
+        """Run jobs until stop is set, waits while the queue is empty."""
+        while not stop.is_set():
+            if not self.run_next(export):
+                stop.wait(EXPORT_POLL_INTERVAL)
+
+    def start_worker(self, export: ExportFunction) -> Event:
+        """Run jobs in a background thread until the returned event is set."""
+        stop = Event()
+        Thread(target=self.work, args=(export, stop), daemon=True).start()
+        return stop
+
+    def _set_state(self, job_id: str, state: ExportJobState) -> None:
+        self._cache.set(f"{STATE_PREFIX}{job_id}", state, expire=EXPORT_JOB_EXPIRE)
+
+    def _take_job(self) -> tuple[str, str, ExportJob] | None:
+        """Pull the oldest job and take a free slot for it in one transaction."""
+        with self._cache.transact(retry=True), self._queue.transact(retry=True):
+            slots = (f"{SLOT_PREFIX}{index}" for index in range(self.concurrency))
+            # Slots of crashed processes are free again once they expired.
+            slot = next((slot for slot in slots if slot not in self._cache), None)
+            if slot is None:
+                return None
+            _, item = self._queue.pull(prefix=QUEUE_PREFIX)
+            if item is None:
+                return None
+            job_id, job = item
+            self._cache.set(slot, job_id, expire=EXPORT_JOB_EXPIRE)
+            return slot, job_id, job
+
+    def _release_slot(self, slot: str, job_id: str) -> None:
+        with self._cache.transact(retry=True):
+            # The slot may have expired and been taken by another job.
+            if self._cache.get(slot) == job_id:
+                self._cache.delete(slot)
@@ -0,0 +1,382 @@
+"""Creation of the figures of all views.
+
+The default view of a variable, without any grouping, is the most requested
+one. Run this module to pre-render the default figures of all variables
+as static files after each data release. The server sends them as immutable
+files and only creates figures of other views.
+"""
+
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from gzip import compress as gzip_compress
+from hashlib import sha256
+from json import dumps, load
+from os import getenv
+from pathlib import Path
+from tempfile import gettempdir
+from time import perf_counter
+from typing import Any, TypedDict, cast, get_args
+
+from pandas import DataFrame
+from plotly.io import to_json
+
+from statistics_server.data_store import (
+    STATISTICS_PRECISION,
+    get_category_labels,
+    get_source_file,
+    get_statistics_file,
+    get_statistics_file_base,
+    read_prepared_statistics,
+    switch_label_language,
+)
+from statistics_server.layout import UI_TRANSLATIONS, encode_typed_arrays
+from statistics_server.metadata import MetadataRegistry
+from statistics_server.names import CATEGORICAL, MEAN, PROPORTION
+from statistics_server.numerical_boxplot_graph import create_numerical_boxplot_figure
+from statistics_server.simple_graph import (
+    apply_display_options,
+    create_bar_graph_figure,
+    create_line_graph_figure,
+)
+from statistics_server.types import (
+    LanguageCode,
+    Measure,
+    VariableMetadata,
+    VariableType,
+)
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+BOXPLOT_MIN_VALUE = 10
+# Change whenever the figures change to invalidate pre-rendered figures and ETags.
+FIGURE_FORMAT = "1"
+STATIC_FIGURES_PATH = Path(
+    getenv(
+        "STATIC_FIGURES_PATH",
+        str(Path(gettempdir()).joinpath("statistics_server_figures")),
+    )
+)
+STATIC_FIGURE_INDEX_FILE_NAME = "index.json"
+# Pre-compressed copies are stored next to each figure file.
+STATIC_FIGURE_ENCODINGS = {"br": ".br", "gzip": ".gz"}
+FIGURE_LANGUAGES: tuple[LanguageCode, ...] = get_args(LanguageCode.__value__)
+
+type DefaultFigureTask = tuple[
+    Path, VariableType, str, Path, list[VariableMetadata], tuple[Measure, ...]
+]
+
+
+class StaticFigure(TypedDict):
+    file: str
+    boxplot: str
+    source: str
+
+
+def create_figure(
+    data: DataFrame,
+    variable_type: VariableType,
+    variable_name: str,
+    grouping: list[str],
+    measure: Measure,
+    bar_graph: bool,
+    boxplot: bool,
+    language: LanguageCode,
+) -> tuple[dict[str, Any], str]:
+    """Create the figure dict of a view and the boxplot flag.
+
+    Figures have the default trace visibility, confidence intervals and legend.
+    Arrays are encoded as typed arrays.
+    """
+    if variable_type == CATEGORICAL:
+        measure = PROPORTION
+        # It is currently important that variable name is at the end of the grouping list
+        # for the grouping of the bar plot to work properly.
+        grouping = [*grouping, variable_name]
+
+    show_boxplot = get_boxplot_flag(data, measure, bar_graph)
+    if show_boxplot == "hide":
+        boxplot = False
+
+    if bar_graph:
+        figure = create_bar_graph_figure(
+            data,
+            group=grouping,
+            measure=measure,
+            language=language,
+            validate=False,
+        )
+    elif boxplot:
+        figure = create_numerical_boxplot_figure(
+            data,
+            groups=grouping,
+            y_title="",
+            validate=False,
+        )
+    else:
+        figure = create_line_graph_figure(
+            data,
+            group=grouping,
+            measure=measure,
+            language=language,
+            validate=False,
+        )
+
+    figure_dict = cast(dict[str, Any], figure)
+    encode_typed_arrays(figure_dict)
+    return figure_dict, show_boxplot
+
+
+def get_boxplot_flag(data: DataFrame, measure: Measure, bar_graph: bool) -> str:
+    """Boxplots are only offered if the values are large enough."""
+    if data[measure].max() < BOXPLOT_MIN_VALUE and not bar_graph:
+        return "hide"
+    return "show"
+
+
+def get_figure_measure(variable_type: VariableType, measure: Measure | None) -> Measure:
+    """Get the measure the figures of a variable type show."""
+    if variable_type == CATEGORICAL:
+        return PROPORTION
+    return measure or MEAN
+
+
+def get_figure_measures(variable_type: VariableType) -> tuple[Measure, ...]:
+    """List the measures that can be selected for a variable type."""
+    if variable_type == CATEGORICAL:
+        return (PROPORTION,)
+    return tuple(
+        dict.fromkeys(
+            measure
+            for language in FIGURE_LANGUAGES
+            for measure in UI_TRANSLATIONS["measure_names"][language]
+        )
+    )
+
+
+def get_figure_source(data_file: Path, label_metadata: list[VariableMetadata]) -> str:
+    """Hash the version of everything the figures of a data file are created from.
+
+    The statistics are identified by their CSV file,
+    so compiling them does not invalidate the figures.
+    """
+    source_file = get_source_file(data_file)
+    source_stat = source_file.stat()
+    figure_inputs = [
+        source_file.name,
+        source_stat.st_mtime_ns,
+        source_stat.st_size,
+        label_metadata,
+        STATISTICS_PRECISION,
+    ]
+    digest = sha256(FIGURE_FORMAT.encode("utf-8"))
+    digest.update(dumps(figure_inputs, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _get_index_key(
+    variable_type: VariableType,
+    variable_name: str,
+    measure: Measure,
+    language: LanguageCode,
+) -> str:
+    return "/".join((variable_type, variable_name, measure, language))
+
+
+class StaticFigureIndex:
+    """Index of the pre-rendered default figures in a directory.
+
+    The index is read again whenever the figures were pre-rendered again.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.version: int | None = None
+        self._figures: dict[str, StaticFigure] = {}
+        self._files: set[str] = set()
+        self.refresh()
+
+    def __len__(self) -> int:
+        return len(self._figures)
+
+    def __contains__(self, file_name: str) -> bool:
+        self.refresh()
+        return file_name in self._files
+
+    def refresh(self) -> None:
+        """Reread the index file if it changed since it was read."""
+        index_file = self.directory.joinpath(STATIC_FIGURE_INDEX_FILE_NAME)
+        version = index_file.stat().st_mtime_ns if index_file.exists() else None
+        if version == self.version:
+            return
+        figures: dict[str, StaticFigure] = {}
+        if version is not None:
+            with open(index_file, "r", encoding="utf-8") as file:
+                figures = load(file)
+        self._figures = figures
+        self._files = {figure["file"] for figure in figures.values()}
+        self.version = version
+
+    def get(
+        self,
+        variable_type: VariableType,
+        variable_name: str,
+        measure: Measure,
+        language: LanguageCode,
+        source: str,
+    ) -> StaticFigure | None:
+        """Get a pre-rendered figure if it was created from the given source."""
+        self.refresh()
+        figure = self._figures.get(
+            _get_index_key(variable_type, variable_name, measure, language)
+        )
+        if figure is None or figure["source"] != source:
+            return None
+        return figure
+
+    def get_encodings(self, file_name: str) -> list[str]:
+        """List the encodings a figure file is stored in, besides uncompressed."""
+        return [
+            encoding
+            for encoding, suffix in STATIC_FIGURE_ENCODINGS.items()
+            if self.directory.joinpath(f"{file_name}{suffix}").exists()
+        ]
+
+
+def _write_static_figure(directory: Path, figure_json: str) -> str:
+    """Write a figure and its compressed copies, named by their content."""
+    content = figure_json.encode("utf-8")
+    file_name = f"{sha256(content).hexdigest()[:32]}.json"
+    figure_file = directory.joinpath(file_name)
+    if figure_file.exists():
+        return file_name
+    encoded_contents = {"gzip": gzip_compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoded_contents["br"] = brotli.compress(content)
+    for encoding, encoded_content in encoded_contents.items():
+        directory.joinpath(
+            f"{file_name}{STATIC_FIGURE_ENCODINGS[encoding]}"
+        ).write_bytes(encoded_content)
+    # The uncompressed file is written last, it marks the figure as complete.
+    temporary_file = figure_file.with_suffix(".tmp")
+    temporary_file.write_bytes(content)
+    temporary_file.replace(figure_file)
+    return file_name
+
+
+def _render_default_figures(
+    task: DefaultFigureTask,
+) -> dict[str, StaticFigure]:
+    directory, variable_type, variable_name, data_file, label_metadata, measures = task
+    category_labels = get_category_labels(label_metadata)
+    data = read_prepared_statistics(data_file, category_labels)
+    source = get_figure_source(data_file, label_metadata)
+    figures: dict[str, StaticFigure] = {}
+    for language in FIGURE_LANGUAGES:
+        language_data = switch_label_language(data, category_labels, language)
+        for measure in measures:
+            figure, show_boxplot = create_figure(
+                language_data,
+                variable_type,
+                variable_name,
+                [],
+                measure,
+                bar_graph=False,
+                boxplot=False,
+                language=language,
+            )
+            apply_display_options(figure, show_confidence=True, show_legend=True)
+            figures[_get_index_key(variable_type, variable_name, measure, language)] = {
+                "file": _write_static_figure(
+                    directory, to_json(figure, validate=False)
+                ),
+                "boxplot": show_boxplot,
+                "source": source,
+            }
+    return figures
+
+
+def prerender_default_figures(
+    base_path: Path, directory: Path, workers: int | None = None
+) -> int:
+    """Render the default figures of all variables below base_path into directory.
+
+    Figures are rendered in parallel by a pool of worker processes.
+    Files of figures that are no longer in the index are removed.
+    Returns the number of figures in the index.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    registry = MetadataRegistry(base_path)
+    tasks: list[DefaultFigureTask] = []
+    for variable_type, variable_name in registry.variables():
+        data_file = get_statistics_file(
+            get_statistics_file_base(
+                base_path.joinpath(variable_type, variable_name), variable_name, []
+            )
+        )
+        if not data_file.exists():
+            continue
+        tasks.append(
+            (
+                directory,
+                variable_type,
+                variable_name,
+                data_file,
+                registry.get_label_metadata(variable_type, variable_name, []),
+                get_figure_measures(variable_type),
+            )
+        )
+
+    figures: dict[str, StaticFigure] = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for variable_figures in executor.map(_render_default_figures, tasks):
+            figures.update(variable_figures)
+
+    index_file = directory.joinpath(STATIC_FIGURE_INDEX_FILE_NAME)
+    temporary_file = index_file.with_suffix(".tmp")
+    temporary_file.write_text(dumps(figures, sort_keys=True), encoding="utf-8")
+    temporary_file.replace(index_file)
+
+    used_names = {Path(figure["file"]).stem for figure in figures.values()}
+    for figure_file in directory.glob("*.json*"):
+        name = figure_file.name.split(".")[0]
+        if figure_file != index_file and name not in used_names:
+            figure_file.unlink(missing_ok=True)
+    return len(figures)
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description="Render the default figures of all variables into static files."
+    )
+    parser.add_argument(
+        "base_path",
+        nargs="?",
+        default=getenv("STATISTICS_BASE_PATH"),
+        type=Path,
+        help="Defaults to the STATISTICS_BASE_PATH environment variable.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes, defaults to the number of CPUs.",
+    )
+    arguments = parser.parse_args()
+    if not arguments.base_path:
+        parser.error("No base path given and STATISTICS_BASE_PATH not set.")
+
+    start = perf_counter()
+    count = prerender_default_figures(
+        arguments.base_path.absolute(), STATIC_FIGURES_PATH, arguments.workers
+    )
+    print(
+        f"Rendered {count} figures into {STATIC_FIGURES_PATH}. "
+        f"Took {perf_counter() - start:.1f}s."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,565 @@
+"""Rendering of figures to static images in long lived worker processes.
+
+Image export through kaleido is slow to start and needs a lot of memory.
+kaleido starts a new Chromium for every image, so each renderer keeps
+one Chromium with the page of kaleido open and renders all images in it.
+Rendering happens in a pool of separate processes, which are started with
+the server worker by default, reused for all exports and replaced when they
+crash or hang.
+The pool size bounds how many images are rendered at the same time.
+"""
+
+from asyncio import AbstractEventLoop, new_event_loop, run_coroutine_threadsafe
+from atexit import register as register_exit_handler
+from concurrent.futures import Executor, Future
+from contextlib import AsyncExitStack
+from hashlib import sha256
+from importlib import import_module
+from json import dumps, loads
+from logging import getLogger
+from multiprocessing.connection import Connection
+from os import environ, getenv, pathsep
+from pathlib import Path
+from queue import Empty, Queue
+from socket import socketpair
+from subprocess import Popen
+from sys import argv, executable, path
+from tempfile import TemporaryDirectory, gettempdir
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Coroutine, Iterable
+
+from statistics_server.cache import DiskLRUCache
+from statistics_server.kaleido_adapter import (
+    HEALTH_EXPRESSION,
+    RENDER_FUNCTION,
+    KaleidoPage,
+)
+
+IMAGE_RENDERER_POOL_SIZE = int(getenv("IMAGE_RENDERER_POOL_SIZE", "1"))
+IMAGE_RENDER_TIMEOUT = float(getenv("IMAGE_RENDER_TIMEOUT", "60"))
+IMAGE_RENDERER_HEALTH_INTERVAL = float(getenv("IMAGE_RENDERER_HEALTH_INTERVAL", "30"))
+IMAGE_RENDERER_START = getenv("IMAGE_RENDERER_START", "startup")
+if IMAGE_RENDERER_START not in ("startup", "lazy"):
+    raise RuntimeError("IMAGE_RENDERER_START has to be startup or lazy.")
+IMAGE_CACHE_MAX_BYTES = int(getenv("IMAGE_CACHE_MAX_BYTES", str(256 * 1024**2)))
+IMAGE_CACHE_PATH = Path(
+    getenv(
+        "IMAGE_CACHE_PATH",
+        str(Path(gettempdir()).joinpath("statistics_server_images")),
+    )
+)
+DEFAULT_RENDER_FUNCTION = "statistics_server.image_export:render_images"
+DEFAULT_HEALTH_CHECK = "statistics_server.image_export:check_kaleido_session"
+PING = "ping"
+PING_TIMEOUT = 5.0
+BROWSER_PIPE_THREADS = 4
+
+type Images = dict[str, bytes]
+type RenderFunction = Callable[[str, Iterable[str], int, int], Images]
+type HealthCheck = Callable[[], bool]
+type _Call = tuple[Future[Any], Callable[..., Any], tuple[Any, ...], dict[str, Any]]
+
+logger = getLogger(__name__)
+
+
+class _DaemonThreadExecutor(Executor):
+    """Run calls in a fixed number of daemon threads.
+
+    The browser pipe is read by a call that only returns when the browser stops.
+    Threads of the executors of concurrent.futures are joined on exit
+    before atexit handlers run, so the browser could never be stopped by one.
+    The threads are started up front, as none can be started on exit.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self._workers = workers
+        self._calls: Queue[_Call | None] = Queue()
+        for _ in range(workers):
+            Thread(target=self._work, daemon=True).start()
+
+    def _work(self) -> None:
+        while (call := self._calls.get()) is not None:
+            future, function, args, kwargs = call
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(function(*args, **kwargs))
+            except BaseException as error:
+                future.set_exception(error)
+
+    def submit(self, fn, /, *args, **kwargs):  # type: ignore[no-untyped-def]
+        future: Future[Any] = Future()
+        self._calls.put((future, fn, args, kwargs))
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        for _ in range(self._workers):
+            self._calls.put(None)
+
+
+class KaleidoSession:
+    """Chromium with the page of kaleido that is kept open for all renders.
+
+    The browser is driven by an event loop in a background thread.
+    """
+
+    def __init__(self, timeout: float = IMAGE_RENDER_TIMEOUT) -> None:
+        self._kaleido = KaleidoPage()
+        self._timeout = timeout
+        self._lock = Lock()
+        self._exit_stack: AsyncExitStack | None = None
+        self._tab: Any = None
+        self._context_id: int | None = None
+        self._closed = False
+        # Reads from and writes to the browser pipe.
+        self._executor = _DaemonThreadExecutor(BROWSER_PIPE_THREADS)
+        self._loop: AbstractEventLoop = new_event_loop()
+        Thread(target=self._loop.run_forever, daemon=True).start()
+        self._directory = TemporaryDirectory(prefix="statistics_server_kaleido_")
+        self._page = Path(self._directory.name).joinpath("index.html")
+        self._page.write_text(self._kaleido.make_html(), encoding="utf-8")
+        try:
+            self.start()
+        except Exception:
+            self.close()
+            raise
+        register_exit_handler(self.close)
+
+    def _run[
+        Result
+    ](self, coroutine: Coroutine[Any, Any, Result], timeout: float) -> Result:
+        future = run_coroutine_threadsafe(coroutine, self._loop)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    async def _send(self, command: str, params: dict[str, Any]) -> dict[str, Any]:
+        response = await self._tab.send_command(command, params=params)
+        if "error" in response:
+            raise RuntimeError(f"Image export failed: {response['error']}")
+        return response
+
+    async def _open(self) -> None:
+        from choreographer import Browser
+
+        exit_stack = AsyncExitStack()
+        self._exit_stack = exit_stack
+        browser = await exit_stack.enter_async_context(
+            Browser(headless=True, executor=self._executor)
+        )
+        self._tab = await browser.create_tab(self._page.as_uri())
+        page_loaded = self._tab.subscribe_once("Page.loadEventFired")
+        await self._send("Page.enable", {})
+        await self._send("Page.reload", {})
+        await page_loaded
+        context_created = self._tab.subscribe_once("Runtime.executionContextCreated")
+        await self._send("Runtime.enable", {})
+        self._context_id = (await context_created)["params"]["context"]["id"]
+
+    async def _close(self) -> None:
+        exit_stack, self._exit_stack = self._exit_stack, None
+        self._tab = self._context_id = None
+        if exit_stack is not None:
+            await exit_stack.aclose()
+
+    def start(self) -> None:
+        self._run(self._open(), self._timeout)
+
+    def stop(self) -> None:
+        try:
+            self._run(self._close(), PING_TIMEOUT)
+        except Exception:
+            logger.warning("Stopping Chromium for image export failed.", exc_info=True)
+
+    def restart(self) -> None:
+        self.stop()
+        self.start()
+
+    def close(self) -> None:
+        """Stop the browser and the event loop."""
+        if self._closed:
+            return
+        self._closed = True
+        self.stop()
+        self._executor.shutdown()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._directory.cleanup()
+
+    def is_healthy(self) -> bool:
+        if self._context_id is None:
+            return False
+        try:
+            response = self._run(
+                self._send(
+                    "Runtime.evaluate",
+                    {
+                        "expression": HEALTH_EXPRESSION,
+                        "returnByValue": True,
+                        "contextId": self._context_id,
+                    },
+                ),
+                PING_TIMEOUT,
+            )
+        except Exception:
+            logger.warning("Chromium for image export does not respond.", exc_info=True)
+            return False
+        return response["result"]["result"].get("value") == "object"
+
+    async def _render(self, spec: dict[str, Any]) -> bytes:
+        response = await self._send(
+            "Runtime.callFunctionOn",
+            {
+                "functionDeclaration": RENDER_FUNCTION,
+                "arguments": [{"value": spec}],
+                "returnByValue": False,
+                "userGesture": True,
+                "awaitPromise": True,
+                "executionContextId": self._context_id,
+            },
+        )
+        return self._kaleido.read_image(response["result"]["result"]["value"])
+
+    def render(
+        self, figure_json: str, formats: Iterable[str], width: int, height: int
+    ) -> Images:
+        """Render a serialized figure to images of all formats, one at a time."""
+        figure = loads(figure_json)
+        with self._lock:
+            return {
+                image_format: self._run(
+                    self._render(
+                        self._kaleido.make_spec(figure, image_format, width, height)
+                    ),
+                    self._timeout,
+                )
+                for image_format in formats
+            }
+
+
+_kaleido_session: KaleidoSession | None = None
+_kaleido_session_lock = Lock()
+
+
+def get_kaleido_session() -> KaleidoSession:
+    """Get the kaleido session of this process, started on first use."""
+    global _kaleido_session
+    with _kaleido_session_lock:
+        if _kaleido_session is None:
+            _kaleido_session = KaleidoSession()
+        return _kaleido_session
+
+
+def check_kaleido_session() -> bool:
+    """Start the kaleido session or restart it if it crashed or does not respond.
+
+    Returns whether the session works.
+    """
+    try:
+        session = get_kaleido_session()
+        if not session.is_healthy():
+            session.restart()
+    except Exception:
+        logger.exception("Starting Chromium for image export failed.")
+        return False
+    return True
+
+
+def render_images(
+    figure_json: str, formats: Iterable[str], width: int, height: int
+) -> Images:
+    """Render a serialized figure to images of all formats."""
+    return get_kaleido_session().render(figure_json, formats, width, height)
+
+
+def _serve(
+    connection: Connection, render: RenderFunction, check_health: HealthCheck
+) -> None:
+    """Render images for every request until the connection is closed.
+
+    Pings are answered after checking the health of the renderer.
+    """
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            return
+        if request == PING:
+            connection.send(PING if check_health() else None)
+            continue
+        try:
+            connection.send((render(*request), None))
+        except Exception as error:
+            logger.exception("Image export failed.")
+            connection.send((None, repr(error)))
+
+
+def _is_healthy() -> bool:
+    return True
+
+
+class _Renderer:
+    """Single renderer process and the connection to it.
+
+    Renderers are separate interpreters instead of multiprocessing children,
+    so they neither import the web app again nor fork a threaded process.
+    render_function and health_check are referenced as "module:function".
+    The health check runs on start and on every ping,
+    it can start or restart what the render function needs.
+    """
+
+    def __init__(self, render_function: str, health_check: str | None) -> None:
+        self._render_function = render_function
+        self._health_check = health_check
+        self._connection: Connection
+        self._process: Popen[bytes]
+        self.start()
+
+    def start(self) -> None:
+        parent_socket, child_socket = socketpair()
+        with child_socket:
+            self._process = Popen(
+                [
+                    executable,
+                    "-m",
+                    "statistics_server.image_export",
+                    str(child_socket.fileno()),
+                    self._render_function,
+                    *([self._health_check] if self._health_check else []),
+                ],
+                pass_fds=[child_socket.fileno()],
+                env={**environ, "PYTHONPATH": pathsep.join(path)},
+            )
+        self._connection = Connection(parent_socket.detach())
+
+    def stop(self) -> None:
+        self._connection.close()
+        self._process.kill()
+        self._process.wait()
+
+    def restart(self) -> None:
+        self.stop()
+        self.start()
+
+    def is_healthy(self, timeout: float) -> bool:
+        if self._process.poll() is not None:
+            return False
+        try:
+            self._connection.send(PING)
+            return self._connection.poll(timeout) and self._connection.recv() == PING
+        except (EOFError, OSError):
+            return False
+
+    def render(
+        self,
+        figure_json: str,
+        formats: Iterable[str],
+        width: int,
+        height: int,
+        timeout: float,
+    ) -> Images:
+        try:
+            self._connection.send((figure_json, list(formats), width, height))
+            if not self._connection.poll(timeout):
+                raise TimeoutError("Image export timed out.")
+            images, error = self._connection.recv()
+        except (EOFError, OSError, TimeoutError) as crash:
+            self.restart()
+            raise RuntimeError("Image export failed.") from crash
+        if error is not None:
+            raise RuntimeError(f"Image export failed: {error}")
+        return images
+
+
+class RendererPool:
+    """Pool of renderer processes that are reused across requests.
+
+    All processes are started on creation.
+    Renderers are checked for health before use and in a fixed interval
+    while idle, crashed or unresponsive renderers are restarted.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        timeout: float = IMAGE_RENDER_TIMEOUT,
+        health_interval: float = IMAGE_RENDERER_HEALTH_INTERVAL,
+        render_function: str = DEFAULT_RENDER_FUNCTION,
+        health_check: str | None = None,
+    ) -> None:
+        if size < 1:
+            raise RuntimeError("A renderer pool needs at least one renderer.")
+        self.size = size
+        self.timeout = timeout
+        self._idle: Queue[_Renderer] = Queue()
+        for _ in range(size):
+            self._idle.put(_Renderer(render_function, health_check))
+        self._closed = Event()
+        self._health_check = Thread(
+            target=self._check_health_regularly, args=(health_interval,), daemon=True
+        )
+        self._health_check.start()
+
+    def render(
+        self, figure_json: str, formats: Iterable[str], width: int, height: int
+    ) -> Images:
+        """Render a serialized figure, waits for a free renderer if necessary."""
+        renderer = self._idle.get()
+        try:
+            if not renderer.is_healthy(PING_TIMEOUT):
+                renderer.restart()
+            return renderer.render(figure_json, formats, width, height, self.timeout)
+        finally:
+            self._idle.put(renderer)
+
+    def check_health(self) -> int:
+        """Restart all idle renderers that crashed or do not respond.
+
+        Returns the number of restarted renderers.
+        """
+        restarted = 0
+        checked = []
+        for _ in range(self.size):
+            try:
+                renderer = self._idle.get_nowait()
+            except Empty:
+                break
+            if not renderer.is_healthy(PING_TIMEOUT):
+                renderer.restart()
+                restarted += 1
+            checked.append(renderer)
+        for renderer in checked:
+            self._idle.put(renderer)
+        return restarted
+
+    def _check_health_regularly(self, interval: float) -> None:
+        while not self._closed.wait(interval):
+            self.check_health()
+
+    def close(self) -> None:
+        self._closed.set()
+        for _ in range(self.size):
+            self._idle.get().stop()
+
+
+def get_image_key(figure_json: str, image_format: str, width: int, height: int) -> str:
+    """Hash everything an exported image is rendered from.
+
+    The figure is normalized first, so the key does not depend on
+    the order of keys or the formatting of the serialized figure.
+    """
+    normalized_figure = dumps(loads(figure_json), sort_keys=True, separators=(",", ":"))
+    digest = sha256(normalized_figure.encode("utf-8"))
+    digest.update(f"{image_format}:{width}x{height}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def get_image_cache() -> DiskLRUCache:
+    return DiskLRUCache(
+        IMAGE_CACHE_PATH, max_bytes=IMAGE_CACHE_MAX_BYTES, suffix=".image"
+    )
+
+
+def _read_cached_image(cache: DiskLRUCache, image_key: str) -> bytes | None:
+    # Stays readable if another process evicts the image in the meantime.
+    image_file = cache.open(image_key)
+    if image_file is None:
+        return None
+    with image_file:
+        return image_file.read()
+
+
+def read_cached_images(
+    cache: DiskLRUCache,
+    figure_json: str,
+    formats: Iterable[str],
+    width: int,
+    height: int,
+) -> Images | None:
+    """Read the images of all formats from the cache, None if any is missing."""
+    images: Images = {}
+    for image_format in formats:
+        image = _read_cached_image(
+            cache, get_image_key(figure_json, image_format, width, height)
+        )
+        if image is None:
+            return None
+        images[image_format] = image
+    return images
+
+
+def render_cached_images(
+    cache: DiskLRUCache,
+    render: RenderFunction,
+    figure_json: str,
+    formats: Iterable[str],
+    width: int,
+    height: int,
+) -> Images:
+    """Read images from the cache and render only the missing formats."""
+    images: Images = {}
+    missing: dict[str, str] = {}
+    for image_format in formats:
+        image_key = get_image_key(figure_json, image_format, width, height)
+        image = _read_cached_image(cache, image_key)
+        if image is None:
+            missing[image_format] = image_key
+        else:
+            images[image_format] = image
+    if missing:
+        rendered = render(figure_json, list(missing), width, height)
+        for image_format, image_key in missing.items():
+            cache.put(image_key, rendered[image_format], evict=False)
+        cache.evict()
+        images.update(rendered)
+    return images
+
+
+_renderer_pool: RendererPool | None = None
+_renderer_pool_lock = Lock()
+
+
+def get_renderer_pool() -> RendererPool | None:
+    """Get the pool configured by IMAGE_RENDERER_POOL_SIZE, started on first use.
+
+    A size of 0 disables the pool, images are then rendered in process.
+    """
+    global _renderer_pool
+    if IMAGE_RENDERER_POOL_SIZE == 0:
+        return None
+    with _renderer_pool_lock:
+        if _renderer_pool is None:
+            _renderer_pool = RendererPool(
+                IMAGE_RENDERER_POOL_SIZE, health_check=DEFAULT_HEALTH_CHECK
+            )
+        return _renderer_pool
+
+
+def start_renderers() -> None:
+    """Start the renderers of this process before the first export.
+
+    Without a pool, Chromium is started in process in the background.
+    """
+    if get_renderer_pool() is None:
+        Thread(target=check_kaleido_session, daemon=True).start()
+
+
+def _import_function(reference: str) -> Callable[..., Any]:
+    module_name, function_name = reference.split(":")
+    return getattr(import_module(module_name), function_name)
+
+
+def main() -> None:
+    """Serve the render requests of a pool on the inherited socket."""
+    file_descriptor, render_function = int(argv[1]), argv[2]
+    # Imported by reference, this module runs as __main__ and not as itself.
+    render = _import_function(render_function)
+    check_health = _import_function(argv[3]) if len(argv) > 3 else _is_healthy
+    # Start what the renderer needs before the first request.
+    check_health()
+    _serve(Connection(file_descriptor), render, check_health)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Adapter to the internals of kaleido that the image export depends on.
+
+kaleido starts a new Chromium for every image and has no API to keep one open.
+The image export keeps one open itself and renders on the page of kaleido,
+which needs parts of kaleido that are not public:
+the page and the render specs of the plotly scope
+and the kaleido_scopes function of its javascript bundle.
+They are only used here and only with the versions this adapter was written for,
+which are pinned in pyproject.toml together with choreographer,
+the browser driver of kaleido.
+"""
+
+from base64 import b64decode
+from importlib.metadata import version
+from json import loads
+from typing import Any
+
+# Update together with the pins in pyproject.toml after checking the adapter.
+SUPPORTED_VERSIONS = {"kaleido": "0.4.0rc5", "choreographer": "0.99.5"}
+
+# Same call as kaleido.to_image, on the page of the kaleido scope.
+RENDER_FUNCTION = (
+    "function(spec) { return kaleido_scopes.plotly(spec).then(JSON.stringify); }"
+)
+# Evaluates to "object" once the page is loaded.
+HEALTH_EXPRESSION = "typeof kaleido_scopes"
+TEXT_FORMATS = ("svg", "json")
+
+
+def check_versions() -> None:
+    """Raise if kaleido or choreographer are not the supported versions."""
+    for distribution, supported_version in SUPPORTED_VERSIONS.items():
+        installed_version = version(distribution)
+        if installed_version != supported_version:
+            raise RuntimeError(
+                f"Image export supports {distribution} {supported_version}, "
+                f"{installed_version} is installed."
+            )
+
+
+class KaleidoPage:
+    """Page of the plotly scope of kaleido and the images rendered on it."""
+
+    def __init__(self) -> None:
+        check_versions()
+        from plotly.io.kaleido import scope
+
+        self._scope = scope
+
+    def make_html(self) -> str:
+        """Create the page, which loads plotly.js and the kaleido bundle."""
+        return self._scope.make_page_string()
+
+    def make_spec(
+        self, figure: dict[str, Any], image_format: str, width: int, height: int
+    ) -> dict[str, Any]:
+        """Create the argument of RENDER_FUNCTION for a figure."""
+        return self._scope.make_spec(
+            figure, format=image_format, width=width, height=height
+        )
+
+    @staticmethod
+    def read_image(result_json: str) -> bytes:
+        """Read the image from the result of RENDER_FUNCTION."""
+        result = loads(result_json)
+        if result.get("code", 0) != 0:
+            raise RuntimeError(f"Image export failed: {result.get('message')}")
+        if result["format"] in TEXT_FORMATS:
+            return result["result"].encode("utf-8")
+        return b64decode(result["result"])
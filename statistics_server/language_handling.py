@@ -1,11 +1,11 @@
 from os import getenv
 from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Mapping
 
 import yaml
-from pandas import DataFrame
-from pandas.api.types import CategoricalDtype
 
-from statistics_server.types import VariableMetadata
+from statistics_server.types import LanguageCode
 
 UI_TRANSLATION_KEY = "UI_TRANSLATIONS_PATH"
 
@@ -14,6 +14,13 @@ MEASURE_TRANSLATION = {
     "en": {"mean": "Mean", "median": "Median", "proportion": "Proportion"},
     "de": {"mean": "Durchschnitt", "median": "Median", "proportion": "Anteil"},
 }
+IMAGE_EXPORT_ERROR_TRANSLATION = {
+    "en": "The figure could not be exported. Please try again later.",
+    "de": (
+        "Der Graph konnte nicht exportiert werden. "
+        "Bitte versuchen Sie es später erneut."
+    ),
+}
 
 UI_TRANSLATIONS_CONFIG_PATH = Path(getenv(UI_TRANSLATION_KEY, ""))
 if str(UI_TRANSLATIONS_CONFIG_PATH) == "" or not UI_TRANSLATIONS_CONFIG_PATH.exists():
@@ -25,44 +32,60 @@ if str(UI_TRANSLATIONS_CONFIG_PATH) == "" or not UI_TRANSLATIONS_CONFIG_PATH.exi
     )
 
 
-def get_language_config(language: str = "en"):
+type LanguageConfig = Mapping[str, str]
+
+# Keys of the UI translations used in the layout.
+UI_TRANSLATION_KEYS = (
+    "confidence_interval",
+    "proportional_data_explanation",
+    "confidence_checkbox",
+    "show_legend",
+    "show_bar_graph",
+    "show_boxplot",
+    "download_data",
+    "download_image",
+    "hide_control_panel",
+)
+SUPPORTED_LANGUAGES: tuple[LanguageCode, ...] = ("en", "de")
+
+_loaded_language_configs: tuple[int, dict[str, LanguageConfig]] | None = None
+
+
+def validate_language_configs(language_configs: dict[str, Any]) -> None:
+    """Ensure that all translations used in the layout exist for every language."""
+    missing_keys = []
+    for language in SUPPORTED_LANGUAGES:
+        language_config = language_configs.get(language) or {}
+        for key in UI_TRANSLATION_KEYS:
+            if key not in language_config:
+                missing_keys.append(f"{language}.{key}")
+    if missing_keys:
+        raise RuntimeError(
+            f"UI translations in {UI_TRANSLATIONS_CONFIG_PATH} are missing: "
+            + ", ".join(missing_keys)
+        )
+
+
+def _load_language_configs() -> dict[str, LanguageConfig]:
     with open(UI_TRANSLATIONS_CONFIG_PATH, "r", encoding="utf-8") as file:
-        language_config = yaml.load(file, yaml.CLoader)
-    return language_config[language]
+        language_configs = yaml.load(file, yaml.CLoader)
+    validate_language_configs(language_configs)
+    return {
+        language: MappingProxyType(dict(language_config))
+        for language, language_config in language_configs.items()
+    }
 
 
-def handle_categorical_labels_and_order(
-    data: DataFrame, metadata: list[VariableMetadata], language="de"
-):
-    """Order columns by metadata and switch labels to language
+def get_language_config(language: str = "en") -> LanguageConfig:
+    """Get the read only UI translations for a language.
 
-    Labels in metadata are in an ordered list.
-    The order in the list corresponds to an ordered list for the codes.
-    This means that the labels will be indirectly ordered by the variable codes.
+    The translations are parsed once and reloaded when the file changes.
     """
-
-    label_mapping: dict[str, dict[str, str]] = {}
-    type_mapping: dict[str, list[str]] = {}
-    for variable_metadata in metadata:
-        variable = variable_metadata["variable"]
-        type_mapping[variable] = []
-        label_mapping[variable] = {}
-        for label, label_de, value in zip(
-            variable_metadata["value_labels"],
-            variable_metadata["value_labels_de"],
-            variable_metadata["values"],
-        ):
-            if value < 0:
-                continue
-            if language == "de":
-                type_mapping[variable].append(label_de)
-                label_mapping[variable][label] = label_de
-                continue
-            type_mapping[variable].append(label)
-            label_mapping[variable][label] = label
-    data = data.replace(label_mapping)
-    for variable, order in type_mapping.items():
-        _type = CategoricalDtype(categories=order, ordered=True)
-        data[variable] = data[variable].astype(_type)
-    data = data.sort_values(["year", *list(type_mapping.keys())])
-    return data
+    global _loaded_language_configs
+    modification_time = UI_TRANSLATIONS_CONFIG_PATH.stat().st_mtime_ns
+    if (
+        _loaded_language_configs is None
+        or _loaded_language_configs[0] != modification_time
+    ):
+        _loaded_language_configs = (modification_time, _load_language_configs())
+    return _loaded_language_configs[1][language]
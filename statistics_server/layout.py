@@ -1,9 +1,14 @@
 """Modular assembling of html layout."""
 
-from typing import Generator, Literal, Union
+from base64 import b64encode
+from functools import cache
+from typing import Any, Generator, Literal, Union
 
-from dash import dcc
+from dash import Patch, dcc
+from numpy import ndarray
 from plotly.graph_objects import Figure
+from plotly.io import templates
+from plotly.offline import get_plotlyjs_version
 
 from statistics_server.types import (
     GroupingMetadata,
@@ -16,6 +21,11 @@ from statistics_server.types import (
 
 type COLOR = str
 FONT_FAMILY = "Helvetica"
+# Base64 encoded typed arrays in figures are supported since plotly.js 2.28.0.
+TYPED_ARRAYS_SUPPORTED = tuple(
+    int(part) for part in get_plotlyjs_version().split(".")[:2]
+) >= (2, 28)
+TYPED_ARRAY_TYPES = {"f": "f4", "i": "i4"}
 
 COLOR_PALETTE: tuple[COLOR, ...] = (
     "rgb(255, 194, 10)",
@@ -103,8 +113,8 @@ UI_TRANSLATIONS: UITranslation = {
         "de": {"label": "Keine Gruppierung", "value": None},
     },
     "measure_names": {
-        "en": {"mean": "Mean"},
-        "de": {"mean": "Durchschnitt"},
+        "en": {"mean": "Mean", "median": "Median"},
+        "de": {"mean": "Durchschnitt", "median": "Median"},
     },
 }
 
@@ -166,40 +176,158 @@ def create_grouping_dropdown(
     )
 
 
-def style_numeric_figure(
-    figure: Figure,
+def get_numeric_figure_layout(
     y_max: int,
     plot_type: PlotType,
     start_year: int | None = None,
     end_year: int | None = None,
     measure: Measure = "mean",
-) -> None:
-    """Mutate figure to customize styling"""
-    if plot_type == "line":
-        figure.update_traces(connectgaps=True)
-    if plot_type == "bar":
-        figure.update_layout(barmode="stack")
-    yaxis_layout = {"tickmode": "linear", "tick0": 0}
+) -> dict[str, Any]:
+    """Create the layout styling of numeric figures as a plain dict."""
+    yaxis_layout: dict[str, Any] = {"tickmode": "linear", "tick0": 0}
     if measure in ("mean", "median"):
         yaxis_layout["dtick"] = y_label_intervals(y_max)
     if measure in "proportion":
         yaxis_layout["tickformat"] = ",.0%"
         yaxis_layout["dtick"] = 0.10  # [number / 100 for number in range(0, 100, 5)]
         yaxis_layout["range"] = [0, 1]
-
-    figure.update_layout(
-        xaxis={"tickmode": "linear", "tick0": start_year, "dtick": 1},
-        yaxis=yaxis_layout,
-        hoverlabel=dict(font_size=16, font_family=FONT_FAMILY),
-        font_family=FONT_FAMILY,
+    yaxis_layout.update(
+        showline=True, rangemode="tozero", linewidth=1, linecolor="black"
     )
 
-    figure.update_yaxes(showline=True, rangemode="tozero", linewidth=1, linecolor="black")
-
+    xaxis_layout: dict[str, Any] = {
+        "tickmode": "linear",
+        "tick0": start_year,
+        "dtick": 1,
+    }
     if not plot_type == "bar" and start_year is not None and end_year is not None:
-        figure.update_xaxes(
+        xaxis_layout.update(
             showline=True,
             linewidth=1,
             linecolor="black",
             range=[start_year - 1, end_year + 1],
         )
+
+    layout = {
+        "xaxis": xaxis_layout,
+        "yaxis": yaxis_layout,
+        "hoverlabel": {"font": {"size": 16, "family": FONT_FAMILY}},
+        "font": {"family": FONT_FAMILY},
+    }
+    if plot_type == "bar":
+        layout["barmode"] = "stack"
+    return layout
+
+
+def style_numeric_figure(
+    figure: Figure,
+    y_max: int,
+    plot_type: PlotType,
+    start_year: int | None = None,
+    end_year: int | None = None,
+    measure: Measure = "mean",
+) -> None:
+    """Mutate figure to customize styling"""
+    if plot_type == "line":
+        figure.update_traces(connectgaps=True)
+    figure.update_layout(
+        get_numeric_figure_layout(y_max, plot_type, start_year, end_year, measure)
+    )
+
+
+def style_numeric_figure_dict(
+    figure: dict[str, Any],
+    y_max: int,
+    plot_type: PlotType,
+    start_year: int | None = None,
+    end_year: int | None = None,
+    measure: Measure = "mean",
+) -> None:
+    """Mutate a figure dict like style_numeric_figure does with a Figure."""
+    if plot_type == "line":
+        for trace in figure["data"]:
+            trace["connectgaps"] = True
+    figure["layout"].update(
+        get_numeric_figure_layout(y_max, plot_type, start_year, end_year, measure)
+    )
+
+
+@cache
+def _get_template(name: str) -> dict[str, Any]:
+    return templates[name].to_plotly_json()
+
+
+def create_figure_dict(
+    traces: list[dict[str, Any]], layout: dict[str, Any] | None = None
+) -> dict[str, Any]:
+    """Assemble a figure dict from trace dicts without any validation.
+
+    The result serializes like a Figure of the same traces and layout,
+    including the default template. The template is shared between
+    figures and must not be mutated.
+    """
+    layout = dict(layout or {})
+    if templates.default is not None:
+        layout["template"] = _get_template(templates.default)
+    return {"data": traces, "layout": layout}
+
+
+def _to_typed_array(values: ndarray) -> dict[str, str] | ndarray:
+    dtype = TYPED_ARRAY_TYPES.get(values.dtype.kind)
+    if dtype is None or values.size == 0:
+        return values
+    typed_array = {
+        "dtype": dtype,
+        "bdata": b64encode(values.astype(f"<{dtype}").tobytes()).decode("ascii"),
+    }
+    if values.ndim > 1:
+        typed_array["shape"] = ", ".join(str(length) for length in values.shape)
+    return typed_array
+
+
+def encode_typed_arrays(figure: dict[str, Any]) -> None:
+    """Mutate a figure dict to send numerical trace arrays as base64 typed arrays.
+
+    Floats are sent with single precision, which is enough for display.
+    Does nothing if the plotly.js version of the app does not support them.
+    """
+    if not TYPED_ARRAYS_SUPPORTED:
+        return
+    for trace in figure["data"]:
+        for key, value in trace.items():
+            if isinstance(value, ndarray):
+                trace[key] = _to_typed_array(value)
+
+
+def _assign_changes(
+    patch: Patch, current: dict[str, Any], updated: dict[str, Any]
+) -> None:
+    for key, value in updated.items():
+        if current.get(key) != value:
+            patch[key] = value
+    for key in current.keys() - updated.keys():
+        del patch[key]
+
+
+def create_figure_patch(
+    current_figure: dict[str, Any], figure: dict[str, Any]
+) -> Patch:
+    """Create a patch that turns current_figure into figure.
+
+    Only trace and layout properties that changed are assigned,
+    e.g. the values and hover data after a change of the measure.
+    All traces are replaced if the figures do not have the same traces.
+    """
+    current_traces = current_figure.get("data", [])
+    patch = Patch()
+    if [(trace.get("type"), trace.get("name")) for trace in current_traces] == [
+        (trace.get("type"), trace.get("name")) for trace in figure["data"]
+    ]:
+        for index, (current_trace, trace) in enumerate(
+            zip(current_traces, figure["data"])
+        ):
+            _assign_changes(patch["data"][index], current_trace, trace)
+    else:
+        patch["data"] = figure["data"]
+    _assign_changes(patch["layout"], current_figure.get("layout", {}), figure["layout"])
+    return patch
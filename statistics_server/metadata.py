@@ -0,0 +1,104 @@
+"""Registry of the metadata of all variables and groupings."""
+
+from json import load
+from pathlib import Path
+from typing import Any
+
+from statistics_server.names import CATEGORICAL, NUMERICAL
+from statistics_server.types import VariableMetadata, VariableType
+
+GROUP_METADATA_FILE_NAME = "group_metadata.json"
+VARIABLE_METADATA_FILE_NAME = "meta.json"
+
+
+def _read_json(path: Path) -> Any:
+    with open(path, "r", encoding="utf-8") as file:
+        return load(file)
+
+
+def _filter_allowed_groups(
+    group_metadata: dict[str, VariableMetadata], variable_metadata: VariableMetadata
+) -> dict[str, VariableMetadata]:
+    groups = variable_metadata.get("groups")
+    if not groups:
+        return group_metadata
+    return {group: group_metadata[group] for group in groups if group in group_metadata}
+
+
+class MetadataRegistry:
+    """Index of the metadata of all variables below the statistics base path.
+
+    All metadata files are read once on creation.
+    Call refresh to pick up changed metadata, e.g. after a data release.
+    """
+
+    def __init__(self, base_path: Path) -> None:
+        self.base_path = base_path
+        self.version = 0
+        self.group_metadata: dict[str, VariableMetadata] = {}
+        self._variables: dict[tuple[str, str], VariableMetadata] = {}
+        self._allowed_groups: dict[tuple[str, str], dict[str, VariableMetadata]] = {}
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Reread all metadata files from disk."""
+        group_metadata_file = self.base_path.joinpath(GROUP_METADATA_FILE_NAME)
+        group_metadata: dict[str, VariableMetadata] = {}
+        if group_metadata_file.exists():
+            group_metadata = _read_json(group_metadata_file)
+        else:
+            print("ERROR: No group metadata file found.")
+
+        variables: dict[tuple[str, str], VariableMetadata] = {}
+        for variable_type in (CATEGORICAL, NUMERICAL):
+            variable_type_path = self.base_path.joinpath(variable_type)
+            for metadata_file in sorted(
+                variable_type_path.glob(f"*/{VARIABLE_METADATA_FILE_NAME}")
+            ):
+                variable_name = metadata_file.parent.name
+                variables[(variable_type, variable_name)] = _read_json(metadata_file)
+
+        allowed_groups = {
+            key: _filter_allowed_groups(group_metadata, variable_metadata)
+            for key, variable_metadata in variables.items()
+        }
+
+        # The index is built completely before the old one is replaced.
+        self.group_metadata = group_metadata
+        self._variables = variables
+        self._allowed_groups = allowed_groups
+        self.version += 1
+
+    def variables(self) -> list[tuple[VariableType, str]]:
+        """List all known variables as (variable_type, variable_name) pairs."""
+        return list(self._variables.keys())  # type: ignore[arg-type]
+
+    def get_variable_metadata(
+        self, variable_type: VariableType, variable_name: str
+    ) -> VariableMetadata:
+        try:
+            return self._variables[(variable_type, variable_name)]
+        except KeyError as error:
+            raise RuntimeError("Non-existent variable selected.") from error
+
+    def get_allowed_groups(
+        self, variable_type: VariableType, variable_name: str
+    ) -> dict[str, VariableMetadata]:
+        """Get the metadata of all groups the variable can be grouped by."""
+        try:
+            return self._allowed_groups[(variable_type, variable_name)]
+        except KeyError as error:
+            raise RuntimeError("Non-existent variable selected.") from error
+
+    def get_label_metadata(
+        self, variable_type: VariableType, variable_name: str, grouping: list[str]
+    ) -> list[VariableMetadata]:
+        """Get the value label metadata of all labeled columns of a grouping."""
+        label_metadata = []
+        if variable_type == CATEGORICAL:
+            label_metadata.append(
+                self.get_variable_metadata(variable_type, variable_name)
+            )
+        for group in grouping:
+            label_metadata.append(self.group_metadata[group])
+        return label_metadata
@@ -1,7 +1,9 @@
 """Central location for important reoccurring string values."""
 
 CATEGORICAL = "categorical"
+CONFIDENCE = "confidence"
 MEAN = "mean"
 MEDIAN = "median"
+NUMERICAL = "numerical"
 PROPORTION = "proportion"
 YEAR = "year"
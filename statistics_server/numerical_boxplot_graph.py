@@ -2,13 +2,18 @@
 
 # %%
 from collections import deque
-from typing import Generator
+from typing import Any
 
 from pandas import DataFrame, read_csv
 from pandas.core.groupby.generic import DataFrameGroupBy
 from plotly import graph_objects
 
-from statistics_server.layout import get_colors_from_palette, style_numeric_figure
+from statistics_server.layout import (
+    create_figure_dict,
+    get_colors_from_palette,
+    style_numeric_figure,
+    style_numeric_figure_dict,
+)
 from statistics_server.simple_graph import visibility_handler
 from statistics_server.types import BoxPlotGenerator, EmptyIterator, SingleGroupIterator
 
@@ -16,7 +21,8 @@ from statistics_server.types import BoxPlotGenerator, EmptyIterator, SingleGroup
 def create_boxplot_traces(
     groups: DataFrameGroupBy | SingleGroupIterator,
     trace_visibility: dict[str, str | bool],
-) -> Generator[graph_objects.Box, None, None]:
+    validate: bool = True,
+) -> BoxPlotGenerator:
     color_palette = get_colors_from_palette()
     _visibility_handler = visibility_handler(trace_visibility)
     for grouped_by, grouped_data in groups:
@@ -25,17 +31,19 @@ def create_boxplot_traces(
         next(_visibility_handler)
         visible = _visibility_handler.send(group_key)
 
-        yield graph_objects.Box(
-            x=grouped_data["year"],
-            q1=grouped_data["lower_quartile"],
-            median=grouped_data["boxplot_median"],
-            q3=grouped_data["upper_quartile"],
-            lowerfence=grouped_data["lower_whisker"],
-            upperfence=grouped_data["upper_whisker"],
+        trace = dict(
+            type="box",
+            x=grouped_data["year"].to_numpy(),
+            q1=grouped_data["lower_quartile"].to_numpy(),
+            median=grouped_data["boxplot_median"].to_numpy(),
+            q3=grouped_data["upper_quartile"].to_numpy(),
+            lowerfence=grouped_data["lower_whisker"].to_numpy(),
+            upperfence=grouped_data["upper_whisker"].to_numpy(),
             name=" ".join(grouped_by),
-            marker_color=next(color_palette),
+            marker={"color": next(color_palette)},
             visible=visible,
         )
+        yield graph_objects.Box(trace) if validate else trace
 
 
 def create_numerical_boxplot_figure(
@@ -44,27 +52,41 @@ def create_numerical_boxplot_figure(
     y_title: str = "",
     show_legend: bool = True,
     trace_visibility: dict[str, str | bool] = {},
-) -> graph_objects.Figure:
+    validate: bool = True,
+) -> graph_objects.Figure | dict[str, Any]:
 
     start_year = dataframe["year"].min()
     end_year = dataframe["year"].max()
 
     traces: EmptyIterator | BoxPlotGenerator = EmptyIterator()
     if groups:
-        traces = create_boxplot_traces(dataframe.groupby(groups), trace_visibility)
+        traces = create_boxplot_traces(
+            dataframe.groupby(groups), trace_visibility, validate=validate
+        )
     if not groups:
-        traces = create_boxplot_traces([((" ",), dataframe)], trace_visibility)
-
-    figure = graph_objects.Figure(list(deque(traces)))
+        traces = create_boxplot_traces(
+            [((" ",), dataframe)], trace_visibility, validate=validate
+        )
 
-    style_numeric_figure(
-        figure=figure,
+    styling = dict(
         start_year=start_year,
         end_year=end_year,
         y_max=dataframe["upper_whisker"].max(),
         plot_type="box",
     )
 
+    if not validate:
+        figure_dict = create_figure_dict(list(deque(traces)))
+        style_numeric_figure_dict(figure_dict, **styling)
+        figure_dict["layout"]["yaxis"]["title"] = {"text": y_title}
+        figure_dict["layout"]["boxmode"] = "group"
+        figure_dict["layout"]["showlegend"] = show_legend
+        return figure_dict
+
+    figure = graph_objects.Figure(list(deque(traces)))
+
+    style_numeric_figure(figure=figure, **styling)
+
     figure.update_layout(
         yaxis_title=y_title,
         boxmode="group",  # group together boxes of the different traces for each value of x
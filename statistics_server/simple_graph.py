@@ -7,19 +7,23 @@
 # %%
 
 from collections import deque
-from typing import Generator, Literal
+from typing import Any, Generator, Literal
 
-from pandas import DataFrame, Series, read_csv
+from numpy import ndarray
+from pandas import DataFrame, read_csv
 from pandas.core.groupby.generic import DataFrameGroupBy
 from plotly import graph_objects
 
 from statistics_server.language_handling import MEASURE_TRANSLATION, YEAR_TRANSLATION
 from statistics_server.layout import (
     PLOT_LANGUAGE_LABELS,
+    create_figure_dict,
     get_colors_from_palette,
     get_line_types,
     style_numeric_figure,
+    style_numeric_figure_dict,
 )
+from statistics_server.names import CONFIDENCE
 from statistics_server.types import (
     BarPlotGenerator,
     EmptyGraphIterator,
@@ -66,6 +70,7 @@ def create_traces(
     plot_type: PlotType = "line",
     trace_visibility: dict[str, str | bool] = {},
     language: Literal["en"] | Literal["de"] = "en",
+    validate: bool = True,
 ) -> tuple[
     ScatterPlotGenerator | BarPlotGenerator, ScatterPlotGenerator | EmptyGraphIterator
 ]:
@@ -73,49 +78,63 @@ def create_traces(
     main_traces: ScatterPlotGenerator | BarPlotGenerator
 
     if plot_type == "bar":
-        main_traces = create_main_trace_bar(groups, measure=measure, language=language)
+        main_traces = create_main_trace_bar(
+            groups, measure=measure, language=language, validate=validate
+        )
     else:
         main_traces = create_main_trace(
             groups,
             measure=measure,
             trace_visibility=trace_visibility,
             language=language,
+            validate=validate,
         )
     confidence_traces: ScatterPlotGenerator | EmptyGraphIterator = EmptyGraphIterator()
     if show_confidence:
         confidence_traces = create_confidence_trace_pairs(
-            groups, measure=measure, trace_visibility=trace_visibility
+            groups,
+            measure=measure,
+            trace_visibility=trace_visibility,
+            validate=validate,
         )
 
     return main_traces, confidence_traces
 
 
-def numerical_tooltip_formatting(
-    n: Series,
-    lower_confidence: Series,
-    upper_confidence: Series,
+def get_tooltip_data(grouped_data: DataFrame, measure: Measure = "mean") -> ndarray:
+    """Collect the columns shown in tooltips as customdata of a trace."""
+    return grouped_data[
+        ["n", f"{measure}_lower_confidence", f"{measure}_upper_confidence"]
+    ].to_numpy()
+
+
+def create_hovertemplate(
     measure: Measure = "mean",
-    language: str = "en",
-) -> Generator[str, None, None]:
+    language: Literal["en"] | Literal["de"] = "en",
+    value_format: str | None = None,
+) -> str:
+    """Create the tooltip template for traces with customdata from get_tooltip_data.
+
+    Plotly fills in and formats the values in the browser,
+    so no tooltip texts have to be created and sent along with the figure.
+    """
     labels = PLOT_LANGUAGE_LABELS[language]
-    for _n, lower, upper in zip(n, lower_confidence, upper_confidence):
-        if measure == "proportion":
-            yield (
-                f"N: {_n}"
-                "<br>"
-                f"{labels['lower_confidence']}: {lower:.2%}"
-                "<br>"
-                f"{labels['upper_confidence']}: {upper:.2%}"
-            )
-            continue
-
-        yield (
-            f"N: {_n}"
-            "<br>"
-            f"{labels['lower_confidence']}: {lower:.2f}"
-            "<br>"
-            f"{labels['upper_confidence']}: {upper:.2f}"
-        )
+    confidence_format = ".2f"
+    if measure == "proportion":
+        confidence_format = ".2%"
+    if value_format is None:
+        value_format = confidence_format
+    return (
+        f"{YEAR_TRANSLATION[language]}: %{{x}}"
+        "<br>"
+        f"{MEASURE_TRANSLATION[language][measure.lower()]}: %{{y:{value_format}}}"
+        "<br>"
+        "N: %{customdata[0]}"
+        "<br>"
+        f"{labels['lower_confidence']}: %{{customdata[1]:{confidence_format}}}"
+        "<br>"
+        f"{labels['upper_confidence']}: %{{customdata[2]:{confidence_format}}}"
+    )
 
 
 def create_main_trace_bar(
@@ -123,10 +142,11 @@ def create_main_trace_bar(
     measure: Measure = "proportion",
     trace_visibility: dict["str", "str"] = {},
     language: Literal["en"] | Literal["de"] = "en",
+    validate: bool = True,
 ) -> BarPlotGenerator:
     """Create lines for all groups in a line graph"""
     color_palette = get_colors_from_palette()
-    measure_formatter = ": %{y:.2%}<br>%{text}"
+    hovertemplate = create_hovertemplate(measure, language, value_format=".2%")
 
     group_color_map = {}
 
@@ -136,31 +156,21 @@ def create_main_trace_bar(
             group_color_map[grouped_by[-1]] = next(color_palette)
             show_legend = True
 
-        yield graph_objects.Bar(
+        trace = dict(
+            type="bar",
             name=grouped_by[-1],
             x=[
-                grouped_data["year"],
+                grouped_data["year"].to_numpy(),
                 [grouped_by[:-1]] * len(grouped_data["year"]),
             ],
-            y=grouped_data[measure],
-            text=list(
-                numerical_tooltip_formatting(
-                    grouped_data["n"],
-                    grouped_data[f"{measure}_lower_confidence"],
-                    grouped_data[f"{measure}_upper_confidence"],
-                    measure=measure,
-                    language=language,
-                )
-            ),
-            hovertemplate=YEAR_TRANSLATION[language]
-            + ": %{x}<br>"
-            + MEASURE_TRANSLATION[language][measure.lower()]
-            + measure_formatter,
-            textposition="none",
-            marker_color=group_color_map[grouped_by[-1]],
+            y=grouped_data[measure].to_numpy(),
+            customdata=get_tooltip_data(grouped_data, measure),
+            hovertemplate=hovertemplate,
+            marker={"color": group_color_map[grouped_by[-1]]},
             legendgroup=grouped_by[-1],
             showlegend=show_legend,
         )
+        yield graph_objects.Bar(trace) if validate else trace
     del color_palette
 
 
@@ -169,13 +179,15 @@ def create_main_trace(
     measure: Measure = "mean",
     trace_visibility: dict[str, str | bool] = {},
     language: Literal["en"] | Literal["de"] = "en",
+    validate: bool = True,
 ) -> ScatterPlotGenerator:
-    """Create lines for all groups in a line graph"""
+    """Create lines for all groups in a line graph
+
+    Without validation plain trace dicts are created instead of Scatter objects.
+    """
     color_palette = get_colors_from_palette()
     line_types = get_line_types()
-    measure_formatter = ": %{y:.2f}<br>%{text}"
-    if measure == "proportion":
-        measure_formatter = ": %{y:.2%}<br>%{text}"
+    hovertemplate = create_hovertemplate(measure, language)
 
     _visibility_handler = visibility_handler(trace_visibility)
 
@@ -184,29 +196,20 @@ def create_main_trace(
         next(_visibility_handler)
         visible = _visibility_handler.send(group_key)
 
-        yield graph_objects.Scatter(
+        trace = dict(
+            type="scatter",
             name=group_key,
-            x=grouped_data["year"],
-            y=grouped_data[measure],
-            text=list(
-                numerical_tooltip_formatting(
-                    grouped_data["n"],
-                    grouped_data[f"{measure}_lower_confidence"],
-                    grouped_data[f"{measure}_upper_confidence"],
-                    measure=measure,
-                    language=language,
-                )
-            ),
+            x=grouped_data["year"].to_numpy(),
+            y=grouped_data[measure].to_numpy(),
+            customdata=get_tooltip_data(grouped_data, measure),
             mode="lines+markers",
             line={"color": next(color_palette), "dash": next(line_types)},
             marker={"size": 5, "line": {"width": 2}},
-            hovertemplate=YEAR_TRANSLATION[language]
-            + ": %{x}<br>"
-            + MEASURE_TRANSLATION[language][measure.lower()]
-            + measure_formatter,
+            hovertemplate=hovertemplate,
             legendgroup=group_key,
             visible=visible,
         )
+        yield graph_objects.Scatter(trace) if validate else trace
     del _visibility_handler
     del color_palette
 
@@ -215,6 +218,7 @@ def create_confidence_trace_pairs(
     groups: DataFrameGroupBy | EmptyIterator | SingleGroupIterator,
     measure: Measure = "mean",
     trace_visibility: dict[str, str | bool] = {},
+    validate: bool = True,
 ) -> ScatterPlotGenerator:
     """Creates a trace for the upper and lower confidence interval bounds."""
     _visibility_handler = visibility_handler(trace_visibility)
@@ -223,10 +227,11 @@ def create_confidence_trace_pairs(
         next(_visibility_handler)
         visible = _visibility_handler.send(group_key)
 
-        yield graph_objects.Scatter(
+        upper_trace = dict(
+            type="scatter",
             name=group_key,
-            x=grouped_data["year"],
-            y=grouped_data[f"{measure}_upper_confidence"],
+            x=grouped_data["year"].to_numpy(),
+            y=grouped_data[f"{measure}_upper_confidence"].to_numpy(),
             mode="lines",
             marker={"color": "#444"},
             line={"width": 0},
@@ -234,12 +239,15 @@ def create_confidence_trace_pairs(
             hoverinfo="skip",
             legendgroup=group_key,
             visible=visible,
+            meta=CONFIDENCE,
         )
+        yield graph_objects.Scatter(upper_trace) if validate else upper_trace
 
-        yield graph_objects.Scatter(
+        lower_trace = dict(
+            type="scatter",
             name=group_key,
-            x=grouped_data["year"],
-            y=grouped_data[f"{measure}_lower_confidence"],
+            x=grouped_data["year"].to_numpy(),
+            y=grouped_data[f"{measure}_lower_confidence"].to_numpy(),
             marker={"color": "#444"},
             line={"width": 0},
             mode="lines",
@@ -249,10 +257,34 @@ def create_confidence_trace_pairs(
             hoverinfo="skip",
             legendgroup=group_key,
             visible=visible,
+            meta=CONFIDENCE,
         )
+        yield graph_objects.Scatter(lower_trace) if validate else lower_trace
     del _visibility_handler
 
 
+def apply_display_options(
+    figure: dict[str, Any], show_confidence: bool, show_legend: bool
+) -> None:
+    """Mutate a figure dict to show or hide confidence intervals and the legend.
+
+    Hidden confidence traces are set invisible instead of being removed,
+    so the options can be toggled in the browser without a new figure.
+    assets/displayOptions.mjs does the same on the client side.
+    """
+    trace_visibility = {
+        trace["name"]: trace.get("visible", True)
+        for trace in figure["data"]
+        if trace.get("meta") != CONFIDENCE
+    }
+    for trace in figure["data"]:
+        if trace.get("meta") == CONFIDENCE:
+            trace["visible"] = show_confidence and trace_visibility.get(
+                trace["name"], True
+            )
+    figure["layout"].setdefault("legend", {})["visible"] = show_legend
+
+
 def create_line_graph_figure(
     dataframe: DataFrame,
     group: list[str] | None = None,
@@ -261,9 +293,16 @@ def create_line_graph_figure(
     measure: Measure = "mean",
     trace_visibility: dict[str, str | bool] = {},
     language: Literal["en"] | Literal["de"] = "en",
-) -> graph_objects.Figure:
-    """Assemble figure for a numerical time series statistic"""
-    main_traces: EmptyIterator | ScatterPlotGenerator | BarPlotGenerator = EmptyIterator()
+    validate: bool = True,
+) -> graph_objects.Figure | dict[str, Any]:
+    """Assemble figure for a numerical time series statistic
+
+    Without validation a plain figure dict is returned,
+    which is a lot faster to create for many groups.
+    """
+    main_traces: EmptyIterator | ScatterPlotGenerator | BarPlotGenerator = (
+        EmptyIterator()
+    )
     confidence_traces: EmptyGraphIterator | ScatterPlotGenerator = EmptyGraphIterator()
     if not group:
         # Make a single DataFrame iterable like a groupby result.
@@ -275,12 +314,14 @@ def create_line_graph_figure(
             measure=measure,
             trace_visibility=trace_visibility,
             language=language,
+            validate=validate,
         )
         if show_confidence:
             confidence_traces = create_confidence_trace_pairs(
                 dataframe_like_a_groupby,
                 measure=measure,
                 trace_visibility=trace_visibility,
+                validate=validate,
             )
 
     if group:
@@ -291,16 +332,12 @@ def create_line_graph_figure(
             measure=measure,
             trace_visibility=trace_visibility,
             language=language,
+            validate=validate,
         )
     traces = deque(main_traces)
     traces.extend(confidence_traces)
 
-    figure = graph_objects.Figure(list(traces))
-    if not show_legend:
-        figure.update_layout(showlegend=False)
-
-    style_numeric_figure(
-        figure=figure,
+    styling = dict(
         start_year=dataframe[~dataframe[measure].isna()]["year"].min(),
         end_year=dataframe[~dataframe[measure].isna()]["year"].max(),
         y_max=dataframe[measure].max(),
@@ -308,6 +345,19 @@ def create_line_graph_figure(
         measure=measure,
     )
 
+    if not validate:
+        figure_dict = create_figure_dict(list(traces))
+        if not show_legend:
+            figure_dict["layout"]["showlegend"] = False
+        style_numeric_figure_dict(figure_dict, **styling)
+        return figure_dict
+
+    figure = graph_objects.Figure(list(traces))
+    if not show_legend:
+        figure.update_layout(showlegend=False)
+
+    style_numeric_figure(figure=figure, **styling)
+
     return figure
 
 
@@ -317,7 +367,8 @@ def create_bar_graph_figure(
     show_legend: bool = True,
     measure: Measure = "mean",
     language: Literal["en"] | Literal["de"] = "en",
-) -> graph_objects.Figure:
+    validate: bool = True,
+) -> graph_objects.Figure | dict[str, Any]:
     """Assemble figure for a numerical time series statistic"""
     main_traces: BarPlotGenerator | ScatterPlotGenerator
     confidence_traces: EmptyGraphIterator | ScatterPlotGenerator = EmptyGraphIterator()
@@ -327,28 +378,42 @@ def create_bar_graph_figure(
         # because plotly will not group traces otherwise
         dataframe_like_a_groupby: SingleGroupIterator = [((" ",), dataframe)]
         main_traces = create_main_trace_bar(
-            dataframe_like_a_groupby, measure=measure, language=language
+            dataframe_like_a_groupby,
+            measure=measure,
+            language=language,
+            validate=validate,
         )
 
     if group:
         main_traces, confidence_traces = create_traces(
-            dataframe, group, show_confidence=False, measure=measure, plot_type="bar"
+            dataframe,
+            group,
+            show_confidence=False,
+            measure=measure,
+            plot_type="bar",
+            validate=validate,
         )
     traces = deque(main_traces)
     traces.extend(confidence_traces)
 
-    figure = graph_objects.Figure(list(traces))
-
-    figure.update_layout(showlegend=False)
-
-    style_numeric_figure(
-        figure=figure,
+    styling = dict(
         start_year=dataframe["year"].min(),
         end_year=dataframe["year"].max(),
         y_max=dataframe[measure].max(),
         plot_type="bar",
         measure=measure,
     )
+
+    if not validate:
+        figure_dict = create_figure_dict(list(traces), layout={"showlegend": False})
+        style_numeric_figure_dict(figure_dict, **styling)
+        return figure_dict
+
+    figure = graph_objects.Figure(list(traces))
+
+    figure.update_layout(showlegend=False)
+
+    style_numeric_figure(figure=figure, **styling)
     # figure.update_layout(xaxis={"showticklabels": False})
     # figure.update_layout(show_legend={"showticklabels": False})
 
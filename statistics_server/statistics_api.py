@@ -0,0 +1,173 @@
+"""Selection and serialization of statistics for the bulk statistics API.
+
+The API sends the pre-calculated statistics of many variables and groupings
+in one request as JSON, CSV or an Arrow IPC stream,
+so they do not have to be collected through the dashboard.
+"""
+
+from io import BytesIO
+from json import dumps
+from os import getenv
+from typing import Any, Iterable, Iterator, get_args
+
+from pandas import DataFrame, concat
+
+from statistics_server.names import CATEGORICAL, YEAR
+from statistics_server.types import VariableType
+
+try:
+    import pyarrow
+    from pyarrow import ipc
+except ImportError:  # pragma: no cover
+    pyarrow = None  # type: ignore[assignment]
+
+API_FORMATS = ("json", "csv", "arrow")
+API_MAX_SELECTIONS = int(getenv("API_MAX_SELECTIONS", "100"))
+ARROW_BATCH_ROWS = 64 * 1024
+SELECTION_SEPARATOR = ":"
+GROUP_SEPARATOR = ","
+
+type Selection = tuple[VariableType, str, list[str]]
+
+
+def parse_selection(selection: str) -> Selection:
+    """Parse a selection like numerical:years_injob:sex,age_gr.
+
+    The groups are optional.
+    """
+    parts = selection.split(SELECTION_SEPARATOR)
+    if len(parts) not in (2, 3) or parts[0] not in get_args(VariableType.__value__):
+        raise RuntimeError(f"Incorrect selection {selection}.")
+    groups = parts[2].split(GROUP_SEPARATOR) if len(parts) == 3 else []
+    if len(groups) > 2 or not all(groups):
+        raise RuntimeError(f"Incorrect selection {selection}.")
+    return parts[0], parts[1], groups  # type: ignore[return-value]
+
+
+def parse_year(year: str | None) -> int | None:
+    if year is None:
+        return None
+    try:
+        return int(year)
+    except ValueError as error:
+        raise RuntimeError("Years have to be integers.") from error
+
+
+def get_key_columns(
+    variable_type: VariableType, variable_name: str, grouping: list[str]
+) -> list[str]:
+    """List the columns that identify the rows of the statistics of a grouping."""
+    key_columns = [YEAR, *grouping]
+    if variable_type == CATEGORICAL:
+        key_columns.append(variable_name)
+    return key_columns
+
+
+def select_statistics(
+    data: DataFrame,
+    key_columns: list[str],
+    columns: Iterable[str] | None = None,
+    start_year: int | None = None,
+    end_year: int | None = None,
+) -> DataFrame:
+    """Select the rows of a year range and the given columns besides the key columns.
+
+    Columns the statistics do not have are skipped,
+    as statistics of different variable types have different columns.
+    """
+    if columns is None:
+        selected_columns = list(data.columns)
+    else:
+        selected_columns = [
+            *key_columns,
+            *(
+                column
+                for column in columns
+                if column in data.columns and column not in key_columns
+            ),
+        ]
+    rows = data[YEAR].between(
+        start_year if start_year is not None else data[YEAR].min(),
+        end_year if end_year is not None else data[YEAR].max(),
+    )
+    return data.loc[rows, selected_columns]
+
+
+def check_columns(
+    statistics: list[tuple[Selection, DataFrame]], columns: Iterable[str] | None
+) -> None:
+    """Raise if a requested column is in the statistics of no selection."""
+    if columns is None:
+        return
+    unknown_columns = set(columns).difference(*(data.columns for _, data in statistics))
+    if unknown_columns:
+        raise RuntimeError(f"Non-existent columns {sorted(unknown_columns)}.")
+
+
+def statistics_to_json(statistics: list[tuple[Selection, DataFrame]]) -> str:
+    """Serialize the statistics of all selections with their columns and rows.
+
+    Missing values are sent as null.
+    """
+    return dumps(
+        {
+            "statistics": [
+                {
+                    "type": variable_type,
+                    "variable": variable_name,
+                    "grouping": grouping,
+                    "data": _to_split_dict(data),
+                }
+                for (variable_type, variable_name, grouping), data in statistics
+            ]
+        },
+        allow_nan=False,
+    )
+
+
+def _to_split_dict(data: DataFrame) -> dict[str, list[Any]]:
+    return (
+        data.astype(object)
+        .where(data.notna(), None)
+        .to_dict(orient="split", index=False)
+    )
+
+
+def combine_statistics(statistics: list[tuple[Selection, DataFrame]]) -> DataFrame:
+    """Combine the statistics of all selections into one table.
+
+    The type and name of the variable and the groups of the grouping,
+    comma separated, are added as columns.
+    Columns that a selection does not have are empty.
+    """
+    return concat(
+        [
+            data.assign(
+                variable_type=variable_type,
+                variable=variable_name,
+                grouping=GROUP_SEPARATOR.join(grouping),
+            )
+            for (variable_type, variable_name, grouping), data in statistics
+        ],
+        ignore_index=True,
+    )
+
+
+def iter_arrow_stream(data: DataFrame) -> Iterator[bytes]:
+    """Serialize data as Arrow IPC stream, yielding it batch by batch."""
+    if pyarrow is None:
+        raise RuntimeError("Arrow output requires pyarrow.")
+    table = pyarrow.Table.from_pandas(data, preserve_index=False)
+    sink = BytesIO()
+    with ipc.new_stream(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=ARROW_BATCH_ROWS):
+            writer.write_batch(batch)
+            yield _drain(sink)
+    yield _drain(sink)
+
+
+def _drain(sink: BytesIO) -> bytes:
+    content = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return content
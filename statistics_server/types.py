@@ -1,15 +1,17 @@
-from typing import Generator, Iterable, Literal, Self, TypedDict
+from typing import Any, Generator, Iterable, Literal, Self, TypedDict
 
 from pandas import DataFrame
 from plotly.graph_objects import Bar, Box, Scatter
 
-type BarPlotGenerator = Generator[Bar, None, None]
-type BoxPlotGenerator = Generator[Box, None, None]
+type TraceDict = dict[str, Any]
+type BarPlotGenerator = Generator[Bar | TraceDict, None, None]
+type BoxPlotGenerator = Generator[Box | TraceDict, None, None]
 type Measure = Literal["mean", "median", "proportion"]
 type PlotType = Literal["line", "box", "bar"]
-type ScatterPlotGenerator = Generator[Scatter, None, None]
+type ScatterPlotGenerator = Generator[Scatter | TraceDict, None, None]
 type VariableType = Literal["categorical", "numerical", "numerical"]
 type LanguageCode = Literal["en", "de"]
+type CategoryLabels = dict[str, dict[LanguageCode, list[str]]]
 
 
 class EmptyIterator:
@@ -44,6 +46,7 @@ class PlotlyLabeledOption(TypedDict):
 
 class VariableMetadata(TypedDict):
 
+    title: str
     label: str
     label_de: str
     variable: str
@@ -0,0 +1,5 @@
+from os import environ
+
+environ.setdefault("UI_TRANSLATIONS_PATH", "./tests/test_data/ui_translations.yaml")
+# Tests start the renderers they need themselves.
+environ.setdefault("IMAGE_RENDERER_START", "lazy")
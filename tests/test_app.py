@@ -0,0 +1,322 @@
+from io import StringIO
+from os import environ, utime
+from pathlib import Path
+from shutil import copy
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from pandas import read_csv
+from pyarrow import ipc
+
+environ.setdefault("UI_TRANSLATIONS_PATH", "./tests/test_data/ui_translations.yaml")
+environ.setdefault("STATISTICS_BASE_PATH", "./tests/test_data")
+
+from statistics_server.app import (  # noqa: E402
+    FIGURE_PATCH_PATH,
+    FIGURE_PATH,
+    STATISTICS_API_PATH,
+    app,
+    control_panel_cache,
+    create_control_panel,
+    create_figure,
+    create_figure_json,
+    data_cache,
+    figure_cache,
+    get_control_panel,
+    metadata_registry,
+    read_labeled_data,
+    read_prepared_statistics,
+    serve_layout,
+    server,
+)
+
+PAGE_URL = "http://localhost/?type=numerical&variable=years_injob&language=en"
+VIEW_QUERY = "type=numerical&variable=years_injob&language=en&first-group=sex"
+API_QUERY = "select=numerical:years_injob:sex&select=categorical:chronill"
+
+
+class TestServeLayout(TestCase):
+
+    def test_view_of_the_page_is_inline(self):
+        with server.test_request_context(headers={"Referer": PAGE_URL}):
+            layout = serve_layout()
+        self.assertEqual(
+            "?type=numerical&variable=years_injob&language=en",
+            layout["rendered-search"].data,
+        )
+
+    def test_missing_data_falls_back_to_callbacks(self):
+        with (
+            patch(
+                "statistics_server.app._get_data_file_path",
+                return_value=Path("./tests/test_data/missing.csv"),
+            ),
+            server.test_request_context(headers={"Referer": PAGE_URL}),
+        ):
+            layout = serve_layout()
+        self.assertIsNone(getattr(layout["rendered-search"], "data", None))
+
+    def test_unsupported_language_falls_back_to_callbacks(self):
+        response = server.test_client().get(
+            f"{app.config.routes_pathname_prefix}_dash-layout",
+            headers={"Referer": PAGE_URL.replace("language=en", "language=fr")},
+        )
+        self.assertEqual(200, response.status_code)
+        self.assertNotIn('"id":"rendered-search","data"', response.text)
+
+    def test_layout_varies_by_referrer(self):
+        response = server.test_client().get(
+            f"{app.config.routes_pathname_prefix}_dash-layout",
+            headers={"Referer": PAGE_URL},
+        )
+        self.assertEqual(200, response.status_code)
+        self.assertIn("Referer", response.headers["Vary"])
+
+
+class TestControlPanelCache(TestCase):
+
+    def setUp(self):
+        control_panel_cache.clear()
+        patcher = patch(
+            "statistics_server.app.create_control_panel", wraps=create_control_panel
+        )
+        self.create = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_control_panel_is_created_once(self):
+        control_panel = get_control_panel("numerical", "years_injob", "en")
+        hits = control_panel_cache.hits
+        self.assertIs(
+            control_panel, get_control_panel("numerical", "years_injob", "en")
+        )
+        self.assertEqual(1, self.create.call_count)
+        self.assertEqual(hits + 1, control_panel_cache.hits)
+
+    def test_boxplot_flag_is_part_of_the_key(self):
+        control_panel = get_control_panel("numerical", "years_injob", "en", "show")
+        self.assertIsNot(
+            control_panel, get_control_panel("numerical", "years_injob", "en", "hide")
+        )
+        get_control_panel("numerical", "years_injob", "de", "show")
+        self.assertEqual(3, self.create.call_count)
+
+    def test_refreshed_metadata_invalidates_control_panels(self):
+        get_control_panel("numerical", "years_injob", "en")
+        metadata_registry.refresh()
+        get_control_panel("numerical", "years_injob", "en")
+        self.assertEqual(2, self.create.call_count)
+
+
+class DataFileTestCase(TestCase):
+    """Reads the statistics of years_injob by sex from a copy of the file."""
+
+    def setUp(self):
+        self._temporary_directory = TemporaryDirectory()
+        self.addCleanup(self._temporary_directory.cleanup)
+        self.data_file = Path(self._temporary_directory.name).joinpath(
+            "years_injob_year_sex.csv"
+        )
+        copy(
+            "./tests/test_data/numerical/years_injob/years_injob_year_sex.csv",
+            self.data_file,
+        )
+        patcher = patch(
+            "statistics_server.app._get_data_file_path", return_value=self.data_file
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestDataCache(DataFileTestCase):
+
+    def setUp(self):
+        super().setUp()
+        data_cache.clear()
+        patcher = patch(
+            "statistics_server.app.read_prepared_statistics",
+            wraps=read_prepared_statistics,
+        )
+        self.read = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_data_is_read_once(self):
+        read_labeled_data("numerical", "years_injob", ["sex"], "en")
+        hits = data_cache.hits
+        data = read_labeled_data("numerical", "years_injob", ["sex"], "de")
+        self.assertEqual(1, self.read.call_count)
+        self.assertEqual(hits + 1, data_cache.hits)
+        self.assertIn("weiblich", set(data["sex"]))
+
+    def test_changed_data_file_is_read_again(self):
+        read_labeled_data("numerical", "years_injob", ["sex"], "en")
+        utime(self.data_file, ns=(0, 0))
+        read_labeled_data("numerical", "years_injob", ["sex"], "en")
+        self.assertEqual(2, self.read.call_count)
+
+
+class TestFigureCache(DataFileTestCase):
+
+    def setUp(self):
+        super().setUp()
+        figure_cache.clear()
+        patcher = patch("statistics_server.app.create_figure", wraps=create_figure)
+        self.create = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _create_figure_json(self):
+        return create_figure_json(
+            "numerical", "years_injob", ["sex"], "mean", False, False, "en"
+        )
+
+    def test_figure_is_created_once(self):
+        figure = self._create_figure_json()
+        hits = figure_cache.hits
+        self.assertIs(figure, self._create_figure_json())
+        self.assertEqual(1, self.create.call_count)
+        self.assertEqual(hits + 1, figure_cache.hits)
+
+    def test_changed_data_file_creates_new_figure(self):
+        self._create_figure_json()
+        utime(self.data_file, ns=(0, 0))
+        self._create_figure_json()
+        self.assertEqual(2, self.create.call_count)
+
+    def test_refreshed_metadata_creates_new_figure(self):
+        self._create_figure_json()
+        metadata_registry.refresh()
+        self._create_figure_json()
+        self.assertEqual(2, self.create.call_count)
+
+
+class TestSendFigure(TestCase):
+
+    def setUp(self):
+        self.client = server.test_client()
+
+    def test_figure(self):
+        response = self.client.get(f"{FIGURE_PATH}?{VIEW_QUERY}&measure=mean")
+        self.assertEqual(200, response.status_code)
+        self.assertIn("data", response.get_json())
+        self.assertIn("public", response.headers["Cache-Control"])
+        etag, _ = response.get_etag()
+        for if_none_match in (f'"{etag}"', f'W/"{etag}"'):
+            response = self.client.get(
+                f"{FIGURE_PATH}?{VIEW_QUERY}&measure=mean",
+                headers={"If-None-Match": if_none_match},
+            )
+            self.assertEqual(304, response.status_code, if_none_match)
+            self.assertEqual(b"", response.data)
+
+    def test_incorrect_queries(self):
+        for query in (
+            f"{VIEW_QUERY}&measure=proportion",
+            f"{VIEW_QUERY}&measure=mode",
+            f"{VIEW_QUERY}&plot=pie",
+            f"{VIEW_QUERY}&second-group=missing",
+            "type=numerical&variable=years_injob&language=fr",
+            "type=ordinal&variable=years_injob",
+            "variable=years_injob",
+        ):
+            response = self.client.get(f"{FIGURE_PATH}?{query}")
+            self.assertEqual(400, response.status_code, query)
+
+    def test_patch(self):
+        query = f"{VIEW_QUERY}&measure=median&base-measure=mean"
+        response = self.client.get(f"{FIGURE_PATCH_PATH}?{query}")
+        self.assertEqual(200, response.status_code)
+        operations = {
+            tuple(operation["location"]): operation for operation in response.get_json()
+        }
+        figure = self.client.get(f"{FIGURE_PATH}?{VIEW_QUERY}&measure=median")
+        self.assertEqual(
+            figure.get_json()["data"][0]["y"],
+            operations["data", 0, "y"]["params"]["value"],
+        )
+        response = self.client.get(
+            f"{FIGURE_PATCH_PATH}?{query}",
+            headers={"If-None-Match": response.headers["ETag"]},
+        )
+        self.assertEqual(304, response.status_code)
+        for base_measure in ("proportion", "mode"):
+            response = self.client.get(
+                f"{FIGURE_PATCH_PATH}?{VIEW_QUERY}&base-measure={base_measure}"
+            )
+            self.assertEqual(400, response.status_code, base_measure)
+
+
+class TestSendStatistics(TestCase):
+
+    def setUp(self):
+        self.client = server.test_client()
+
+    def test_json(self):
+        response = self.client.get(f"{STATISTICS_API_PATH}?{API_QUERY}&from=2010")
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("application/json", response.mimetype)
+        statistics = response.get_json()["statistics"]
+        self.assertEqual(
+            [["sex"], []], [selection["grouping"] for selection in statistics]
+        )
+        for selection in statistics:
+            year = selection["data"]["columns"].index("year")
+            self.assertGreaterEqual(
+                min(row[year] for row in selection["data"]["data"]), 2010
+            )
+
+    def test_csv(self):
+        response = self.client.get(
+            f"{STATISTICS_API_PATH}?{API_QUERY}&columns=mean,proportion&format=csv"
+        )
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("text/csv", response.mimetype)
+        data = read_csv(StringIO(response.text), keep_default_na=False)
+        self.assertEqual({"sex", ""}, set(data["grouping"]))
+        self.assertIn("mean", data.columns)
+        self.assertIn("proportion", data.columns)
+        self.assertNotIn("n", data.columns)
+
+    def test_arrow(self):
+        response = self.client.get(f"{STATISTICS_API_PATH}?{API_QUERY}&format=arrow")
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("application/vnd.apache.arrow.stream", response.mimetype)
+        table = ipc.open_stream(response.data).read_all()
+        self.assertEqual({"sex", ""}, set(table.column("grouping").to_pylist()))
+
+    def test_arrow_without_extra(self):
+        with patch("statistics_server.app.arrow_available", return_value=False):
+            response = self.client.get(
+                f"{STATISTICS_API_PATH}?{API_QUERY}&format=arrow"
+            )
+        self.assertEqual(400, response.status_code)
+
+    def test_selection_limit(self):
+        query = "&".join(["select=categorical:chronill"] * 3)
+        with patch("statistics_server.app.API_MAX_SELECTIONS", 2):
+            response = self.client.get(f"{STATISTICS_API_PATH}?{query}")
+        self.assertEqual(400, response.status_code)
+        response = self.client.get(f"{STATISTICS_API_PATH}?{query}")
+        self.assertEqual(200, response.status_code)
+
+    def test_incorrect_queries(self):
+        for query in (
+            "",
+            "select=years_injob",
+            "select=ordinal:years_injob",
+            f"{API_QUERY}&format=xml",
+            f"{API_QUERY}&language=fr",
+            f"{API_QUERY}&from=last",
+            f"{API_QUERY}&columns=missing",
+            "select=numerical:years_injob:missing",
+            "select=numerical:missing",
+        ):
+            response = self.client.get(f"{STATISTICS_API_PATH}?{query}")
+            self.assertEqual(400, response.status_code, query)
+
+    def test_missing_statistics(self):
+        with patch(
+            "statistics_server.app._get_data_file_path",
+            return_value=Path("./tests/test_data/missing.csv"),
+        ):
+            response = self.client.get(f"{STATISTICS_API_PATH}?{API_QUERY}")
+        self.assertEqual(404, response.status_code)
@@ -0,0 +1,97 @@
+from os import utime
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from statistics_server.cache import DiskLRUCache, LRUCache
+
+
+class TestLRUCache(TestCase):
+
+    def test_get_returns_stored_value(self):
+        cache = LRUCache(max_bytes=10, sizer=len)
+        cache.put("key", "value")
+        self.assertEqual("value", cache.get("key"))
+        self.assertEqual(5, cache.current_bytes)
+
+    def test_outdated_version_is_dropped(self):
+        cache = LRUCache(max_bytes=10, sizer=len)
+        cache.put("key", "value", version=1)
+        self.assertIsNone(cache.get("key", version=2))
+        self.assertEqual(0, len(cache))
+        self.assertEqual(0, cache.current_bytes)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = LRUCache(max_bytes=10, sizer=len)
+        cache.put("first", "aaaa")
+        cache.put("second", "bbbb")
+        cache.get("first")
+        cache.put("third", "cccc")
+        self.assertEqual("aaaa", cache.get("first"))
+        self.assertIsNone(cache.get("second"))
+        self.assertEqual("cccc", cache.get("third"))
+        self.assertEqual(8, cache.current_bytes)
+
+    def test_oversized_entry_is_not_stored(self):
+        cache = LRUCache(max_bytes=10, sizer=len)
+        cache.put("small", "aaaa")
+        cache.put("big", "b" * 11)
+        self.assertIsNone(cache.get("big"))
+        self.assertEqual("aaaa", cache.get("small"))
+
+    def test_replacing_entry_updates_size(self):
+        cache = LRUCache(max_bytes=10, sizer=len)
+        cache.put("key", "aaaa")
+        cache.put("key", "bb")
+        self.assertEqual("bb", cache.get("key"))
+        self.assertEqual(2, cache.current_bytes)
+
+    def test_hits_and_misses_are_counted(self):
+        cache = LRUCache(max_bytes=10, sizer=len)
+        cache.get("key")
+        cache.put("key", "value", version=1)
+        cache.get("key", version=1)
+        cache.get("key", version=2)
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(2, cache.misses)
+
+
+class TestDiskLRUCache(TestCase):
+
+    def setUp(self):
+        self._temporary_directory = TemporaryDirectory()
+        self.directory = Path(self._temporary_directory.name)
+
+    def tearDown(self):
+        self._temporary_directory.cleanup()
+
+    def test_get_returns_stored_file(self):
+        cache = DiskLRUCache(self.directory, max_bytes=10, suffix=".zip")
+        self.assertIsNone(cache.get("key"))
+        path = cache.put("key", b"value")
+        self.assertEqual(self.directory.joinpath("key.zip"), path)
+        self.assertEqual(path, cache.get("key"))
+        self.assertEqual(b"value", path.read_bytes())
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+    def test_least_recently_used_file_is_evicted(self):
+        cache = DiskLRUCache(self.directory, max_bytes=10)
+        cache.put("first", b"aaaa")
+        cache.put("second", b"bbbb")
+        # Make the access order independent of the file system time resolution.
+        utime(self.directory.joinpath("first"), ns=(1, 1))
+        utime(self.directory.joinpath("second"), ns=(2, 2))
+        cache.get("first")
+        cache.put("third", b"cccc")
+        self.assertIsNotNone(cache.get("first"))
+        self.assertIsNone(cache.get("second"))
+        self.assertIsNotNone(cache.get("third"))
+
+    def test_open_file_stays_readable_after_eviction(self):
+        cache = DiskLRUCache(self.directory, max_bytes=10, suffix=".zip")
+        self.assertIsNone(cache.open("key"))
+        cache.put("key", b"value")
+        with cache.open("key") as file:
+            cache.get_path("key").unlink()
+            self.assertEqual(b"value", file.read())
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
@@ -0,0 +1,110 @@
+from gzip import decompress
+from unittest import TestCase
+
+from flask import Flask, Response
+
+from statistics_server.compression import ResponseCompressor, brotli_available
+
+BODY = '{"data": [' + ", ".join(["1.5"] * 1000) + "]}"
+
+
+def _create_server(compressor: ResponseCompressor) -> Flask:
+    server = Flask(__name__)
+    compressor.init_app(server)
+
+    @server.route("/json")
+    def json_response() -> Response:
+        return Response(BODY, mimetype="application/json")
+
+    @server.route("/small")
+    def small_response() -> Response:
+        return Response("{}", mimetype="application/json")
+
+    @server.route("/zip")
+    def zip_response() -> Response:
+        return Response(BODY, mimetype="application/zip")
+
+    @server.route("/etag")
+    def etag_response() -> Response:
+        # Does not revalidate, like routes that only compare strong ETags.
+        response = Response(BODY, mimetype="application/json")
+        response.set_etag("figure")
+        return response
+
+    @server.route("/not-modified")
+    def not_modified_response() -> Response:
+        response = Response(status=304)
+        response.set_etag("figure")
+        return response
+
+    return server
+
+
+class TestResponseCompressor(TestCase):
+
+    def setUp(self):
+        self.compressor = ResponseCompressor(level=6, min_bytes=100)
+        self.client = _create_server(self.compressor).test_client()
+
+    def test_gzip(self):
+        response = self.client.get("/json", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual("gzip", response.headers["Content-Encoding"])
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+        self.assertEqual(BODY.encode("utf-8"), decompress(response.data))
+        self.assertEqual(len(response.data), int(response.headers["Content-Length"]))
+
+    def test_brotli_is_preferred(self):
+        if not brotli_available():
+            self.skipTest("brotli is not installed")
+        response = self.client.get(
+            "/json", headers={"Accept-Encoding": "gzip, deflate, br"}
+        )
+        self.assertEqual("br", response.headers["Content-Encoding"])
+
+    def test_uncompressed_responses(self):
+        for path, accept_encoding in (
+            ("/json", "identity"),
+            ("/json", "gzip;q=0"),
+            ("/small", "gzip"),
+            ("/zip", "gzip"),
+        ):
+            response = self.client.get(
+                path, headers={"Accept-Encoding": accept_encoding}
+            )
+            self.assertNotIn("Content-Encoding", response.headers, path)
+
+    def test_identical_bodies_are_compressed_once(self):
+        for _ in range(3):
+            self.client.get("/json", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(2, self.compressor.cache.hits)
+        self.assertEqual(1, len(self.compressor.cache))
+
+    def test_level_zero_disables_compression(self):
+        client = _create_server(ResponseCompressor(level=0)).test_client()
+        response = client.get("/json", headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn("Content-Encoding", response.headers)
+
+    def test_compressed_responses_have_weak_etags(self):
+        response = self.client.get("/etag", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(("figure", True), response.get_etag())
+        response = self.client.get("/etag", headers={"Accept-Encoding": "identity"})
+        self.assertEqual(("figure", False), response.get_etag())
+
+    def test_weak_etags_are_revalidated(self):
+        response = self.client.get(
+            "/etag",
+            headers={"Accept-Encoding": "gzip", "If-None-Match": 'W/"figure"'},
+        )
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(b"", response.data)
+        response = self.client.get(
+            "/not-modified",
+            headers={"Accept-Encoding": "gzip", "If-None-Match": 'W/"figure"'},
+        )
+        self.assertEqual(("figure", True), response.get_etag())
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+        response = self.client.get(
+            "/not-modified",
+            headers={"Accept-Encoding": "identity", "If-None-Match": '"figure"'},
+        )
+        self.assertEqual(("figure", False), response.get_etag())
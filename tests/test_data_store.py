@@ -0,0 +1,194 @@
+from os import utime
+from pathlib import Path
+from shutil import copytree
+from tempfile import TemporaryDirectory
+from unittest import TestCase, skipUnless
+
+from pandas import read_csv
+from pandas.testing import assert_frame_equal, assert_series_equal
+
+from statistics_server.data_store import (
+    ARROW_SUFFIX,
+    CSV_SUFFIX,
+    arrow_available,
+    compile_data_store,
+    get_category_labels,
+    get_groupings,
+    get_statistics_file,
+    prepare_statistics,
+    read_prepared_statistics,
+    switch_label_language,
+)
+from statistics_server.metadata import MetadataRegistry
+
+TEST_DATA_PATH = Path("./tests/test_data")
+REGISTRY = MetadataRegistry(TEST_DATA_PATH)
+SIMPLE_DATAFRAME = read_csv(
+    TEST_DATA_PATH.joinpath("categorical/chronill/chronill_year.csv")
+)
+TWO_LABELED_COLUMNS_DATAFRAME = read_csv(
+    TEST_DATA_PATH.joinpath("categorical/chronill/chronill_year_age_gr.csv")
+)
+
+
+def _prepare_chronill_labels(data, grouping, language="de"):
+    category_labels = get_category_labels(
+        REGISTRY.get_label_metadata("categorical", "chronill", grouping)
+    )
+    return switch_label_language(
+        prepare_statistics(data, category_labels), category_labels, language
+    )
+
+
+@skipUnless(arrow_available(), "pyarrow is not installed")
+class TestDataStore(TestCase):
+
+    def setUp(self):
+        self._temporary_directory = TemporaryDirectory()
+        self.base_path = Path(self._temporary_directory.name)
+        copytree(TEST_DATA_PATH, self.base_path, dirs_exist_ok=True)
+        self.file_base = self.base_path.joinpath(
+            "numerical/years_injob/years_injob_year_sex"
+        )
+        self.category_labels = get_category_labels(
+            REGISTRY.get_label_metadata("numerical", "years_injob", ["sex"])
+        )
+
+    def tearDown(self):
+        self._temporary_directory.cleanup()
+
+    def test_csv_is_used_without_compiled_file(self):
+        self.assertEqual(CSV_SUFFIX, get_statistics_file(self.file_base).suffix)
+
+    def test_compiled_file_has_same_content(self):
+        compiled = compile_data_store(self.base_path)
+        self.assertEqual(
+            len(list(self.base_path.glob(f"*/*/*{CSV_SUFFIX}"))),
+            compiled,
+        )
+        statistics_file = get_statistics_file(self.file_base)
+        self.assertEqual(ARROW_SUFFIX, statistics_file.suffix)
+        expected = prepare_statistics(
+            read_csv(self.file_base.with_suffix(CSV_SUFFIX)), self.category_labels
+        ).reset_index(drop=True)
+        assert_frame_equal(
+            expected,
+            read_prepared_statistics(statistics_file, self.category_labels),
+        )
+
+    def test_outdated_labels_are_prepared_again(self):
+        compile_data_store(self.base_path)
+        changed_labels = {"sex": {"en": ["female", "male"], "de": ["w", "m"]}}
+        data = read_prepared_statistics(
+            get_statistics_file(self.file_base), changed_labels
+        )
+        self.assertEqual(["female", "male"], list(data["sex"].cat.categories))
+        self.assertEqual("female", data["sex"].iloc[0])
+
+    def test_changed_precision_is_compiled_again(self):
+        compile_data_store(self.base_path, precision=2)
+        statistics_file = get_statistics_file(self.file_base)
+        data = read_prepared_statistics(statistics_file, self.category_labels)
+        self.assertNotEqual(data["mean"].round(2).tolist(), data["mean"].tolist())
+        self.assertEqual(0, compile_data_store(self.base_path, precision=2))
+        self.assertLess(0, compile_data_store(self.base_path))
+
+    def test_outdated_compiled_file_is_ignored(self):
+        compile_data_store(self.base_path)
+        csv_file = self.file_base.with_suffix(CSV_SUFFIX)
+        arrow_file_stat = self.file_base.with_suffix(ARROW_SUFFIX).stat()
+        newer = arrow_file_stat.st_mtime_ns + 1_000_000_000
+        utime(csv_file, ns=(newer, newer))
+        self.assertEqual(csv_file, get_statistics_file(self.file_base))
+        self.assertEqual(1, compile_data_store(self.base_path))
+
+
+class TestLabelPreparation(TestCase):
+
+    def test_values_are_rounded(self):
+        data = read_csv(
+            TEST_DATA_PATH.joinpath("numerical/years_injob/years_injob_year.csv")
+        )
+        prepared = prepare_statistics(data, {}, precision=2)
+        assert_series_equal(data["mean"].round(2), prepared["mean"])
+        assert_series_equal(data["n"], prepared["n"])
+
+    def test_groupings(self):
+        self.assertEqual(
+            [[], ["a"], ["b"], ["c"], ["a", "b"], ["a", "c"], ["b", "c"]],
+            get_groupings(["c", "a", "b"]),
+        )
+
+    def test_missing_value_labels_are_left_out(self):
+        category_labels = get_category_labels(
+            [REGISTRY.get_variable_metadata("categorical", "chronill")]
+        )
+        self.assertEqual(
+            {"chronill": {"en": ["Yes", "No"], "de": ["Ja", "Nein"]}},
+            category_labels,
+        )
+
+    def test_language_switch_keeps_codes_and_order(self):
+        category_labels = get_category_labels(
+            REGISTRY.get_label_metadata("categorical", "chronill", ["sex"])
+        )
+        data = prepare_statistics(
+            read_csv(
+                TEST_DATA_PATH.joinpath("categorical/chronill/chronill_year_sex.csv")
+            ),
+            category_labels,
+        )
+        german_data = switch_label_language(data, category_labels, "de")
+        self.assertEqual({"Ja", "Nein"}, set(german_data["chronill"]))
+        self.assertEqual({"Yes", "No"}, set(data["chronill"]))
+        assert_series_equal(
+            data["chronill"].cat.codes, german_data["chronill"].cat.codes
+        )
+
+
+class TestLabelLanguageSwitching(TestCase):
+
+    def test_one_column_switch(self):
+        old_values = set(SIMPLE_DATAFRAME["chronill"])
+        self.assertIn("Yes", old_values)
+        self.assertIn("No", old_values)
+        result = _prepare_chronill_labels(SIMPLE_DATAFRAME, [])
+        new_values = set(result["chronill"])
+        self.assertEqual({"Ja", "Nein"}, new_values)
+
+    def test_several_column_switch(self):
+        main_old_values = set(TWO_LABELED_COLUMNS_DATAFRAME["chronill"])
+        secondary_old_values = set(TWO_LABELED_COLUMNS_DATAFRAME["age_gr"])
+
+        self.assertIn("Yes", main_old_values)
+        self.assertIn("No", main_old_values)
+        self.assertIn("18-29 y.", secondary_old_values)
+        self.assertIn("30-45 y.", secondary_old_values)
+        result = _prepare_chronill_labels(TWO_LABELED_COLUMNS_DATAFRAME, ["age_gr"])
+        new_main_values = set(result["chronill"])
+        self.assertEqual({"Ja", "Nein"}, new_main_values)
+        self.assertEqual({"Ja", "Nein"}, new_main_values)
+        new_secondary_values = set(result["age_gr"])
+        self.assertEqual(
+            {"18-29 J.", "30-45 J.", "46-65 J.", "66 und älter"},
+            new_secondary_values,
+        )
+
+    def test_several_column_no_language_switch(self):
+        main_old_values = set(TWO_LABELED_COLUMNS_DATAFRAME["chronill"])
+        secondary_old_values = set(TWO_LABELED_COLUMNS_DATAFRAME["age_gr"])
+
+        self.assertIn("Yes", main_old_values)
+        self.assertIn("No", main_old_values)
+        self.assertIn("18-29 y.", secondary_old_values)
+        self.assertIn("30-45 y.", secondary_old_values)
+        result = _prepare_chronill_labels(
+            TWO_LABELED_COLUMNS_DATAFRAME, ["age_gr"], language="en"
+        )
+        new_main_values = set(result["chronill"])
+        self.assertEqual({"Yes", "No"}, new_main_values)
+        new_secondary_values = set(result["age_gr"])
+        self.assertEqual(
+            {"18-29 y.", "30-45 y.", "46-65 y.", "66 and older"},
+            new_secondary_values,
+        )
@@ -0,0 +1,98 @@
+from io import BytesIO
+from pathlib import Path
+from shutil import copy
+from tempfile import TemporaryDirectory
+from unittest import TestCase, skipUnless
+from zipfile import ZipFile
+
+from pandas import read_csv, read_excel
+from pandas.testing import assert_frame_equal
+
+from statistics_server.cache import DiskLRUCache
+from statistics_server.data_store import arrow_available, compile_data_store
+from statistics_server.downloads import create_data_archive, pregenerate_data_archives
+
+TEST_DATA_PATH = Path("./tests/test_data")
+
+
+class TestDataArchive(TestCase):
+
+    def test_archive_contains_all_files(self):
+        data = read_csv(
+            TEST_DATA_PATH.joinpath("numerical/years_injob/years_injob_year_sex.csv")
+        )
+        archive = create_data_archive(
+            "years_injob_year_sex",
+            {"en": data, "de": data},
+            {"en": "Cite this", "de": "Zitiere das"},
+        )
+        with ZipFile(archive) as zip_file:
+            self.assertEqual(
+                [
+                    "years_injob_year_sex_en.csv",
+                    "years_injob_year_sex_en.xlsx",
+                    "Cite_en.txt",
+                    "years_injob_year_sex_de.csv",
+                    "years_injob_year_sex_de.xlsx",
+                    "Cite_de.txt",
+                ],
+                zip_file.namelist(),
+            )
+            self.assertEqual(b"Zitiere das", zip_file.read("Cite_de.txt"))
+            assert_frame_equal(
+                data, read_csv(BytesIO(zip_file.read("years_injob_year_sex_en.csv")))
+            )
+            assert_frame_equal(
+                data,
+                read_excel(BytesIO(zip_file.read("years_injob_year_sex_de.xlsx"))),
+            )
+
+
+class TestPregeneration(TestCase):
+
+    def setUp(self):
+        self._temporary_directory = TemporaryDirectory()
+        temporary_path = Path(self._temporary_directory.name)
+        self.base_path = temporary_path.joinpath("data")
+        variable_path = self.base_path.joinpath("numerical/years_injob")
+        variable_path.mkdir(parents=True)
+        for file_name in ("group_metadata.json", "citation.json"):
+            copy(TEST_DATA_PATH.joinpath(file_name), self.base_path)
+        for file_name in (
+            "meta.json",
+            "years_injob_year.csv",
+            "years_injob_year_sex.csv",
+        ):
+            copy(
+                TEST_DATA_PATH.joinpath("numerical/years_injob", file_name),
+                variable_path,
+            )
+        self.cache = DiskLRUCache(
+            temporary_path.joinpath("cache"), max_bytes=10 * 1024**2, suffix=".zip"
+        )
+
+    def tearDown(self):
+        self._temporary_directory.cleanup()
+
+    def test_only_missing_archives_are_created(self):
+        sizes = pregenerate_data_archives(self.base_path, self.cache, workers=1)
+        self.assertEqual(2, len(sizes))
+        self.assertTrue(all(sizes))
+        self.assertEqual(2, len(list(self.cache.directory.glob("*.zip"))))
+        self.assertEqual(
+            [0, 0], pregenerate_data_archives(self.base_path, self.cache, workers=1)
+        )
+
+    def test_archives_exceeding_the_cache_are_not_evicted(self):
+        self.cache.max_bytes = 1
+        with self.assertRaisesRegex(RuntimeError, "DOWNLOAD_CACHE_MAX_BYTES"):
+            pregenerate_data_archives(self.base_path, self.cache, workers=1)
+        self.assertEqual(2, len(list(self.cache.directory.glob("*.zip"))))
+
+    @skipUnless(arrow_available(), "pyarrow is not installed")
+    def test_compiling_keeps_archives_up_to_date(self):
+        pregenerate_data_archives(self.base_path, self.cache, workers=1)
+        compile_data_store(self.base_path)
+        self.assertEqual(
+            [0, 0], pregenerate_data_archives(self.base_path, self.cache, workers=1)
+        )
@@ -0,0 +1,85 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import sleep
+from unittest import TestCase
+from unittest.mock import patch
+
+from statistics_server.export_jobs import ExportQueue
+
+
+def _fail(job):
+    raise ValueError(f"Broken {job['name']}")
+
+
+class TestExportQueue(TestCase):
+
+    def setUp(self):
+        self._temporary_directory = TemporaryDirectory()
+        self.queue = ExportQueue(Path(self._temporary_directory.name), concurrency=1)
+
+    def tearDown(self):
+        self._temporary_directory.cleanup()
+
+    def test_jobs_run_in_order(self):
+        first = self.queue.submit({"name": "first"})
+        second = self.queue.submit({"name": "second"})
+        self.assertEqual({"status": "pending"}, self.queue.get_state(first))
+
+        self.assertTrue(self.queue.run_next(lambda job: job["name"]))
+        self.assertEqual(
+            {"status": "done", "result": "first"}, self.queue.get_state(first)
+        )
+        self.assertEqual({"status": "pending"}, self.queue.get_state(second))
+        self.assertTrue(self.queue.run_next(lambda job: job["name"]))
+        self.assertFalse(self.queue.run_next(lambda job: job["name"]))
+
+    def test_failed_job(self):
+        job_id = self.queue.submit({"name": "figure"})
+        self.assertTrue(self.queue.run_next(_fail))
+        self.assertEqual(
+            {"status": "failed", "error": "Broken figure"},
+            self.queue.get_state(job_id),
+        )
+
+    def test_concurrency_is_limited(self):
+        first = self.queue.submit({"name": "first"})
+        second = self.queue.submit({"name": "second"})
+
+        def export(job):
+            # The only slot is taken while this job runs.
+            self.assertFalse(self.queue.run_next(lambda job: job["name"]))
+            return job["name"]
+
+        self.assertTrue(self.queue.run_next(export))
+        self.assertEqual("done", self.queue.get_state(first)["status"])
+        self.assertEqual("pending", self.queue.get_state(second)["status"])
+        self.assertTrue(self.queue.run_next(lambda job: job["name"]))
+        self.assertEqual("done", self.queue.get_state(second)["status"])
+
+    def test_slot_of_crashed_process_expires(self):
+        self.queue.submit({"name": "crashed"})
+        job_id = self.queue.submit({"name": "second"})
+        with patch("statistics_server.export_jobs.EXPORT_JOB_EXPIRE", 0.1):
+            # Taken by a process that crashes before it releases the slot.
+            self.queue._take_job()
+        self.assertFalse(self.queue.run_next(lambda job: job["name"]))
+        sleep(0.2)
+        self.assertTrue(self.queue.run_next(lambda job: job["name"]))
+        self.assertEqual("done", self.queue.get_state(job_id)["status"])
+
+    def test_expired_slot_is_not_released_twice(self):
+        self.queue.submit({"name": "slow"})
+        job_id = self.queue.submit({"name": "second"})
+        self.queue.submit({"name": "third"})
+        with patch("statistics_server.export_jobs.EXPORT_JOB_EXPIRE", 0.1):
+            slot, slow_job_id, _ = self.queue._take_job()
+        sleep(0.2)
+
+        def export(job):
+            # The slow job ends after its slot was taken by this one.
+            self.queue._release_slot(slot, slow_job_id)
+            self.assertFalse(self.queue.run_next(lambda job: job["name"]))
+            return job["name"]
+
+        self.assertTrue(self.queue.run_next(export))
+        self.assertEqual("done", self.queue.get_state(job_id)["status"])
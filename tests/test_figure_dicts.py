@@ -0,0 +1,85 @@
+from json import loads
+from pathlib import Path
+from unittest import TestCase
+
+from pandas import read_csv
+from plotly.io import to_json
+
+from statistics_server.numerical_boxplot_graph import create_numerical_boxplot_figure
+from statistics_server.simple_graph import (
+    create_bar_graph_figure,
+    create_line_graph_figure,
+)
+
+TEST_DATA_PATH = Path("./tests/test_data")
+
+
+def _serialize(figure):
+    return loads(to_json(figure, validate=False))
+
+
+class TestFigureDictParity(TestCase):
+    """Figure dicts created without validation must equal validated figures."""
+
+    def setUp(self):
+        numerical_path = TEST_DATA_PATH.joinpath("numerical/years_injob")
+        self.numerical = read_csv(numerical_path.joinpath("years_injob_year.csv"))
+        self.numerical_grouped = read_csv(
+            numerical_path.joinpath("years_injob_year_age_gr_sex.csv")
+        )
+        self.categorical_grouped = read_csv(
+            TEST_DATA_PATH.joinpath("categorical/chronill/chronill_year_sex.csv")
+        )
+
+    def assertSameFigure(self, create_figure, *args, **kwargs):
+        validated = create_figure(*args, **kwargs)
+        unvalidated = create_figure(*args, **kwargs, validate=False)
+        self.assertIsInstance(unvalidated, dict)
+        self.assertEqual(_serialize(validated), _serialize(unvalidated))
+
+    def test_line_graph(self):
+        for measure in ("mean", "median"):
+            self.assertSameFigure(
+                create_line_graph_figure, self.numerical, measure=measure
+            )
+
+    def test_grouped_line_graph(self):
+        for show_confidence in (True, False):
+            for show_legend in (True, False):
+                self.assertSameFigure(
+                    create_line_graph_figure,
+                    self.numerical_grouped,
+                    group=["age_gr", "sex"],
+                    show_confidence=show_confidence,
+                    show_legend=show_legend,
+                    trace_visibility={"under 18 y. male": "legendonly"},
+                    language="de",
+                )
+
+    def test_proportion_line_graph(self):
+        self.assertSameFigure(
+            create_line_graph_figure,
+            self.categorical_grouped,
+            group=["sex", "chronill"],
+            measure="proportion",
+        )
+
+    def test_bar_graph(self):
+        self.assertSameFigure(
+            create_bar_graph_figure,
+            self.categorical_grouped,
+            group=["sex", "chronill"],
+            measure="proportion",
+        )
+        self.assertSameFigure(create_bar_graph_figure, self.numerical)
+
+    def test_boxplot(self):
+        self.assertSameFigure(
+            create_numerical_boxplot_figure,
+            self.numerical_grouped,
+            groups=["age_gr", "sex"],
+            show_legend=False,
+        )
+        self.assertSameFigure(
+            create_numerical_boxplot_figure, self.numerical, groups=[], y_title="Years"
+        )
@@ -0,0 +1,118 @@
+from json import loads
+from os import utime
+from pathlib import Path
+from shutil import copy
+from tempfile import TemporaryDirectory
+from unittest import TestCase, skipUnless
+
+from pandas import read_csv
+from plotly.io import to_json
+
+from statistics_server.data_store import (
+    ARROW_SUFFIX,
+    arrow_available,
+    compile_data_store,
+    get_category_labels,
+    read_prepared_statistics,
+)
+from statistics_server.figures import (
+    StaticFigureIndex,
+    create_figure,
+    get_figure_source,
+    prerender_default_figures,
+)
+from statistics_server.layout import encode_typed_arrays
+from statistics_server.simple_graph import (
+    apply_display_options,
+    create_line_graph_figure,
+)
+
+TEST_DATA_PATH = Path("./tests/test_data")
+
+
+class TestCreateFigure(TestCase):
+
+    def test_boxplot_is_hidden_for_small_values(self):
+        data = read_csv(
+            TEST_DATA_PATH.joinpath("numerical/years_injob/years_injob_year.csv")
+        )
+        data["mean"] = 1.0
+        _, show_boxplot = create_figure(
+            data, "numerical", "years_injob", [], "mean", False, True, "en"
+        )
+        self.assertEqual("hide", show_boxplot)
+
+
+class TestPrerendering(TestCase):
+
+    def setUp(self):
+        self._temporary_directory = TemporaryDirectory()
+        temporary_path = Path(self._temporary_directory.name)
+        self.base_path = temporary_path.joinpath("data")
+        variable_path = self.base_path.joinpath("numerical/years_injob")
+        variable_path.mkdir(parents=True)
+        copy(TEST_DATA_PATH.joinpath("group_metadata.json"), self.base_path)
+        for file_name in ("meta.json", "years_injob_year.csv"):
+            copy(
+                TEST_DATA_PATH.joinpath("numerical/years_injob", file_name),
+                variable_path,
+            )
+        self.data_file = variable_path.joinpath("years_injob_year.csv")
+        self.directory = temporary_path.joinpath("figures")
+
+    def tearDown(self):
+        self._temporary_directory.cleanup()
+
+    def _get_figure(self, index):
+        return index.get(
+            "numerical",
+            "years_injob",
+            "mean",
+            "en",
+            get_figure_source(self.data_file, []),
+        )
+
+    def test_figures_match_line_graph(self):
+        self.assertEqual(
+            4, prerender_default_figures(self.base_path, self.directory, workers=1)
+        )
+        static_figure = self._get_figure(StaticFigureIndex(self.directory))
+        self.assertIsNotNone(static_figure)
+
+        data = read_prepared_statistics(self.data_file, get_category_labels([]))
+        figure = create_line_graph_figure(data, group=[], validate=False)
+        encode_typed_arrays(figure)
+        apply_display_options(figure, show_confidence=True, show_legend=True)
+        self.assertEqual(
+            loads(to_json(figure, validate=False)),
+            loads(self.directory.joinpath(static_figure["file"]).read_text()),
+        )
+
+    def test_changed_data_invalidates_figures(self):
+        prerender_default_figures(self.base_path, self.directory, workers=1)
+        index = StaticFigureIndex(self.directory)
+        utime(self.data_file, ns=(0, 0))
+        self.assertIsNone(self._get_figure(index))
+
+        prerender_default_figures(self.base_path, self.directory, workers=1)
+        self.assertIsNotNone(self._get_figure(index))
+
+    @skipUnless(arrow_available(), "pyarrow is not installed")
+    def test_compiling_keeps_figures_up_to_date(self):
+        prerender_default_figures(self.base_path, self.directory, workers=1)
+        compile_data_store(self.base_path)
+        compiled_file = self.data_file.with_suffix(ARROW_SUFFIX)
+        self.assertTrue(compiled_file.exists())
+        self.assertEqual(
+            get_figure_source(self.data_file, []), get_figure_source(compiled_file, [])
+        )
+        self.assertIsNotNone(self._get_figure(StaticFigureIndex(self.directory)))
+
+    def test_unused_files_are_removed(self):
+        self.directory.mkdir()
+        unused_file = self.directory.joinpath("0123.json.gz")
+        unused_file.write_bytes(b"")
+        prerender_default_figures(self.base_path, self.directory, workers=1)
+        self.assertFalse(unused_file.exists())
+        index = StaticFigureIndex(self.directory)
+        self.assertIn(self._get_figure(index)["file"], index)
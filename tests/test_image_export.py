@@ -0,0 +1,129 @@
+from os import _exit
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from statistics_server.cache import DiskLRUCache
+from statistics_server.image_export import (
+    RendererPool,
+    get_image_key,
+    read_cached_images,
+    render_cached_images,
+)
+
+
+def _render_description(figure_json, formats, width, height):
+    if figure_json == "crash":
+        _exit(1)
+    if figure_json == "fail":
+        raise ValueError("Broken figure")
+    return {
+        image_format: f"{figure_json} {width}x{height}".encode("utf-8")
+        for image_format in formats
+    }
+
+
+def _report_broken():
+    return False
+
+
+class TestRendererPool(TestCase):
+
+    def setUp(self):
+        self.pool = RendererPool(
+            size=1, timeout=10, render_function="test_image_export:_render_description"
+        )
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_render(self):
+        self.assertEqual(
+            {"svg": b"{} 10x5", "png": b"{} 10x5"},
+            self.pool.render("{}", ["svg", "png"], 10, 5),
+        )
+
+    def test_crashed_renderer_is_replaced(self):
+        with self.assertRaises(RuntimeError):
+            self.pool.render("crash", ["svg"], 10, 5)
+        self.assertEqual({"svg": b"{} 10x5"}, self.pool.render("{}", ["svg"], 10, 5))
+
+    def test_render_error_keeps_renderer(self):
+        with self.assertRaisesRegex(RuntimeError, "Broken figure"):
+            self.pool.render("fail", ["svg"], 10, 5)
+        self.assertEqual(0, self.pool.check_health())
+        self.assertEqual({"svg": b"{} 10x5"}, self.pool.render("{}", ["svg"], 10, 5))
+
+    def test_health_check_restarts_dead_renderer(self):
+        renderer = self.pool._idle.queue[0]
+        renderer._process.kill()
+        renderer._process.wait()
+        self.assertEqual(1, self.pool.check_health())
+        self.assertEqual(0, self.pool.check_health())
+
+    def test_failed_health_check_restarts_renderer(self):
+        pool = RendererPool(
+            size=1,
+            timeout=10,
+            render_function="test_image_export:_render_description",
+            health_check="test_image_export:_report_broken",
+        )
+        try:
+            self.assertEqual(1, pool.check_health())
+            self.assertEqual({"svg": b"{} 10x5"}, pool.render("{}", ["svg"], 10, 5))
+        finally:
+            pool.close()
+
+
+class TestImageCache(TestCase):
+
+    def setUp(self):
+        self._temporary_directory = TemporaryDirectory()
+        self.cache = DiskLRUCache(
+            Path(self._temporary_directory.name), max_bytes=1024, suffix=".image"
+        )
+        self.rendered = []
+
+    def tearDown(self):
+        self._temporary_directory.cleanup()
+
+    def _render(self, figure_json, formats, width, height):
+        self.rendered.append(formats)
+        return _render_description(figure_json, formats, width, height)
+
+    def test_key_ignores_formatting(self):
+        self.assertEqual(
+            get_image_key('{"a": 1, "b": 2}', "svg", 10, 5),
+            get_image_key('{"b":2,"a":1}', "svg", 10, 5),
+        )
+        self.assertNotEqual(
+            get_image_key("{}", "svg", 10, 5), get_image_key("{}", "svg", 10, 6)
+        )
+        self.assertNotEqual(
+            get_image_key("{}", "svg", 10, 5), get_image_key("{}", "png", 10, 5)
+        )
+
+    def test_only_missing_formats_are_rendered(self):
+        self.assertEqual(
+            {"svg": b"{} 10x5"},
+            render_cached_images(self.cache, self._render, "{}", ["svg"], 10, 5),
+        )
+        self.assertEqual(
+            {"svg": b"{} 10x5", "png": b"{ } 10x5"},
+            render_cached_images(
+                self.cache, self._render, "{ }", ["svg", "png"], 10, 5
+            ),
+        )
+        render_cached_images(self.cache, self._render, "{}", ["svg", "png"], 10, 5)
+        self.assertEqual([["svg"], ["png"]], self.rendered)
+        self.assertEqual(3, self.cache.hits)
+
+    def test_cached_images_are_read_only_if_all_formats_exist(self):
+        self.assertIsNone(read_cached_images(self.cache, "{}", ["svg"], 10, 5))
+        render_cached_images(self.cache, self._render, "{}", ["svg"], 10, 5)
+        self.assertEqual(
+            {"svg": b"{} 10x5"},
+            read_cached_images(self.cache, "{ }", ["svg"], 10, 5),
+        )
+        self.assertIsNone(read_cached_images(self.cache, "{}", ["svg", "png"], 10, 5))
+        self.assertEqual([["svg"]], self.rendered)
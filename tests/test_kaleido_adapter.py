@@ -0,0 +1,63 @@
+from base64 import b64encode
+from json import dumps
+from tomllib import load
+from unittest import TestCase
+from unittest.mock import patch
+
+from statistics_server.kaleido_adapter import (
+    SUPPORTED_VERSIONS,
+    KaleidoPage,
+    check_versions,
+)
+
+
+class TestVersions(TestCase):
+
+    def test_supported_versions_are_pinned(self):
+        with open("pyproject.toml", "rb") as pyproject:
+            dependencies = load(pyproject)["tool"]["poetry"]["dependencies"]
+        for distribution, supported_version in SUPPORTED_VERSIONS.items():
+            self.assertEqual(supported_version, dependencies[distribution])
+
+    def test_other_versions_are_rejected(self):
+        check_versions()
+        with patch("statistics_server.kaleido_adapter.version", return_value="1.0.0"):
+            with self.assertRaisesRegex(RuntimeError, "kaleido 0.4.0rc5"):
+                check_versions()
+
+
+class TestKaleidoPage(TestCase):
+
+    def setUp(self):
+        self.page = KaleidoPage()
+
+    def test_page_loads_the_kaleido_bundle(self):
+        self.assertIn("kaleido_scopes", self.page.make_html())
+
+    def test_spec(self):
+        spec = self.page.make_spec({"data": [], "layout": {}}, "png", 10, 5)
+        self.assertEqual(
+            ("png", 10, 5), (spec["format"], spec["width"], spec["height"])
+        )
+
+    def test_read_image(self):
+        self.assertEqual(
+            b"<svg></svg>",
+            self.page.read_image(
+                dumps({"code": 0, "format": "svg", "result": "<svg></svg>"})
+            ),
+        )
+        self.assertEqual(
+            b"\x89PNG",
+            self.page.read_image(
+                dumps(
+                    {
+                        "code": 0,
+                        "format": "png",
+                        "result": b64encode(b"\x89PNG").decode(),
+                    }
+                )
+            ),
+        )
+        with self.assertRaisesRegex(RuntimeError, "Broken figure"):
+            self.page.read_image(dumps({"code": 1, "message": "Broken figure"}))
@@ -1,7 +1,14 @@
+from base64 import b64decode
 from unittest import TestCase
 
-from statistics_server.layout import create_grouping_dropdown
+from numpy import array, frombuffer
+from numpy.testing import assert_array_equal
 
+from statistics_server.layout import (
+    create_figure_patch,
+    create_grouping_dropdown,
+    encode_typed_arrays,
+)
 
 METADATA = {
     "some-grouping-variable": {
@@ -51,7 +58,10 @@ class TestLayoutFabrics(TestCase):
 
     def test_grouping_dropdown_exclude_element(self):
         expected_unselected = {"label": "No Grouping", "value": None}
-        expected_not_in_groups = {"label": "SOMETHING", "value": "some-grouping-variable"}
+        expected_not_in_groups = {
+            "label": "SOMETHING",
+            "value": "some-grouping-variable",
+        }
         expected_second_group = {
             "label": "SOMETHING ELSE",
             "value": "some-other-grouping-variable",
@@ -65,3 +75,78 @@ class TestLayoutFabrics(TestCase):
         self.assertIn(expected_unselected, dropdown.options)
         self.assertNotIn(expected_not_in_groups, dropdown.options)
         self.assertIn(expected_second_group, dropdown.options)
+
+
+class TestTypedArrays(TestCase):
+
+    def test_numerical_arrays_are_encoded(self):
+        figure = {
+            "data": [
+                {
+                    "x": array([1984, 1985]),
+                    "y": array([0.5, float("nan")]),
+                    "customdata": array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]),
+                    "name": "a",
+                }
+            ],
+            "layout": {},
+        }
+        encode_typed_arrays(figure)
+        trace = figure["data"][0]
+        self.assertEqual("i4", trace["x"]["dtype"])
+        assert_array_equal(
+            [1984, 1985], frombuffer(b64decode(trace["x"]["bdata"]), "<i4")
+        )
+        assert_array_equal(
+            [0.5, float("nan")], frombuffer(b64decode(trace["y"]["bdata"]), "<f4")
+        )
+        self.assertEqual("2, 3", trace["customdata"]["shape"])
+        self.assertEqual("a", trace["name"])
+
+
+class TestFigurePatch(TestCase):
+
+    def setUp(self):
+        self.figure = {
+            "data": [{"type": "scatter", "name": "a", "y": [1, 2], "visible": True}],
+            "layout": {"yaxis": {"dtick": 1}, "legend": {"visible": True}},
+        }
+
+    def test_only_changes_are_patched(self):
+        updated = {
+            "data": [{"type": "scatter", "name": "a", "y": [3, 4], "visible": True}],
+            "layout": {"yaxis": {"dtick": 2}},
+        }
+        patch = create_figure_patch(self.figure, updated)
+        self.assertEqual(
+            [
+                {
+                    "operation": "Assign",
+                    "location": ["data", 0, "y"],
+                    "params": {"value": [3, 4]},
+                },
+                {
+                    "operation": "Assign",
+                    "location": ["layout", "yaxis"],
+                    "params": {"value": {"dtick": 2}},
+                },
+                {"operation": "Delete", "location": ["layout", "legend"], "params": {}},
+            ],
+            patch.to_plotly_json()["operations"],
+        )
+
+    def test_different_traces_are_replaced(self):
+        updated = {
+            "data": [{"type": "bar", "name": "a", "y": [1, 2]}],
+            "layout": self.figure["layout"],
+        }
+        self.assertEqual(
+            [
+                {
+                    "operation": "Assign",
+                    "location": ["data"],
+                    "params": {"value": updated["data"]},
+                },
+            ],
+            create_figure_patch(self.figure, updated).to_plotly_json()["operations"],
+        )
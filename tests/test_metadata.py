@@ -0,0 +1,71 @@
+from json import dump
+from pathlib import Path
+from shutil import copytree
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from statistics_server.metadata import MetadataRegistry
+
+TEST_DATA_PATH = Path("./tests/test_data")
+
+
+class TestMetadataRegistry(TestCase):
+
+    def setUp(self):
+        self.registry = MetadataRegistry(TEST_DATA_PATH)
+
+    def test_all_variables_are_indexed(self):
+        variables = self.registry.variables()
+        self.assertIn(("categorical", "chronill"), variables)
+        self.assertIn(("numerical", "years_injob"), variables)
+
+    def test_allowed_groups_are_filtered(self):
+        allowed_groups = self.registry.get_allowed_groups("categorical", "chronill")
+        self.assertIn("age_gr", allowed_groups)
+        self.assertNotIn("hhtyp", allowed_groups)
+
+    def test_all_groups_are_allowed_without_restriction(self):
+        allowed_groups = self.registry.get_allowed_groups("numerical", "years_injob")
+        self.assertEqual(self.registry.group_metadata, allowed_groups)
+
+    def test_label_metadata_of_categorical_variable(self):
+        label_metadata = self.registry.get_label_metadata(
+            "categorical", "chronill", ["age_gr"]
+        )
+        self.assertEqual(
+            ["chronill", "age_gr"],
+            [_metadata["variable"] for _metadata in label_metadata],
+        )
+
+    def test_label_metadata_of_numerical_variable(self):
+        label_metadata = self.registry.get_label_metadata(
+            "numerical", "years_injob", ["sex"]
+        )
+        self.assertEqual(
+            ["sex"], [_metadata["variable"] for _metadata in label_metadata]
+        )
+
+    def test_unknown_variable(self):
+        with self.assertRaises(RuntimeError):
+            self.registry.get_variable_metadata("numerical", "does_not_exist")
+
+    def test_refresh_picks_up_changes(self):
+        with TemporaryDirectory() as temporary_directory:
+            base_path = Path(temporary_directory)
+            copytree(TEST_DATA_PATH, base_path, dirs_exist_ok=True)
+            registry = MetadataRegistry(base_path)
+            version = registry.version
+            metadata_file = base_path.joinpath("numerical/years_injob/meta.json")
+            variable_metadata = registry.get_variable_metadata(
+                "numerical", "years_injob"
+            )
+            with open(metadata_file, "w", encoding="utf-8") as file:
+                dump({**variable_metadata, "title": "Changed"}, file)
+
+            registry.refresh()
+
+            self.assertEqual(version + 1, registry.version)
+            self.assertEqual(
+                "Changed",
+                registry.get_variable_metadata("numerical", "years_injob")["title"],
+            )
@@ -0,0 +1,60 @@
+from pathlib import Path
+from unittest import TestCase
+
+from numpy.testing import assert_array_equal
+from pandas import read_csv
+
+from statistics_server.simple_graph import (
+    apply_display_options,
+    create_hovertemplate,
+    create_line_graph_figure,
+    get_tooltip_data,
+)
+
+TEST_DATA_PATH = Path("./tests/test_data")
+
+
+class TestTooltips(TestCase):
+
+    def test_tooltip_data_columns(self):
+        data = read_csv(
+            TEST_DATA_PATH.joinpath("numerical/years_injob/years_injob_year.csv")
+        )
+        tooltip_data = get_tooltip_data(data, "median")
+        self.assertEqual((len(data), 3), tooltip_data.shape)
+        assert_array_equal(data["median_upper_confidence"], tooltip_data[:, 2])
+
+    def test_hovertemplate_formats(self):
+        template = create_hovertemplate("proportion", "de")
+        self.assertIn("Anteil: %{y:.2%}", template)
+        self.assertIn("Untere Konfidenz Grenze: %{customdata[1]:.2%}", template)
+        template = create_hovertemplate("mean", value_format=".2%")
+        self.assertIn("Mean: %{y:.2%}", template)
+        self.assertIn("Upper confidence: %{customdata[2]:.2f}", template)
+
+
+class TestDisplayOptions(TestCase):
+
+    def setUp(self):
+        data = read_csv(
+            TEST_DATA_PATH.joinpath("numerical/years_injob/years_injob_year_sex.csv")
+        )
+        self.figure = create_line_graph_figure(data, group=["sex"], validate=False)
+        self.figure["data"][0]["visible"] = "legendonly"
+
+    def test_hide_confidence_and_legend(self):
+        apply_display_options(self.figure, show_confidence=False, show_legend=False)
+        self.assertEqual(
+            [False] * 4,
+            [trace["visible"] for trace in self.figure["data"] if "meta" in trace],
+        )
+        self.assertFalse(self.figure["layout"]["legend"]["visible"])
+
+    def test_confidence_follows_line_visibility(self):
+        apply_display_options(self.figure, show_confidence=False, show_legend=True)
+        apply_display_options(self.figure, show_confidence=True, show_legend=True)
+        self.assertEqual(
+            ["legendonly", "legendonly", True, True],
+            [trace["visible"] for trace in self.figure["data"] if "meta" in trace],
+        )
+        self.assertTrue(self.figure["layout"]["legend"]["visible"])
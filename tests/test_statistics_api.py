@@ -0,0 +1,116 @@
+from json import loads
+from pathlib import Path
+from unittest import TestCase
+
+from pandas import read_csv
+from pyarrow import ipc
+
+from statistics_server.statistics_api import (
+    check_columns,
+    combine_statistics,
+    get_key_columns,
+    iter_arrow_stream,
+    parse_selection,
+    select_statistics,
+    statistics_to_json,
+)
+
+TEST_DATA_PATH = Path("./tests/test_data")
+
+
+class TestParseSelection(TestCase):
+
+    def test_selection_with_groups(self):
+        self.assertEqual(
+            ("numerical", "years_injob", ["sex", "age_gr"]),
+            parse_selection("numerical:years_injob:sex,age_gr"),
+        )
+
+    def test_selection_without_groups(self):
+        self.assertEqual(
+            ("categorical", "chronill", []), parse_selection("categorical:chronill")
+        )
+
+    def test_incorrect_selections(self):
+        for selection in (
+            "years_injob",
+            "ordinal:years_injob",
+            "numerical:years_injob:sex,age_gr,bula",
+            "numerical:years_injob:",
+        ):
+            with self.assertRaises(RuntimeError):
+                parse_selection(selection)
+
+
+class TestSelectStatistics(TestCase):
+
+    def setUp(self):
+        self.data = read_csv(
+            TEST_DATA_PATH.joinpath("categorical/chronill/chronill_year_sex.csv")
+        )
+        self.key_columns = get_key_columns("categorical", "chronill", ["sex"])
+
+    def test_columns_are_selected_with_key_columns(self):
+        selected = select_statistics(self.data, self.key_columns, ["proportion"])
+        self.assertEqual(
+            ["year", "sex", "chronill", "proportion"], list(selected.columns)
+        )
+        self.assertEqual(len(self.data), len(selected))
+
+    def test_missing_columns_are_skipped(self):
+        selected = select_statistics(self.data, self.key_columns, ["mean"])
+        self.assertEqual(self.key_columns, list(selected.columns))
+        with self.assertRaises(RuntimeError):
+            check_columns([(("categorical", "chronill", ["sex"]), selected)], ["mean"])
+
+    def test_year_range(self):
+        start_year = sorted(self.data["year"].unique())[1]
+        selected = select_statistics(self.data, self.key_columns, None, start_year)
+        self.assertEqual(start_year, selected["year"].min())
+        self.assertEqual(self.data["year"].max(), selected["year"].max())
+        selected = select_statistics(
+            self.data, self.key_columns, None, start_year, start_year
+        )
+        self.assertEqual({start_year}, set(selected["year"]))
+
+
+class TestSerialization(TestCase):
+
+    def setUp(self):
+        data = read_csv(
+            TEST_DATA_PATH.joinpath("categorical/chronill/chronill_year_sex.csv")
+        )
+        self.statistics = [(("categorical", "chronill", ["sex"]), data)]
+
+    def test_json(self):
+        statistics = loads(statistics_to_json(self.statistics))["statistics"]
+        _, data = self.statistics[0]
+        self.assertEqual("chronill", statistics[0]["variable"])
+        self.assertEqual(["sex"], statistics[0]["grouping"])
+        self.assertEqual(list(data.columns), statistics[0]["data"]["columns"])
+        self.assertEqual(len(data), len(statistics[0]["data"]["data"]))
+
+    def test_missing_values_are_null(self):
+        _, data = self.statistics[0]
+        data.loc[data.index[0], "proportion"] = float("nan")
+        statistics = loads(statistics_to_json(self.statistics))["statistics"]
+        column = statistics[0]["data"]["columns"].index("proportion")
+        self.assertIsNone(statistics[0]["data"]["data"][0][column])
+
+    def test_combined_statistics_name_their_grouping(self):
+        data = read_csv(
+            TEST_DATA_PATH.joinpath("numerical/years_injob/years_injob_year.csv")
+        )
+        combined = combine_statistics(
+            [*self.statistics, (("numerical", "years_injob", []), data)]
+        )
+        self.assertEqual(
+            {("chronill", "sex"), ("years_injob", "")},
+            set(zip(combined["variable"], combined["grouping"])),
+        )
+
+    def test_arrow_stream(self):
+        combined = combine_statistics(self.statistics)
+        stream = b"".join(iter_arrow_stream(combined))
+        table = ipc.open_stream(stream).read_all()
+        self.assertTrue(table.to_pandas().equals(combined))